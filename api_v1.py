@@ -0,0 +1,355 @@
+"""
+API JSON versionada (/api/v1) para dolls, clientes y cartas.
+
+    GET   /api/v1/dolls              ?estado= &after_id= &limite= &campos=
+    GET   /api/v1/dolls/<id>
+    GET   /api/v1/clientes           ?q= &ciudad= &motivo= &offset= &limite= &campos=
+    GET   /api/v1/clientes/<id>
+    POST  /api/v1/clientes           {"nombre", "ciudad", "motivo", "contacto"}
+    GET   /api/v1/cartas             ?estado= &doll_id= &cliente_id= &after_id= &limite= &campos=
+    GET   /api/v1/cartas/<id>
+    POST  /api/v1/cartas/lote        {"cartas": [{"cliente_id", "contenido"?, "estado"?}]}
+    PATCH /api/v1/cartas/lote        {"cartas": [{"id", "estado"?, "contenido"?}]}
+    POST  /api/v1/cartas/transiciones  {"estado", "ids": [...]} o {"cambios": [{"id", "estado"}]}
+
+Los listados se paginan por keyset (after_id), salvo clientes, que con q se
+ordenan por parecido y usan offset; la respuesta trae "siguiente" con la URL
+de la página que sigue. `campos` elige las columnas (solo esas se piden a la
+base). Los lotes van en una transacción: se aplican todos o ninguno.
+/cartas/transiciones, en cambio, aplica las que se puedan y devuelve el
+resultado de cada id.
+
+Las respuestas GET llevan ETag y responden 304 a If-None-Match. Se serializa
+con orjson si está instalado.
+"""
+import json
+
+from flask import Blueprint, Response, request, url_for
+
+from cache import tocar_tablas
+from config import API_CONFIG
+from db import get_db_connection
+from services.cartas_services import ErrorLote, actualizar_cartas_lote, crear_cartas_lote, transicionar_lote
+from services.clientes_services import buscar_clientes
+from services.trabajos_services import encolar
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+api = Blueprint("api_v1", __name__, url_prefix="/api/v1")
+
+# Campos que se pueden pedir en cada recurso -> expresión SQL
+CAMPOS_DOLL = {
+    "id": "d.id",
+    "nombre": "d.nombre",
+    "edad": "d.edad",
+    "estado": "d.estado",
+    "ciudad": "d.ciudad",
+    "descripcion": "d.descripcion",
+    "total_cartas": "COALESCE(k.total, 0)",
+}
+CAMPOS_CLIENTE = ["id", "nombre", "ciudad", "motivo", "contacto"]
+# Obligatorios en POST /clientes, en el orden del INSERT
+CAMPOS_ALTA_CLIENTE = ["nombre", "ciudad", "motivo", "contacto"]
+CAMPOS_CARTA = {
+    "id": "c.id",
+    "cliente_id": "c.cliente_id",
+    "doll_id": "c.doll_id",
+    "fecha": "c.fecha",
+    "estado": "c.estado",
+    "contenido": "(SELECT cc.contenido FROM cartas_contenido cc WHERE cc.carta_id = c.id)",
+    "contenido_preview": "c.contenido_preview",
+}
+# El contenido completo solo viaja si se pide con campos=
+CAMPOS_CARTA_DEFECTO = ["id", "cliente_id", "doll_id", "fecha", "estado", "contenido_preview"]
+
+
+class ErrorApi(Exception):
+    def __init__(self, mensaje, status=400, detalle=None):
+        super().__init__(mensaje)
+        self.status = status
+        self.detalle = detalle
+
+
+def a_json(obj):
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, default=str, ensure_ascii=False)
+
+
+def respuesta_json(obj, status=200):
+    """Response JSON; en GET agrega ETag y contesta 304 si el cliente ya la tiene."""
+    respuesta = Response(a_json(obj), status=status, mimetype="application/json")
+    if request.method == "GET" and status == 200:
+        respuesta.add_etag()
+        respuesta.make_conditional(request)
+    return respuesta
+
+
+@api.errorhandler(ErrorApi)
+def _error_api(e):
+    cuerpo = {"error": str(e)}
+    if e.detalle is not None:
+        cuerpo["detalle"] = e.detalle
+    return respuesta_json(cuerpo, e.status)
+
+
+@api.errorhandler(ErrorLote)
+def _error_lote(e):
+    return respuesta_json({"error": str(e), "detalle": e.errores}, 422)
+
+
+# =========================
+#        PARÁMETROS
+# =========================
+
+# Reciben los argumentos de la URL para poder usarse también fuera de Flask
+# (asgi.py); por defecto toman los del request actual.
+
+def param_entero(nombre, defecto=None, minimo=0, maximo=None, args=None):
+    valor = (request.args if args is None else args).get(nombre)
+    if valor is None or valor == "":
+        return defecto
+    try:
+        valor = int(valor)
+    except ValueError:
+        raise ErrorApi(f"'{nombre}' debe ser un entero")
+    if valor < minimo or (maximo is not None and valor > maximo):
+        raise ErrorApi(f"'{nombre}' fuera de rango")
+    return valor
+
+
+def param_limite(args=None):
+    return param_entero("limite", API_CONFIG["limite"], 1, API_CONFIG["limite_max"], args)
+
+
+def param_campos(disponibles, defecto=None, args=None):
+    """Lista de campos pedidos con ?campos=a,b (validada) o los de por defecto."""
+    pedido = (request.args if args is None else args).get("campos")
+    if not pedido:
+        return list(defecto or disponibles)
+    campos = [c.strip() for c in pedido.split(",") if c.strip()]
+    desconocidos = [c for c in campos if c not in disponibles]
+    if desconocidos:
+        raise ErrorApi(f"Campos desconocidos: {', '.join(desconocidos)}",
+                       detalle={"disponibles": list(disponibles)})
+    # El id siempre va: lo necesita la paginación
+    return campos if "id" in campos else ["id"] + campos
+
+
+def _siguiente(**args):
+    """URL de la página siguiente conservando los demás parámetros."""
+    params = request.args.to_dict()
+    params.update(args)
+    return url_for(request.endpoint, **request.view_args, **params)
+
+
+def cuerpo_lote(datos=None):
+    if datos is None:
+        datos = request.get_json(silent=True)
+    if not isinstance(datos, dict) or not isinstance(datos.get("cartas"), list):
+        raise ErrorApi('Se espera un objeto JSON {"cartas": [...]}')
+    cartas = datos["cartas"]
+    if not cartas:
+        raise ErrorApi("El lote está vacío")
+    if len(cartas) > API_CONFIG["lote_max"]:
+        raise ErrorApi(f"Máximo {API_CONFIG['lote_max']} elementos por lote", 413)
+    if not all(isinstance(c, dict) for c in cartas):
+        raise ErrorApi("Cada elemento del lote debe ser un objeto")
+    return cartas
+
+
+def _consultar(sql, params, campos):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    filas = [dict(zip(campos, fila)) for fila in cur.fetchall()]
+    cur.close()
+    conn.close()
+    return filas
+
+
+def _pagina_keyset(filas, limite):
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = _siguiente(after_id=filas[-1]["id"])
+    return {"datos": filas, "siguiente": siguiente}
+
+
+# =========================
+#          DOLLS
+# =========================
+
+def sql_dolls(campos, where):
+    columnas = ", ".join(CAMPOS_DOLL[c] for c in campos)
+    join = "LEFT JOIN contadores_dolls k ON k.doll_id = d.id" if "total_cartas" in campos else ""
+    return f"SELECT {columnas} FROM dolls d {join} WHERE {where}"
+
+
+def sql_listado_dolls(campos):
+    return sql_dolls(campos, "d.id > %(after_id)s AND (%(estado)s::text IS NULL OR d.estado = %(estado)s)") \
+        + " ORDER BY d.id LIMIT %(limite)s"
+
+
+@api.route("/dolls")
+def listar_dolls():
+    campos = param_campos(CAMPOS_DOLL)
+    limite = param_limite()
+    estado = request.args.get("estado")
+    filas = _consultar(sql_listado_dolls(campos), {
+        "after_id": param_entero("after_id", 0), "estado": estado, "limite": limite + 1,
+    }, campos)
+    return respuesta_json(_pagina_keyset(filas, limite))
+
+
+@api.route("/dolls/<int:doll_id>")
+def ver_doll(doll_id):
+    campos = param_campos(CAMPOS_DOLL)
+    filas = _consultar(sql_dolls(campos, "d.id = %s"), (doll_id,), campos)
+    if not filas:
+        raise ErrorApi("Doll no encontrada", 404)
+    return respuesta_json(filas[0])
+
+
+# =========================
+#         CLIENTES
+# =========================
+
+@api.route("/clientes")
+def listar_clientes():
+    campos = param_campos(CAMPOS_CLIENTE)
+    limite = param_limite()
+    offset = param_entero("offset", 0)
+    clientes, hay_mas = buscar_clientes(
+        request.args.get("q", ""), request.args.get("ciudad", ""), request.args.get("motivo", ""),
+        limite, offset
+    )
+    datos = [{c: getattr(fila, c) for c in campos} for fila in clientes]
+    return respuesta_json({
+        "datos": datos,
+        "siguiente": _siguiente(offset=offset + limite) if hay_mas else None,
+    })
+
+
+@api.route("/clientes/<int:cliente_id>")
+def ver_cliente(cliente_id):
+    campos = param_campos(CAMPOS_CLIENTE)
+    filas = _consultar(f"SELECT {', '.join(campos)} FROM clientes WHERE id = %s", (cliente_id,), campos)
+    if not filas:
+        raise ErrorApi("Cliente no encontrado", 404)
+    return respuesta_json(filas[0])
+
+
+@api.route("/clientes", methods=["POST"])
+def crear_cliente():
+    datos = request.get_json(silent=True)
+    if not isinstance(datos, dict):
+        raise ErrorApi("Se espera un objeto JSON con " + ", ".join(CAMPOS_ALTA_CLIENTE))
+    # Los mismos campos que pide el formulario, como texto no vacío
+    faltan = [campo for campo in CAMPOS_ALTA_CLIENTE
+              if not isinstance(datos.get(campo), str) or not datos[campo].strip()]
+    if faltan:
+        raise ErrorApi("Faltan campos o no son texto", 422, {"campos": faltan})
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT INTO clientes (nombre, ciudad, motivo, contacto) VALUES (%s, %s, %s, %s) RETURNING id",
+        tuple(datos[campo].strip() for campo in CAMPOS_ALTA_CLIENTE)
+    )
+    cliente_id = cur.fetchone()[0]
+    # Igual que el formulario: la carta la genera un worker
+    encolar("crear_carta_cliente", {"cliente_id": cliente_id}, cur)
+    conn.commit()
+    cur.close()
+    conn.close()
+    tocar_tablas("clientes")
+    respuesta = respuesta_json({"id": cliente_id}, 201)
+    respuesta.headers["Location"] = url_for("api_v1.ver_cliente", cliente_id=cliente_id)
+    return respuesta
+
+
+# =========================
+#          CARTAS
+# =========================
+
+def sql_listado_cartas(campos):
+    columnas = ", ".join(CAMPOS_CARTA[c] for c in campos)
+    return f"""
+        SELECT {columnas}
+        FROM cartas c
+        WHERE c.id > %(after_id)s
+          AND (%(estado)s::text IS NULL OR c.estado = %(estado)s)
+          AND (%(doll_id)s::int IS NULL OR c.doll_id = %(doll_id)s)
+          AND (%(cliente_id)s::int IS NULL OR c.cliente_id = %(cliente_id)s)
+        ORDER BY c.id
+        LIMIT %(limite)s
+    """
+
+
+@api.route("/cartas")
+def listar_cartas():
+    campos = param_campos(CAMPOS_CARTA, CAMPOS_CARTA_DEFECTO)
+    limite = param_limite()
+    filas = _consultar(sql_listado_cartas(campos), {
+        "after_id": param_entero("after_id", 0),
+        "estado": request.args.get("estado"),
+        "doll_id": param_entero("doll_id"),
+        "cliente_id": param_entero("cliente_id"),
+        "limite": limite + 1,
+    }, campos)
+    return respuesta_json(_pagina_keyset(filas, limite))
+
+
+@api.route("/cartas/<int:carta_id>")
+def ver_carta(carta_id):
+    campos = param_campos(CAMPOS_CARTA)
+    columnas = ", ".join(CAMPOS_CARTA[c] for c in campos)
+    filas = _consultar(f"SELECT {columnas} FROM cartas c WHERE c.id = %s", (carta_id,), campos)
+    if not filas:
+        raise ErrorApi("Carta no encontrada", 404)
+    return respuesta_json(filas[0])
+
+
+@api.route("/cartas/lote", methods=["POST"])
+def crear_cartas():
+    creadas = crear_cartas_lote(cuerpo_lote())
+    return respuesta_json({
+        "creadas": len(creadas),
+        "en_espera": sum(1 for c in creadas if c["doll_id"] is None),
+        "cartas": creadas,
+    }, 201)
+
+
+@api.route("/cartas/lote", methods=["PATCH"])
+def actualizar_cartas():
+    return respuesta_json({"actualizadas": actualizar_cartas_lote(cuerpo_lote())})
+
+
+def cambios_transicion(datos):
+    """Valida el cuerpo de /cartas/transiciones y lo retorna como [{"id", "estado"}]."""
+    if not isinstance(datos, dict):
+        raise ErrorApi("Se espera un objeto JSON")
+    if "cambios" in datos:
+        cambios = datos["cambios"]
+    else:
+        cambios = [{"id": carta_id, "estado": datos.get("estado")} for carta_id in datos.get("ids") or []]
+    if not isinstance(cambios, list) or not cambios:
+        raise ErrorApi('Se espera {"estado", "ids": [...]} o {"cambios": [{"id", "estado"}]}')
+    if len(cambios) > API_CONFIG["lote_max"]:
+        raise ErrorApi(f"Máximo {API_CONFIG['lote_max']} elementos por lote", 413)
+    if not all(isinstance(c, dict) and isinstance(c.get("id"), int) and isinstance(c.get("estado"), str)
+               for c in cambios):
+        raise ErrorApi("Cada cambio necesita 'id' entero y 'estado'")
+    return cambios
+
+
+@api.route("/cartas/transiciones", methods=["POST"])
+def transicionar_cartas():
+    resultados = transicionar_lote(cambios_transicion(request.get_json(silent=True)))
+    return respuesta_json({
+        "aplicadas": sum(1 for r in resultados if r["resultado"] == "aplicada"),
+        "resultados": resultados,
+    })
@@ -0,0 +1,224 @@
+"""
+Modo ASGI: la API /api/v1 sobre asyncpg, para servir con un servidor ASGI.
+
+    uvicorn asgi:app --workers 4
+
+Mientras una consulta espera a Postgres el proceso sigue atendiendo otras
+conexiones; el límite lo pone el pool (ASYNC_CONFIG['max_size']), no la
+cantidad de hilos. Rutas (mismos parámetros y respuestas que api_v1.py):
+
+    GET   /api/v1/dolls              ?estado= &after_id= &limite= &campos=
+    GET   /api/v1/dolls/<id>
+    GET   /api/v1/cartas             ?estado= &doll_id= &cliente_id= &after_id= &limite= &campos=
+    GET   /api/v1/cartas/<id>
+    POST  /api/v1/cartas/lote        {"cartas": [{"cliente_id", "contenido"?, "estado"?}]}
+    POST  /api/v1/cartas/transiciones  {"estado", "ids": [...]} o {"cambios": [{"id", "estado"}]}
+
+Las páginas HTML, clientes y el resto de la API siguen en la app Flask
+(app.py). Validaciones, campos y SQL se toman de api_v1 y de los servicios.
+"""
+import hashlib
+import json
+import re
+from urllib.parse import parse_qsl, urlencode
+
+import db_async
+from api_v1 import (
+    CAMPOS_CARTA,
+    CAMPOS_CARTA_DEFECTO,
+    CAMPOS_DOLL,
+    ErrorApi,
+    a_json,
+    cambios_transicion,
+    cuerpo_lote,
+    param_campos,
+    param_entero,
+    param_limite,
+    sql_dolls,
+    sql_listado_cartas,
+    sql_listado_dolls,
+)
+from services import async_services
+from services.cartas_services import ErrorLote
+
+
+class Peticion:
+    def __init__(self, scope, cuerpo):
+        self.metodo = scope["method"]
+        self.ruta = scope["path"]
+        self.args = dict(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True))
+        self.headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        self.cuerpo = cuerpo
+
+    def json(self):
+        try:
+            return json.loads(self.cuerpo)
+        except ValueError:
+            return None
+
+    def siguiente(self, **args):
+        """URL de la página siguiente conservando los demás parámetros."""
+        params = dict(self.args)
+        params.update(args)
+        return f"{self.ruta}?{urlencode(params)}"
+
+
+async def _consultar(sql, params, campos):
+    async with db_async.conexion() as con:
+        filas = await db_async.consultar(con, sql, params)
+    return [dict(zip(campos, fila)) for fila in filas]
+
+
+def _pagina_keyset(peticion, filas, limite):
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = peticion.siguiente(after_id=filas[-1]["id"])
+    return {"datos": filas, "siguiente": siguiente}
+
+
+# =========================
+#          RUTAS
+# =========================
+
+async def listar_dolls(peticion):
+    campos = param_campos(CAMPOS_DOLL, args=peticion.args)
+    limite = param_limite(peticion.args)
+    filas = await _consultar(sql_listado_dolls(campos), {
+        "after_id": param_entero("after_id", 0, args=peticion.args),
+        "estado": peticion.args.get("estado"),
+        "limite": limite + 1,
+    }, campos)
+    return _pagina_keyset(peticion, filas, limite)
+
+
+async def ver_doll(peticion, doll_id):
+    campos = param_campos(CAMPOS_DOLL, args=peticion.args)
+    filas = await _consultar(sql_dolls(campos, "d.id = %s"), (doll_id,), campos)
+    if not filas:
+        raise ErrorApi("Doll no encontrada", 404)
+    return filas[0]
+
+
+async def listar_cartas(peticion):
+    campos = param_campos(CAMPOS_CARTA, CAMPOS_CARTA_DEFECTO, peticion.args)
+    limite = param_limite(peticion.args)
+    filas = await _consultar(sql_listado_cartas(campos), {
+        "after_id": param_entero("after_id", 0, args=peticion.args),
+        "estado": peticion.args.get("estado"),
+        "doll_id": param_entero("doll_id", args=peticion.args),
+        "cliente_id": param_entero("cliente_id", args=peticion.args),
+        "limite": limite + 1,
+    }, campos)
+    return _pagina_keyset(peticion, filas, limite)
+
+
+async def ver_carta(peticion, carta_id):
+    campos = param_campos(CAMPOS_CARTA, args=peticion.args)
+    columnas = ", ".join(CAMPOS_CARTA[c] for c in campos)
+    filas = await _consultar(f"SELECT {columnas} FROM cartas c WHERE c.id = %s", (carta_id,), campos)
+    if not filas:
+        raise ErrorApi("Carta no encontrada", 404)
+    return filas[0]
+
+
+async def crear_cartas(peticion):
+    creadas = await async_services.crear_cartas_lote(cuerpo_lote(peticion.json() or {}))
+    return 201, {
+        "creadas": len(creadas),
+        "en_espera": sum(1 for c in creadas if c["doll_id"] is None),
+        "cartas": creadas,
+    }
+
+
+async def transicionar_cartas(peticion):
+    resultados = await async_services.transicionar_lote(cambios_transicion(peticion.json()))
+    return {
+        "aplicadas": sum(1 for r in resultados if r["resultado"] == "aplicada"),
+        "resultados": resultados,
+    }
+
+
+RUTAS = [
+    ("GET", re.compile(r"/api/v1/dolls"), listar_dolls),
+    ("GET", re.compile(r"/api/v1/dolls/(\d+)"), ver_doll),
+    ("GET", re.compile(r"/api/v1/cartas"), listar_cartas),
+    ("GET", re.compile(r"/api/v1/cartas/(\d+)"), ver_carta),
+    ("POST", re.compile(r"/api/v1/cartas/lote"), crear_cartas),
+    ("POST", re.compile(r"/api/v1/cartas/transiciones"), transicionar_cartas),
+]
+
+
+# =========================
+#        ASGI
+# =========================
+
+async def _atender(peticion):
+    """Retorna (status, objeto a serializar)."""
+    metodos = []
+    for metodo, patron, vista in RUTAS:
+        m = patron.fullmatch(peticion.ruta)
+        if not m:
+            continue
+        metodos.append(metodo)
+        if metodo != peticion.metodo:
+            continue
+        try:
+            resultado = await vista(peticion, *(int(g) for g in m.groups()))
+        except ErrorApi as e:
+            cuerpo = {"error": str(e)}
+            if e.detalle is not None:
+                cuerpo["detalle"] = e.detalle
+            return e.status, cuerpo
+        except ErrorLote as e:
+            return 422, {"error": str(e), "detalle": e.errores}
+        return resultado if isinstance(resultado, tuple) else (200, resultado)
+    if metodos:
+        return 405, {"error": "Método no permitido"}
+    return 404, {"error": "No encontrado"}
+
+
+async def _leer_cuerpo(receive):
+    partes = []
+    while True:
+        mensaje = await receive()
+        partes.append(mensaje.get("body", b""))
+        if not mensaje.get("more_body"):
+            return b"".join(partes)
+
+
+async def _vida(receive, send):
+    while True:
+        mensaje = await receive()
+        if mensaje["type"] == "lifespan.startup":
+            await db_async.abrir_pool()
+            await send({"type": "lifespan.startup.complete"})
+        elif mensaje["type"] == "lifespan.shutdown":
+            await db_async.cerrar_pool()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await _vida(receive, send)
+    if scope["type"] != "http":
+        return
+
+    peticion = Peticion(scope, await _leer_cuerpo(receive))
+    status, obj = await _atender(peticion)
+    cuerpo = a_json(obj)
+    if isinstance(cuerpo, str):
+        cuerpo = cuerpo.encode("utf-8")
+    headers = [(b"content-type", b"application/json")]
+
+    # Igual que respuesta_json(): ETag en los GET y 304 si el cliente ya la tiene
+    if peticion.metodo == "GET" and status == 200:
+        etag = '"' + hashlib.sha1(cuerpo).hexdigest() + '"'
+        headers.append((b"etag", etag.encode()))
+        if etag in peticion.headers.get("if-none-match", ""):
+            status, cuerpo = 304, b""
+
+    headers.append((b"content-length", str(len(cuerpo)).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": cuerpo})
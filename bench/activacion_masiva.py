@@ -0,0 +1,73 @@
+"""
+Activación masiva de dolls (ej. después de una caída).
+
+Siembra N dolls inactivas y 5*N cartas en espera, las activa todas con
+activar_dolls() y mide cuánto tarda el reparto (un UPDATE para todas).
+Después comprueba que ninguna doll quede con más de 5 cartas.
+Los datos sembrados se borran al terminar.
+
+Uso:
+    python bench/activacion_masiva.py --dolls 500
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import get_db_connection
+from services.dolls_services import activar_dolls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dolls", type=int, default=500)
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT INTO clientes (nombre, ciudad, motivo, contacto) VALUES ('activacion_bench', 'Leiden', 'bench', 'x@example.com') RETURNING id"
+    )
+    cliente_id = cur.fetchone()[0]
+    cur.execute("""
+        INSERT INTO dolls (nombre, edad, estado)
+        SELECT 'activacion_doll_' || n, 20, 'inactivo' FROM generate_series(1, %s) AS n
+        RETURNING id
+    """, (args.dolls,))
+    dolls = [row[0] for row in cur.fetchall()]
+    cur.execute("""
+        INSERT INTO cartas (cliente_id, doll_id, fecha, estado, contenido)
+        SELECT %s, NULL, CURRENT_DATE, 'en espera', '' FROM generate_series(1, %s)
+    """, (cliente_id, args.dolls * 5))
+    conn.commit()
+
+    try:
+        t0 = time.perf_counter()
+        reasignadas = activar_dolls(dolls)
+        duracion = (time.perf_counter() - t0) * 1000
+
+        cur.execute("""
+            SELECT COALESCE(MAX(n), 0) FROM (
+                SELECT COUNT(*) AS n FROM cartas WHERE doll_id = ANY(%s) GROUP BY doll_id
+            ) t
+        """, (dolls,))
+        maximo = cur.fetchone()[0]
+    finally:
+        cur.execute("DELETE FROM cartas WHERE cliente_id = %s", (cliente_id,))
+        cur.execute("DELETE FROM clientes WHERE id = %s", (cliente_id,))
+        cur.execute("DELETE FROM dolls WHERE id = ANY(%s)", (dolls,))
+        conn.commit()
+        cur.close()
+        conn.close()
+
+    print(f"{len(dolls)} dolls activadas, {reasignadas} cartas reasignadas en {duracion:.1f}ms "
+          f"(máx por doll={maximo})")
+    if maximo > 5:
+        print("FALLO: alguna doll superó 5 cartas")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
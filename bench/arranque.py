@@ -0,0 +1,70 @@
+"""
+Arranque: tiempo de importación de cada punto de entrada en un intérprete nuevo.
+
+Por cada módulo lanza --repeticiones procesos `python -X importtime -c
+"import <módulo>"` y reporta la mediana del total en ms, cuántos módulos se
+cargaron, si Flask entró en el proceso y los más caros (tiempo propio + hijos
+de primer nivel). Es lo que paga cada worker de gunicorn/uvicorn o cada
+`python worker.py` al levantar.
+
+    app                      crear_app(): blueprints, API e init_app
+    worker                   cola de trabajos (no debería cargar Flask)
+    services.cartas_services servicios sueltos, como los usan los scripts
+    datos                    helpers de acceso a datos
+    asgi                     modo ASGI
+
+Uso:
+    python bench/arranque.py
+    python bench/arranque.py --modulos app worker --repeticiones 9 --top 8
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULOS = ["app", "worker", "services.cartas_services", "datos", "asgi"]
+
+
+def medir(modulo):
+    """Una importación en un proceso nuevo. Retorna {módulo: (propio_us, acumulado_us, nivel)}."""
+    proceso = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+                             cwd=RAIZ, capture_output=True, text=True, check=True)
+    tiempos = {}
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        nivel = (len(nombre) - len(nombre.lstrip())) // 2
+        tiempos[nombre.strip()] = (int(propio), int(acumulado), nivel)
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modulos", nargs="+", default=MODULOS)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="imports directos más caros a mostrar")
+    args = parser.parse_args()
+
+    print(f"{'módulo':<26}{'ms (mediana)':>13}{'módulos':>9}{'flask':>7}")
+    detalle = {}
+    for modulo in args.modulos:
+        corridas = [medir(modulo) for _ in range(args.repeticiones)]
+        total = statistics.median(c[modulo][1] for c in corridas) / 1000
+        ultima = corridas[-1]
+        print(f"{modulo:<26}{total:>13.1f}{len(ultima):>9}{'sí' if 'flask' in ultima else 'no':>7}")
+        detalle[modulo] = ultima
+
+    for modulo, tiempos in detalle.items():
+        directos = sorted(((acumulado, nombre) for nombre, (_, acumulado, nivel) in tiempos.items()
+                           if nivel == 1), reverse=True)
+        print(f"\n{modulo}:")
+        for acumulado, nombre in directos[:args.top]:
+            print(f"    {nombre:<30}{acumulado / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Concurrencia: app Flask (hilos + psycopg2) vs modo ASGI (uvicorn + asyncpg).
+
+Siembra datos con bench/generador.py, levanta cada servidor en un proceso
+aparte y le abre --conexiones conexiones HTTP/1.1 simultáneas (keep-alive
+donde el servidor lo permite).
+Cada conexión pide GET /api/v1/cartas?after_id=<al azar>&limite=20 hasta
+completar --pedidos pedidos. Reporta pedidos por segundo, p50/p99 y errores
+(status >= 500, conexiones rechazadas o cortadas).
+
+    sync   servidor WSGI de werkzeug con un hilo por conexión; el pool de
+           psycopg2 (POOL_CONFIG) limita cuántos trabajan a la vez y el
+           resto espera hasta POOL_CONFIG['timeout']
+    async  uvicorn con asgi.py, un solo proceso; las esperas a Postgres no
+           ocupan un hilo (pool de ASYNC_CONFIG)
+
+Uso:
+    python bench/asgi_concurrencia.py --conexiones 500 --pedidos 20
+    python bench/asgi_concurrencia.py --modos async --conexiones 1000
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from db import get_db_connection
+from generador import limpiar, sembrar
+
+
+def servir_sync(puerto):
+    from werkzeug.serving import make_server
+
+    from app import app
+
+    make_server("127.0.0.1", puerto, app, threaded=True).serve_forever()
+
+
+def _levantar(modo, puerto):
+    if modo == "sync":
+        comando = [sys.executable, os.path.abspath(__file__), "--servir", str(puerto)]
+    else:
+        comando = [sys.executable, "-m", "uvicorn", "asgi:app", "--port", str(puerto),
+                   "--log-level", "warning", "--backlog", "4096"]
+    proceso = subprocess.Popen(comando, cwd=RAIZ, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", puerto), timeout=0.2).close()
+            return proceso
+        except OSError:
+            time.sleep(0.1)
+    proceso.kill()
+    raise RuntimeError(f"El servidor {modo} no levantó")
+
+
+async def _pedir(lector, escritor, ruta):
+    """Un GET sobre la conexión abierta. Retorna (status, si el servidor la cierra)."""
+    escritor.write(f"GET {ruta} HTTP/1.1\r\nHost: bench\r\n\r\n".encode())
+    await escritor.drain()
+    cabecera = await lector.readuntil(b"\r\n\r\n")
+    lineas = cabecera.decode("latin-1").split("\r\n")
+    status = int(lineas[0].split()[1])
+    cabeceras = {}
+    for linea in lineas[1:]:
+        nombre, _, valor = linea.partition(":")
+        cabeceras[nombre.strip().lower()] = valor.strip()
+    if cabeceras.get("transfer-encoding") == "chunked":
+        while True:
+            largo = int((await lector.readuntil(b"\r\n")).strip(), 16)
+            await lector.readexactly(largo + 2)
+            if largo == 0:
+                break
+    else:
+        await lector.readexactly(int(cabeceras.get("content-length", 0)))
+    return status, cabeceras.get("connection", "").lower() == "close"
+
+
+async def _cliente(puerto, pedidos, max_carta, rnd, latencias, errores, timeout):
+    escritor = None
+    try:
+        for i in range(pedidos):
+            ruta = f"/api/v1/cartas?after_id={rnd.randint(0, max_carta)}&limite=20"
+            t0 = time.perf_counter()
+            if escritor is None:
+                # werkzeug no hace keep-alive: cierra después de cada respuesta
+                try:
+                    lector, escritor = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", puerto), timeout)
+                except (OSError, asyncio.TimeoutError):
+                    errores["conexion"] += pedidos - i
+                    return
+            try:
+                status, cerrada = await asyncio.wait_for(_pedir(lector, escritor, ruta), timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                errores["cortadas"] += pedidos - i
+                return
+            if status >= 500:
+                errores["5xx"] += 1
+            else:
+                latencias.append((time.perf_counter() - t0) * 1000)
+            if cerrada:
+                escritor.close()
+                escritor = None
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+
+async def _cargar(puerto, conexiones, pedidos, max_carta, semilla, timeout):
+    latencias = []
+    errores = {"5xx": 0, "conexion": 0, "cortadas": 0}
+    t0 = time.perf_counter()
+    await asyncio.gather(*(
+        _cliente(puerto, pedidos, max_carta, random.Random(f"{semilla}:{i}"), latencias, errores, timeout)
+        for i in range(conexiones)
+    ))
+    return latencias, errores, time.perf_counter() - t0
+
+
+def _percentil(ordenados, p):
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, int(p / 100 * len(ordenados)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modos", nargs="+", choices=["sync", "async"], default=["sync", "async"])
+    parser.add_argument("--conexiones", type=int, default=500)
+    parser.add_argument("--pedidos", type=int, default=20, help="pedidos por conexión")
+    parser.add_argument("--timeout", type=float, default=30.0, help="segundos máximos por pedido")
+    parser.add_argument("--puerto", type=int, default=8790)
+    parser.add_argument("--dolls", type=int, default=1000)
+    parser.add_argument("--clientes", type=int, default=3000)
+    parser.add_argument("--cartas", type=int, default=4000)
+    parser.add_argument("--servir", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.servir:
+        servir_sync(args.servir)
+        return
+
+    limpiar()
+    print(f"Datos: {sembrar(args.dolls, args.clientes, args.cartas)}")
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM cartas")
+        max_carta = cur.fetchone()[0]
+        cur.close()
+        conn.close()
+
+        print(f"{args.conexiones} conexiones x {args.pedidos} pedidos")
+        for modo in args.modos:
+            proceso = _levantar(modo, args.puerto)
+            try:
+                latencias, errores, duracion = asyncio.run(
+                    _cargar(args.puerto, args.conexiones, args.pedidos, max_carta, 42, args.timeout))
+            finally:
+                proceso.terminate()
+                proceso.wait()
+            latencias.sort()
+            print(f"{modo:<6} {len(latencias) / duracion:8.1f} ped/s  p50 {_percentil(latencias, 50):8.1f}  "
+                  f"p99 {_percentil(latencias, 99):8.1f} ms  ok {len(latencias)}  errores {errores}")
+    finally:
+        limpiar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Compara el plan de la búsqueda de clientes antes y después de los índices
+de trigramas, sobre una tabla de prueba con N clientes sembrados.
+
+Trabaja sobre una copia temporal (bench_clientes) para no tocar clientes:
+  1. siembra N filas con nombres/ciudades/motivos variados
+  2. EXPLAIN ANALYZE de la consulta anterior (ILIKE + SELECT *, sin LIMIT)
+  3. crea los índices GIN gin_trgm_ops y hace EXPLAIN ANALYZE de la nueva
+     (ILIKE con índice, ranking por word_similarity, LIMIT)
+
+Requiere la extensión pg_trgm disponible en el servidor.
+
+Uso:
+    python bench/busqueda_clientes.py --clientes 1000000 --q "mar" --ciudad "lei"
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import get_db_connection
+
+NOMBRES = ["María", "José", "Violet", "Claudia", "Gilbert", "Cattleya", "Benedict", "Erica", "Iris", "Luculia"]
+APELLIDOS = ["Evergarden", "Hodgins", "Baudelaire", "Blue", "Brown", "Cantarella", "Marlborough", "Spiker"]
+CIUDADES = ["Leiden", "Leidenschaftlich", "Intense", "Flugel", "Drossel", "Gardarik", "Menace", "Roma"]
+MOTIVOS = ["Carta de despedida", "Carta de amor", "Agradecimiento", "Disculpa", "Cumpleaños", "Negocios"]
+
+
+def _sembrar(cur, n):
+    cur.execute("DROP TABLE IF EXISTS bench_clientes")
+    cur.execute("CREATE TABLE bench_clientes (LIKE clientes INCLUDING DEFAULTS)")
+    cur.execute("""
+        INSERT INTO bench_clientes (id, nombre, ciudad, motivo, contacto)
+        SELECT g,
+               (%(nombres)s::text[])[1 + g %% array_length(%(nombres)s::text[], 1)] || ' ' ||
+               (%(apellidos)s::text[])[1 + (g / 7) %% array_length(%(apellidos)s::text[], 1)] || ' ' || g,
+               (%(ciudades)s::text[])[1 + (g / 3) %% array_length(%(ciudades)s::text[], 1)],
+               (%(motivos)s::text[])[1 + (g / 11) %% array_length(%(motivos)s::text[], 1)],
+               'cliente' || g || '@example.com'
+        FROM generate_series(1, %(n)s) AS g
+    """, {"nombres": NOMBRES, "apellidos": APELLIDOS, "ciudades": CIUDADES, "motivos": MOTIVOS, "n": n})
+    cur.execute("ALTER TABLE bench_clientes ADD PRIMARY KEY (id)")
+    cur.execute("ANALYZE bench_clientes")
+
+
+def _explain(cur, sql, params):
+    cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+    plan = cur.fetchone()[0][0]
+    nodos = []
+
+    def recorrer(nodo):
+        nombre = nodo["Node Type"]
+        if "Index Name" in nodo:
+            nombre += f" ({nodo['Index Name']})"
+        nodos.append(nombre)
+        for hijo in nodo.get("Plans", []):
+            recorrer(hijo)
+
+    recorrer(plan["Plan"])
+    return plan["Execution Time"], plan["Plan"].get("Actual Rows"), nodos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clientes", type=int, default=1000000)
+    parser.add_argument("--q", default="mar")
+    parser.add_argument("--ciudad", default="lei")
+    parser.add_argument("--limite", type=int, default=50)
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        t0 = time.perf_counter()
+        _sembrar(cur, args.clientes)
+        conn.commit()
+        print(f"{args.clientes} clientes sembrados en {time.perf_counter() - t0:.1f}s")
+
+        anterior = _explain(
+            cur,
+            "SELECT * FROM bench_clientes WHERE nombre ILIKE %s AND ciudad ILIKE %s ORDER BY id ASC",
+            (f"%{args.q}%", f"%{args.ciudad}%")
+        )
+
+        t0 = time.perf_counter()
+        cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        cur.execute("CREATE INDEX ON bench_clientes USING gin (nombre gin_trgm_ops)")
+        cur.execute("CREATE INDEX ON bench_clientes USING gin (ciudad gin_trgm_ops)")
+        cur.execute("CREATE INDEX ON bench_clientes USING gin (motivo gin_trgm_ops)")
+        cur.execute("ANALYZE bench_clientes")
+        conn.commit()
+        print(f"índices de trigramas creados en {time.perf_counter() - t0:.1f}s")
+
+        nuevo = _explain(
+            cur,
+            """SELECT id, nombre, ciudad, motivo, contacto FROM bench_clientes
+               WHERE nombre ILIKE %s AND ciudad ILIKE %s
+               ORDER BY word_similarity(%s, nombre) DESC, id ASC
+               LIMIT %s""",
+            (f"%{args.q}%", f"%{args.ciudad}%", args.q, args.limite)
+        )
+
+        for etiqueta, (ms, filas, nodos) in (("anterior", anterior), ("trigramas", nuevo)):
+            print(f"{etiqueta:>10}: {ms:.1f}ms, {filas} filas devueltas")
+            print(f"{'':>12}plan: {' -> '.join(nodos)}")
+    finally:
+        conn.rollback()
+        cur.execute("DROP TABLE IF EXISTS bench_clientes")
+        conn.commit()
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
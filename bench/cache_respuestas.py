@@ -0,0 +1,88 @@
+"""
+Tablero que refresca listados: sin cache, con cache y con revalidación (304).
+
+Siembra datos con bench/generador.py y pide cada página N veces de tres
+formas:
+
+    sin_cache    HTTP_CACHE_CONFIG['activa'] = False (se arma siempre)
+    cache        cache de respuestas forzado (activa = True, un solo proceso
+                 así que el backend 'local' alcanza), cuerpo completo (200)
+    condicional  cache activo y If-None-Match con el ETag anterior (304)
+
+Cada --escrituras pedidos se crea una carta, lo que sube la versión de
+'cartas' y obliga a rearmar las páginas que la leen. Reporta la media en ms
+por pedido, cuántos fueron 304 y cuántas veces se armó la página.
+
+Uso:
+    python bench/cache_respuestas.py --pedidos 300 --escrituras 50
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from cache_http import cache_respuestas
+from config import HTTP_CACHE_CONFIG
+from db import get_db_connection
+from generador import DOMINIO_CLIENTE, limpiar, sembrar
+from services.cartas_services import crear_carta
+
+PAGINAS = ["/dolls", "/clientes?q=al", "/cartas", "/reporte_dolls"]
+
+
+def correr(pagina, pedidos, escrituras, cliente_id, condicional):
+    cliente = app.test_client()
+    etag = None
+    no_modificadas = 0
+    misses = cache_respuestas.misses
+    t0 = time.perf_counter()
+    for i in range(pedidos):
+        if escrituras and i and i % escrituras == 0:
+            crear_carta({"cliente_id": cliente_id, "contenido": "bench cache"})
+        headers = {"If-None-Match": etag} if condicional and etag else {}
+        respuesta = cliente.get(pagina, headers=headers)
+        respuesta.get_data()
+        no_modificadas += respuesta.status_code == 304
+        etag = respuesta.headers.get("ETag") or etag
+    media = (time.perf_counter() - t0) * 1000 / pedidos
+    armadas = cache_respuestas.misses - misses if HTTP_CACHE_CONFIG["activa"] else pedidos
+    return media, no_modificadas, armadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dolls", type=int, default=1000)
+    parser.add_argument("--clientes", type=int, default=3000)
+    parser.add_argument("--cartas", type=int, default=4000)
+    parser.add_argument("--pedidos", type=int, default=300)
+    parser.add_argument("--escrituras", type=int, default=50, help="crear una carta cada N pedidos (0 = nunca)")
+    args = parser.parse_args()
+
+    activa = HTTP_CACHE_CONFIG["activa"]
+    limpiar()
+    print(f"Datos: {sembrar(args.dolls, args.clientes, args.cartas)}")
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT MIN(id) FROM clientes WHERE contacto LIKE %s", (f"%@{DOMINIO_CLIENTE}",))
+        cliente_id = cur.fetchone()[0]
+        cur.close()
+        conn.close()
+
+        print(f"{'página':<16}{'modo':<13}{'ms/pedido':>10}{'304':>6}{'armadas':>9}")
+        for pagina in PAGINAS:
+            for modo in ("sin_cache", "cache", "condicional"):
+                HTTP_CACHE_CONFIG["activa"] = modo != "sin_cache"
+                media, no_modificadas, armadas = correr(pagina, args.pedidos, args.escrituras,
+                                                        cliente_id, modo == "condicional")
+                print(f"{pagina:<16}{modo:<13}{media:>10.2f}{no_modificadas:>6}{armadas:>9}")
+    finally:
+        HTTP_CACHE_CONFIG["activa"] = activa
+        limpiar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Prueba de carga: latencia de un request típico con y sin pool de conexiones.
+
+Simula lo que hace POST /clientes/nuevo (varias funciones que piden y cierran
+conexión una tras otra) desde varios hilos a la vez y compara:
+  - directo: psycopg2.connect() por cada llamada (comportamiento anterior)
+  - pool:    get_db_connection() del pool compartido
+
+Uso:
+    python bench/carga_pool.py --hilos 8 --requests 200 --conexiones-por-request 5
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psycopg2
+
+from config import DB_CONFIG
+from db import get_db_connection, pool_stats
+
+
+def _percentil(valores, p):
+    valores = sorted(valores)
+    if not valores:
+        return 0.0
+    idx = min(len(valores) - 1, int(round(p / 100.0 * (len(valores) - 1))))
+    return valores[idx]
+
+
+def _request_directo(n):
+    for _ in range(n):
+        conn = psycopg2.connect(**DB_CONFIG)
+        cur = conn.cursor()
+        cur.execute("SELECT 1")
+        cur.fetchone()
+        cur.close()
+        conn.close()
+
+
+def _request_pool(n):
+    for _ in range(n):
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT 1")
+        cur.fetchone()
+        cur.close()
+        conn.close()
+
+
+def correr(modo, hilos, total, por_request):
+    funcion = _request_directo if modo == "directo" else _request_pool
+    latencias = []
+    lock = threading.Lock()
+    restantes = [total]
+
+    def trabajador():
+        while True:
+            with lock:
+                if restantes[0] <= 0:
+                    return
+                restantes[0] -= 1
+            t0 = time.perf_counter()
+            funcion(por_request)
+            dt = (time.perf_counter() - t0) * 1000
+            with lock:
+                latencias.append(dt)
+
+    inicio = time.perf_counter()
+    ts = [threading.Thread(target=trabajador) for _ in range(hilos)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    duracion = time.perf_counter() - inicio
+
+    return {
+        "modo": modo,
+        "requests": len(latencias),
+        "req_por_seg": round(len(latencias) / duracion, 1),
+        "p50_ms": round(_percentil(latencias, 50), 2),
+        "p95_ms": round(_percentil(latencias, 95), 2),
+        "p99_ms": round(_percentil(latencias, 99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--conexiones-por-request", type=int, default=5)
+    args = parser.parse_args()
+
+    for modo in ("directo", "pool"):
+        r = correr(modo, args.hilos, args.requests, args.conexiones_por_request)
+        print(f"{r['modo']:>8}: {r['requests']} req, {r['req_por_seg']} req/s, "
+              f"p50={r['p50_ms']}ms p95={r['p95_ms']}ms p99={r['p99_ms']}ms")
+    print("pool:", pool_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Throughput de la cola de trabajos para el alta de clientes.
+
+  1. alta síncrona: INSERT cliente + crear_carta_para_cliente() (antes)
+  2. alta asíncrona: INSERT cliente + encolar() en la misma transacción (ahora)
+  3. drenado: N hilos worker ejecutan procesar_lote() hasta vaciar la cola
+
+Reporta latencia del alta (p50/p95) y trabajos/s del drenado.
+Los clientes, cartas, dolls y trabajos sembrados se borran al terminar.
+
+Uso:
+    python bench/cola_trabajos.py --clientes 500 --workers 4 --lote 50
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import get_db_connection
+from services.cartas_services import crear_carta_para_cliente
+from services.trabajos_services import encolar, procesar_lote
+
+
+def _percentil(valores, p):
+    valores = sorted(valores)
+    idx = min(len(valores) - 1, int(round(p / 100.0 * (len(valores) - 1))))
+    return valores[idx]
+
+
+def _alta(i, asincrona):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT INTO clientes (nombre, ciudad, motivo, contacto) VALUES (%s, 'Leiden', 'cola_bench', 'x@example.com') RETURNING id",
+        (f"cola_bench_{i}",)
+    )
+    cliente_id = cur.fetchone()[0]
+    trabajo_id = encolar("crear_carta_cliente", {"cliente_id": cliente_id}, cur) if asincrona else None
+    conn.commit()
+    cur.close()
+    conn.close()
+    if not asincrona:
+        crear_carta_para_cliente(cliente_id)
+    return cliente_id, trabajo_id
+
+
+def _medir_altas(n, asincrona):
+    latencias, clientes, trabajos = [], [], []
+    for i in range(n):
+        t0 = time.perf_counter()
+        cliente_id, trabajo_id = _alta(i, asincrona)
+        latencias.append((time.perf_counter() - t0) * 1000)
+        clientes.append(cliente_id)
+        if trabajo_id:
+            trabajos.append(trabajo_id)
+    return latencias, clientes, trabajos
+
+
+def _drenar(workers, lote):
+    hechos = [0]
+    lock = threading.Lock()
+
+    def trabajador(nombre):
+        while True:
+            h, f = procesar_lote(lote, nombre)
+            if h == 0 and f == 0:
+                return
+            with lock:
+                hechos[0] += h
+
+    inicio = time.perf_counter()
+    ts = [threading.Thread(target=trabajador, args=(f"bench-{i}",)) for i in range(workers)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    return hechos[0], time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clientes", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--lote", type=int, default=50)
+    parser.add_argument("--dolls", type=int, default=50)
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        INSERT INTO dolls (nombre, edad, estado)
+        SELECT 'cola_bench_doll_' || n, 20, 'activo' FROM generate_series(1, %s) AS n
+        RETURNING id
+    """, (args.dolls,))
+    dolls = [row[0] for row in cur.fetchall()]
+    conn.commit()
+
+    clientes, trabajos = [], []
+    try:
+        lat_sync, c, _ = _medir_altas(args.clientes, asincrona=False)
+        clientes += c
+        lat_async, c, t = _medir_altas(args.clientes, asincrona=True)
+        clientes += c
+        trabajos += t
+        hechos, duracion = _drenar(args.workers, args.lote)
+    finally:
+        cur.execute("DELETE FROM trabajos WHERE id = ANY(%s)", (trabajos,))
+        cur.execute("DELETE FROM cartas WHERE cliente_id = ANY(%s)", (clientes,))
+        cur.execute("DELETE FROM clientes WHERE id = ANY(%s)", (clientes,))
+        cur.execute("DELETE FROM dolls WHERE id = ANY(%s)", (dolls,))
+        conn.commit()
+        cur.close()
+        conn.close()
+
+    print(f" alta síncrona: p50={_percentil(lat_sync, 50):.2f}ms p95={_percentil(lat_sync, 95):.2f}ms")
+    print(f"alta asíncrona: p50={_percentil(lat_async, 50):.2f}ms p95={_percentil(lat_async, 95):.2f}ms")
+    print(f"       drenado: {hechos} trabajos en {duracion:.2f}s con {args.workers} workers "
+          f"({hechos / duracion:.0f} trabajos/s)")
+
+
+if __name__ == "__main__":
+    main()
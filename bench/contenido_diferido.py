@@ -0,0 +1,135 @@
+"""
+Contenido diferido: cartas con el cuerpo en la fila vs en cartas_contenido.
+
+Inserta --cartas cartas de un cliente de bench con cuerpos de entre
+--largo-min y --largo-max caracteres (pasan por el trigger, así que el cuerpo
+va a cartas_contenido). Después copia esas cartas a bench_cartas_inline, una
+tabla con el esquema anterior (contenido TEXT en la misma fila), y compara:
+
+    tamaño    bytes por fila de cartas (lo que lee cualquier consulta que la
+              recorra) inline vs diferido, y lo que ocupan los cuerpos aparte
+    listado   el SELECT de /cartas sobre todas las cartas de bench: antes
+              LEFT(contenido, 50) + char_length(), ahora contenido_preview
+    estados   conteo por estado (recorre la tabla entera)
+    cuerpos   cuántos quedaron comprimidos y cuánto ocupan contra su largo
+
+Uso:
+    python bench/contenido_diferido.py --cartas 200000
+    python bench/contenido_diferido.py --cartas 50000 --largo-min 2000 --largo-max 8000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import get_db_connection
+from generador import DOMINIO_CLIENTE, limpiar
+
+SQL_INLINE = """
+    CREATE TABLE bench_cartas_inline AS
+    SELECT c.id, c.cliente_id, c.doll_id, c.fecha, c.estado,
+           cc.contenido || '' AS contenido   -- texto nuevo: se comprime o no según la tabla destino
+    FROM cartas c
+    JOIN cartas_contenido cc ON cc.carta_id = c.id
+    WHERE c.cliente_id = %s;
+    ALTER TABLE bench_cartas_inline ADD PRIMARY KEY (id);
+    ANALYZE bench_cartas_inline;
+"""
+
+CONSULTAS = {
+    "listado": (
+        """SELECT id, fecha, estado, LEFT(contenido, 50), char_length(contenido) > 50
+           FROM bench_cartas_inline ORDER BY id""",
+        """SELECT id, fecha, estado, contenido_preview, contenido_largo > 50
+           FROM cartas WHERE cliente_id = %(cliente_id)s ORDER BY id""",
+    ),
+    "estados": (
+        "SELECT estado, COUNT(*) FROM bench_cartas_inline GROUP BY estado",
+        "SELECT estado, COUNT(*) FROM cartas WHERE cliente_id = %(cliente_id)s GROUP BY estado",
+    ),
+}
+
+
+def _medir(cur, sql, params, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        cur.execute(sql, params)
+        cur.fetchall()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cartas", type=int, default=200_000)
+    parser.add_argument("--largo-min", type=int, default=100)
+    parser.add_argument("--largo-max", type=int, default=4000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    limpiar()
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("DROP TABLE IF EXISTS bench_cartas_inline")
+        cur.execute("INSERT INTO clientes (nombre, ciudad, motivo, contacto) VALUES ('contenido', 'Leiden', 'bench', %s) "
+                    "RETURNING id", (f"contenido@{DOMINIO_CLIENTE}",))
+        cliente_id = cur.fetchone()[0]
+        t0 = time.perf_counter()
+        cur.execute("""
+            INSERT INTO cartas (cliente_id, fecha, estado, contenido)
+            SELECT %(cliente_id)s, DATE '2024-01-01' + (i %% 365), 'en espera',
+                   substr(repeat('Querida persona de Leiden, ' || md5(i::text) || ' te escribo porque ', 200),
+                          1, %(minimo)s + (i * 7919) %% (%(maximo)s - %(minimo)s + 1))
+            FROM generate_series(1, %(cartas)s) AS i
+        """, {"cliente_id": cliente_id, "cartas": args.cartas, "minimo": args.largo_min, "maximo": args.largo_max})
+        conn.commit()
+        print(f"{args.cartas} cartas insertadas en {time.perf_counter() - t0:.1f}s")
+        cur.execute(SQL_INLINE, (cliente_id,))
+        cur.execute("ANALYZE cartas; ANALYZE cartas_contenido;")
+        conn.commit()
+
+        # Por fila y no pg_relation_size: cartas arrastra filas muertas de otras corridas
+        cur.execute("""
+            SELECT (SELECT AVG(pg_column_size(i.*)) FROM bench_cartas_inline i),
+                   AVG(pg_column_size(c.*)),
+                   (SELECT AVG(pg_column_size(cc.*)) FROM cartas_contenido cc
+                    JOIN cartas x ON x.id = cc.carta_id WHERE x.cliente_id = %(cliente_id)s)
+            FROM cartas c WHERE c.cliente_id = %(cliente_id)s
+        """, {"cliente_id": cliente_id})
+        inline, diferido, cuerpo = cur.fetchone()
+        print(f"tamaño   fila inline {inline:.0f} B   fila diferida {diferido:.0f} B "
+              f"(+ {cuerpo:.0f} B en cartas_contenido, solo para el editor)")
+
+        params = {"cliente_id": cliente_id}
+        for nombre, (antes, despues) in CONSULTAS.items():
+            ms_antes = _medir(cur, antes, params, args.repeticiones)
+            ms_despues = _medir(cur, despues, params, args.repeticiones)
+            print(f"{nombre:<8} inline {ms_antes:8.1f} ms   diferido {ms_despues:8.1f} ms   x{ms_antes / ms_despues:.1f}")
+        conn.rollback()
+
+        cur.execute("""
+            SELECT COUNT(*) FILTER (WHERE pg_column_compression(cc.contenido) IS NOT NULL),
+                   COUNT(*), SUM(pg_column_size(cc.contenido)), SUM(octet_length(cc.contenido))
+            FROM cartas_contenido cc
+            JOIN cartas c ON c.id = cc.carta_id
+            WHERE c.cliente_id = %s
+        """, (cliente_id,))
+        comprimidas, total, ocupado, largo = cur.fetchone()
+        print(f"cuerpos  {comprimidas}/{total} comprimidos, {ocupado / 2**20:.1f} MB para {largo / 2**20:.1f} MB "
+              f"de texto ({largo / max(ocupado, 1):.1f}x)")
+    finally:
+        conn.rollback()
+        cur.execute("DROP TABLE IF EXISTS bench_cartas_inline")
+        conn.commit()
+        cur.close()
+        conn.close()
+        limpiar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Prueba de estrés de la asignación de cartas con muchos hilos a la vez.
+
+Crea dolls activas vacías y clientes de prueba, y desde varios hilos genera
+una carta por cliente con:
+  - anterior: get_dolls_activas() + asignar_doll_disponible() + guardar_carta()
+  - atomica:  crear_carta_para_cliente() (guardar_carta_con_doll, una transacción)
+
+Comprueba que ninguna doll termine con más de 5 cartas y reporta cartas/s.
+Pensado para una base de pruebas: las dolls activas que ya existan también
+reciben cartas. Los datos sembrados se borran al terminar.
+
+Uso:
+    python bench/estres_asignacion.py --dolls 20 --clientes 150 --hilos 16
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datos import guardar_carta
+from db import get_db_connection
+from services.cartas_services import crear_carta_para_cliente
+from services.dolls_services import asignar_doll_disponible, get_dolls_activas
+
+
+def _crear_anterior(cliente_id):
+    datos = {"cliente_id": cliente_id, "doll_id": None, "estado": "en espera", "contenido": ""}
+    if get_dolls_activas():
+        doll = asignar_doll_disponible()
+        if doll:
+            datos["doll_id"] = doll["id"]
+            datos["estado"] = "borrador"
+    return guardar_carta(datos)
+
+
+def sembrar(n_dolls, n_clientes):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    dolls, clientes = [], []
+    for i in range(n_dolls):
+        cur.execute(
+            "INSERT INTO dolls (nombre, edad, estado) VALUES (%s, 20, 'activo') RETURNING id",
+            (f"estres_doll_{i}",)
+        )
+        dolls.append(cur.fetchone()[0])
+    for i in range(n_clientes):
+        cur.execute(
+            "INSERT INTO clientes (nombre, ciudad, motivo, contacto) VALUES (%s, 'Leiden', 'estres', 'x@example.com') RETURNING id",
+            (f"estres_cliente_{i}",)
+        )
+        clientes.append(cur.fetchone()[0])
+    conn.commit()
+    cur.close()
+    conn.close()
+    return dolls, clientes
+
+
+def limpiar(dolls, clientes):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("DELETE FROM cartas WHERE cliente_id = ANY(%s)", (clientes,))
+    cur.execute("DELETE FROM clientes WHERE id = ANY(%s)", (clientes,))
+    cur.execute("DELETE FROM dolls WHERE id = ANY(%s)", (dolls,))
+    conn.commit()
+    cur.close()
+    conn.close()
+
+
+def max_cartas_por_doll(dolls):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT COALESCE(MAX(n), 0), COALESCE(SUM(n), 0) FROM (
+            SELECT COUNT(*) AS n FROM cartas WHERE doll_id = ANY(%s) GROUP BY doll_id
+        ) t
+    """, (dolls,))
+    maximo, asignadas = cur.fetchone()
+    cur.close()
+    conn.close()
+    return maximo, asignadas
+
+
+def correr(modo, n_dolls, n_clientes, hilos):
+    funcion = _crear_anterior if modo == "anterior" else crear_carta_para_cliente
+    dolls, clientes = sembrar(n_dolls, n_clientes)
+    pendientes = list(clientes)
+    lock = threading.Lock()
+    errores = []
+
+    def trabajador():
+        while True:
+            with lock:
+                if not pendientes:
+                    return
+                cliente_id = pendientes.pop()
+            try:
+                funcion(cliente_id)
+            except Exception as e:
+                with lock:
+                    errores.append(str(e))
+
+    try:
+        inicio = time.perf_counter()
+        ts = [threading.Thread(target=trabajador) for _ in range(hilos)]
+        for t in ts:
+            t.start()
+        for t in ts:
+            t.join()
+        duracion = time.perf_counter() - inicio
+        maximo, asignadas = max_cartas_por_doll(dolls)
+    finally:
+        limpiar(dolls, clientes)
+
+    return {
+        "modo": modo,
+        "cartas_por_seg": round(n_clientes / duracion, 1),
+        "max_por_doll": maximo,
+        "asignadas": asignadas,
+        "errores": len(errores),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dolls", type=int, default=20)
+    parser.add_argument("--clientes", type=int, default=150)
+    parser.add_argument("--hilos", type=int, default=16)
+    args = parser.parse_args()
+
+    fallo = False
+    for modo in ("anterior", "atomica"):
+        r = correr(modo, args.dolls, args.clientes, args.hilos)
+        print(f"{r['modo']:>9}: {r['cartas_por_seg']} cartas/s, asignadas={r['asignadas']}, "
+              f"máx por doll={r['max_por_doll']}, errores={r['errores']}")
+        if modo == "atomica" and (r["max_por_doll"] > 5 or r["errores"]):
+            fallo = True
+
+    if fallo:
+        print("FALLO: la asignación atómica superó el cupo de 5 cartas o tuvo errores")
+        sys.exit(1)
+    print("OK: ninguna doll superó 5 cartas con la asignación atómica")
+
+
+if __name__ == "__main__":
+    main()
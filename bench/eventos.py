@@ -0,0 +1,214 @@
+"""
+Log de eventos: costo de escribirlo, demora hasta el suscriptor y un contador
+incremental contra el recuento completo.
+
+Siembra datos con el generador y mide:
+
+    escritura  un UPDATE de estado y un INSERT de --filas cartas, con los
+               triggers de eventos y sin ellos (se desactivan dentro de una
+               transacción que se deshace, así que nada queda cambiado)
+    demora     --operaciones cambios de a uno (transicionar_cartas,
+               desactivar_doll, activar_doll) y, por cada uno, el tiempo
+               desde que vuelve el commit hasta que el suscriptor aplicó
+               todos sus eventos
+    contador   un Counter de cartas por (doll_id, estado) cargado una vez y
+               mantenido solo con eventos, tras las operaciones de a uno y
+               una ráfaga de --hilos hilos en paralelo; se compara con el
+               GROUP BY sobre cartas y con lo que tarda ese recuento
+
+Uso:
+    python bench/eventos.py --dolls 1000 --cartas 200000
+    python bench/eventos.py --operaciones 500 --hilos 8
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import get_db_connection
+from generador import limpiar, sembrar
+from services.cartas_services import TRANSICIONES, transicionar_cartas
+from services.dolls_services import activar_doll, desactivar_doll
+from services.eventos_services import Suscripcion, posicion_actual
+
+SQL_CONTEO = "SELECT doll_id, estado, COUNT(*) FROM cartas GROUP BY doll_id, estado"
+
+ESCRITURAS = {
+    "update": "UPDATE cartas SET estado = 'revisado' WHERE id IN (SELECT id FROM cartas WHERE estado = 'borrador' LIMIT %(filas)s)",
+    "insert": """INSERT INTO cartas (cliente_id, fecha, estado, contenido)
+                 SELECT (SELECT MIN(id) FROM clientes), DATE '2024-01-01', 'en espera', 'evento ' || i
+                 FROM generate_series(1, %(filas)s) AS i""",
+}
+
+
+def _medir_escritura(sql, filas, con_eventos, repeticiones):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    tiempos = []
+    for _ in range(repeticiones):
+        if not con_eventos:
+            cur.execute("ALTER TABLE cartas DISABLE TRIGGER trg_eventos_cartas, DISABLE TRIGGER trg_eventos_cartas_cambio")
+        t0 = time.perf_counter()
+        cur.execute(sql, {"filas": filas})
+        tiempos.append((time.perf_counter() - t0) * 1000)
+        conn.rollback()
+    cur.close()
+    conn.close()
+    return statistics.median(tiempos)
+
+
+def _contar():
+    conn = get_db_connection()
+    cur = conn.cursor()
+    t0 = time.perf_counter()
+    cur.execute(SQL_CONTEO)
+    conteo = Counter({(doll_id, estado): n for doll_id, estado, n in cur.fetchall()})
+    ms = (time.perf_counter() - t0) * 1000
+    conn.commit()
+    cur.close()
+    conn.close()
+    return conteo, ms
+
+
+def _total_eventos(desde_id):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM eventos WHERE id > %s", (desde_id,))
+    total = cur.fetchone()[0]
+    conn.commit()
+    cur.close()
+    conn.close()
+    return total
+
+
+class ContadorCartas:
+    """Cartas por (doll_id, estado), mantenido con eventos."""
+
+    def __init__(self, inicial):
+        self.conteo = Counter(inicial)
+        self.tandas = 0
+        self.segundos = 0.0
+
+    def aplicar(self, eventos):
+        t0 = time.perf_counter()
+        for e in eventos:
+            if e.tabla != "cartas":
+                continue
+            if e.antes is not None:
+                self.conteo[(e.antes["doll_id"], e.antes["estado"])] -= 1
+            if e.despues is not None:
+                self.conteo[(e.despues["doll_id"], e.despues["estado"])] += 1
+        self.tandas += 1
+        self.segundos += time.perf_counter() - t0
+
+    def foto(self):
+        return Counter({clave: n for clave, n in self.conteo.items() if n})
+
+
+def _operacion(rnd, carta_ids, doll_ids):
+    tipo = rnd.choice(["transicionar", "transicionar", "desactivar", "activar"])
+    if tipo == "transicionar":
+        transicionar_cartas(rnd.sample(carta_ids, 20), rnd.choice(list(TRANSICIONES.values())))
+    elif tipo == "desactivar":
+        desactivar_doll(rnd.choice(doll_ids))
+    else:
+        activar_doll(rnd.choice(doll_ids))
+
+
+def _esperar(suscripcion, total, limite=10.0):
+    t0 = time.perf_counter()
+    while suscripcion.aplicados < total:
+        if time.perf_counter() - t0 > limite:
+            raise RuntimeError(f"el suscriptor quedó en {suscripcion.aplicados}/{total} eventos")
+        time.sleep(0.0005)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dolls", type=int, default=1000)
+    parser.add_argument("--clientes", type=int, default=3000)
+    parser.add_argument("--cartas", type=int, default=200_000)
+    parser.add_argument("--filas", type=int, default=10_000, help="filas por escritura medida")
+    parser.add_argument("--operaciones", type=int, default=300)
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    limpiar()
+    sembrar(args.dolls, args.clientes, args.cartas)
+    suscripcion = None
+    try:
+        for nombre, sql in ESCRITURAS.items():
+            sin = _medir_escritura(sql, args.filas, False, args.repeticiones)
+            con = _medir_escritura(sql, args.filas, True, args.repeticiones)
+            print(f"escritura {nombre:<6} {args.filas} filas: sin eventos {sin:8.1f} ms   "
+                  f"con eventos {con:8.1f} ms   (+{(con - sin) / sin * 100:.0f}%)")
+
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM cartas")
+        carta_ids = [fila[0] for fila in cur.fetchall()]
+        cur.execute("SELECT id FROM dolls")
+        doll_ids = [fila[0] for fila in cur.fetchall()]
+        # Que el autovacuum no analice en medio de la medición: su transacción
+        # retiene el xmin y con él la lectura de eventos (ver Suscripcion)
+        cur.execute("ANALYZE cartas; ANALYZE dolls; ANALYZE eventos")
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM eventos")
+        ultimo_id = cur.fetchone()[0]
+        conn.commit()
+        cur.close()
+        conn.close()
+
+        # Sin escrituras en curso: la carga inicial y la posición coinciden
+        desde = posicion_actual()
+        inicial, _ = _contar()
+        contador = ContadorCartas(inicial)
+        suscripcion = Suscripcion(contador.aplicar, desde=desde).iniciar()
+
+        rnd = random.Random(7)
+        demoras = []
+        for _ in range(args.operaciones):
+            _operacion(rnd, carta_ids, doll_ids)
+            t0 = time.perf_counter()
+            _esperar(suscripcion, _total_eventos(ultimo_id))
+            demoras.append((time.perf_counter() - t0) * 1000)
+        demoras.sort()
+        print(f"demora    {args.operaciones} operaciones: p50 {statistics.median(demoras):.1f} ms   "
+              f"p99 {demoras[int(len(demoras) * 0.99) - 1]:.1f} ms   máx {demoras[-1]:.1f} ms")
+
+        def rafaga(semilla):
+            rnd_hilo = random.Random(semilla)
+            for _ in range(args.operaciones // args.hilos):
+                _operacion(rnd_hilo, carta_ids, doll_ids)
+
+        hilos = [threading.Thread(target=rafaga, args=(i,)) for i in range(args.hilos)]
+        t0 = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        segundos = time.perf_counter() - t0
+        _esperar(suscripcion, _total_eventos(ultimo_id))
+        print(f"ráfaga    {args.hilos} hilos, {args.operaciones} operaciones en {segundos:.1f}s")
+
+        final, ms_recuento = _contar()
+        coincide = contador.foto() == final
+        print(f"contador  {suscripcion.aplicados} eventos en {contador.tandas} tandas, "
+              f"{contador.segundos / max(contador.tandas, 1) * 1000:.3f} ms por tanda; "
+              f"recuento completo {ms_recuento:.1f} ms; {'coincide' if coincide else 'NO COINCIDE'}")
+        if not coincide:
+            sys.exit(1)
+    finally:
+        if suscripcion is not None:
+            suscripcion.detener()
+        limpiar()
+
+
+if __name__ == "__main__":
+    main()
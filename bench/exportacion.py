@@ -0,0 +1,108 @@
+"""
+Exportación de cartas: memoria y velocidad con tablas de distinto tamaño.
+
+Crea un cliente de bench y le inserta cartas (INSERT ... generate_series,
+sin pasar por Python) hasta llegar a cada tamaño de --tamanos. En cada
+tamaño corre la CLI de exportación en un proceso aparte, una vez por
+formato (csv, jsonl, con y sin gzip), y reporta filas/s, MB escritos y la
+memoria máxima (RSS) del proceso. Si la exportación va en streaming, el RSS
+no crece con la tabla.
+
+Al final corta una exportación HTTP a mitad de camino y verifica que la
+conexión de COPY no quede prestada.
+
+Uso:
+    python bench/exportacion.py --tamanos 100000 1000000
+    python bench/exportacion.py --tamanos 10000000 --formatos csv
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from db import get_db_connection, pool_stats
+from generador import DOMINIO_CLIENTE, limpiar
+
+CORRIDAS = [("csv", False), ("csv", True), ("jsonl", False), ("jsonl", True)]
+
+
+def _completar(cliente_id, hasta):
+    """Agrega cartas del cliente de bench hasta que la tabla tenga `hasta` filas."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM cartas")
+    faltan = hasta - cur.fetchone()[0]
+    if faltan > 0:
+        cur.execute("""
+            INSERT INTO cartas (cliente_id, fecha, estado, contenido)
+            SELECT %s, DATE '2024-01-01' + (i %% 365), 'en espera',
+                   'Querida persona de Leiden: ' || repeat('recuerdo ', 5 + i %% 40) || i
+            FROM generate_series(1, %s) AS i
+        """, (cliente_id, faltan))
+        conn.commit()
+    cur.close()
+    conn.close()
+    return max(faltan, 0)
+
+
+def _exportar(formato, comprimir):
+    """Corre la CLI a /dev/null. Retorna (segundos, MB escritos, RSS máximo en MB)."""
+    comando = [sys.executable, "-m", "services.exportacion_services", "cartas",
+               "--formato", formato, "-o", os.devnull] + (["--gzip"] if comprimir else [])
+    t0 = time.perf_counter()
+    proceso = subprocess.Popen(comando, cwd=RAIZ, stderr=subprocess.PIPE, text=True)
+    _, estado, uso = os.wait4(proceso.pid, 0)
+    segundos = time.perf_counter() - t0
+    resumen = proceso.stderr.read()
+    if estado != 0:
+        raise RuntimeError(resumen)
+    mb = float(resumen.split(": ")[1].split(" MB")[0])
+    return segundos, mb, uso.ru_maxrss / 1024
+
+
+def _cortar_http():
+    """Pide /exportar/cartas, lee un bloque y abandona la respuesta."""
+    from app import app
+
+    respuesta = app.test_client().get("/exportar/cartas", buffered=False)
+    next(respuesta.response)
+    respuesta.close()
+    return pool_stats()["en_uso"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanos", nargs="+", type=int, default=[100_000, 1_000_000])
+    parser.add_argument("--formatos", nargs="+", choices=["csv", "jsonl"], default=["csv", "jsonl"])
+    args = parser.parse_args()
+
+    limpiar()
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("INSERT INTO clientes (nombre, ciudad, motivo, contacto) VALUES ('exportacion', 'Leiden', 'bench', %s) "
+                "RETURNING id", (f"exportacion@{DOMINIO_CLIENTE}",))
+    cliente_id = cur.fetchone()[0]
+    conn.commit()
+    cur.close()
+    conn.close()
+    try:
+        print(f"{'cartas':>10}  {'formato':<9}{'filas/s':>10}{'MB':>9}{'RSS MB':>9}")
+        for tamano in sorted(args.tamanos):
+            _completar(cliente_id, tamano)
+            for formato, comprimir in CORRIDAS:
+                if formato not in args.formatos:
+                    continue
+                segundos, mb, rss = _exportar(formato, comprimir)
+                etiqueta = formato + (".gz" if comprimir else "")
+                print(f"{tamano:>10}  {etiqueta:<9}{tamano / segundos:>10,.0f}{mb:>9.1f}{rss:>9.1f}")
+        print(f"conexiones prestadas tras cortar una descarga: {_cortar_http()}")
+    finally:
+        limpiar()
+
+
+if __name__ == "__main__":
+    main()
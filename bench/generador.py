@@ -0,0 +1,174 @@
+"""
+Generador de datos sintéticos para los benchmarks.
+
+Siembra N dolls, M clientes y K cartas con una semilla fija, así que dos
+corridas con los mismos parámetros producen los mismos datos:
+
+    - dolls: ~80% activas, con ciudad;
+    - clientes: nombres y ciudades sesgadas (pocas ciudades concentran la
+      mayoría), motivo de una lista;
+    - cartas: borrador 30%, revisado 25%, enviado 35%, en espera 10%. Las que
+      no están en espera van a una doll activa con cupo (máximo 5); si no
+      queda cupo, quedan en espera, igual que en la aplicación.
+
+Todo se carga con COPY. Los datos sembrados se marcan (dolls con
+descripcion 'bench', clientes con contacto @bench.example) para que
+limpiar() los borre sin tocar el resto.
+
+Uso:
+    python bench/generador.py --dolls 1000 --clientes 3000 --cartas 4000
+    python bench/generador.py --limpiar
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import get_db_connection
+from services.dolls_services import invalidar_dolls_activas
+from services.reportes_services import refrescar_reporte
+
+MARCA_DOLL = "bench"
+DOMINIO_CLIENTE = "bench.example"
+
+NOMBRES_DOLL = ["Violet", "Cattleya", "Erica", "Iris", "Luculia", "Aina", "Rosa", "Lilia"]
+SILABAS = ["al", "ber", "ca", "del", "es", "fio", "gra", "hil", "io", "jon", "ka", "lu", "mar", "nel",
+           "o", "pa", "ri", "sol", "te", "va"]
+CIUDADES = ["Leiden", "Ecarde", "Intense", "Flügel", "Gardarik", "Ostenburg", "Shahar", "Dracul",
+            "Kazaly", "Jannsen", "Rolan", "Menas"]
+MOTIVOS = ["amor", "familia", "despedida", "trabajo", "agradecimiento", "disculpa", "cumpleaños", "recuerdo"]
+ESTADOS_CARTA = [("borrador", 30), ("revisado", 25), ("enviado", 35), ("en espera", 10)]
+
+
+def _nombre_cliente(rnd):
+    nombre = "".join(rnd.choice(SILABAS) for _ in range(rnd.randint(2, 3))).capitalize()
+    apellido = "".join(rnd.choice(SILABAS) for _ in range(rnd.randint(2, 4))).capitalize()
+    return f"{nombre} {apellido}"
+
+
+def _copiar(cur, tabla, columnas, filas):
+    buffer = io.StringIO()
+    for fila in filas:
+        buffer.write("\t".join("\\N" if v is None else str(v) for v in fila) + "\n")
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN", buffer)
+
+
+def sembrar(n_dolls, n_clientes, n_cartas, semilla=42):
+    """Siembra los datos y retorna un resumen con cuántas filas quedaron de cada cosa."""
+    rnd = random.Random(semilla)
+    pesos_ciudad = [1 / (i + 1) for i in range(len(CIUDADES))]
+    estados, pesos_estado = zip(*ESTADOS_CARTA)
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        dolls = [
+            (f"{rnd.choice(NOMBRES_DOLL)}_{i}", rnd.randint(16, 35),
+             "activo" if rnd.random() < 0.8 else "inactivo",
+             rnd.choices(CIUDADES, pesos_ciudad)[0], MARCA_DOLL)
+            for i in range(n_dolls)
+        ]
+        _copiar(cur, "dolls", ["nombre", "edad", "estado", "ciudad", "descripcion"], dolls)
+        cur.execute("SELECT id, estado FROM dolls WHERE descripcion = %s ORDER BY id", (MARCA_DOLL,))
+        activas = [doll_id for doll_id, estado in cur.fetchall() if estado == "activo"]
+
+        clientes = [
+            (_nombre_cliente(rnd), rnd.choices(CIUDADES, pesos_ciudad)[0], rnd.choice(MOTIVOS),
+             f"cliente{i}@{DOMINIO_CLIENTE}")
+            for i in range(n_clientes)
+        ]
+        _copiar(cur, "clientes", ["nombre", "ciudad", "motivo", "contacto"], clientes)
+        cur.execute("SELECT id FROM clientes WHERE contacto LIKE %s ORDER BY id", (f"%@{DOMINIO_CLIENTE}",))
+        cliente_ids = [row[0] for row in cur.fetchall()]
+
+        # Cupo libre por doll activa; se saca de la lista al llenarse
+        con_cupo = list(activas)
+        carga = dict.fromkeys(activas, 0)
+        cartas = []
+        for _ in range(n_cartas):
+            estado = rnd.choices(estados, pesos_estado)[0]
+            doll_id = None
+            if estado != "en espera" and con_cupo:
+                i = rnd.randrange(len(con_cupo))
+                doll_id = con_cupo[i]
+                carga[doll_id] += 1
+                if carga[doll_id] == 5:
+                    con_cupo[i] = con_cupo[-1]
+                    con_cupo.pop()
+            if doll_id is None:
+                estado = "en espera"
+            contenido = f"Querida persona de {rnd.choice(CIUDADES)}: " + " ".join(
+                rnd.choice(SILABAS) for _ in range(rnd.randint(5, 60)))
+            fecha = f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}"
+            cartas.append((rnd.choice(cliente_ids), doll_id, fecha, estado, contenido))
+        if cliente_ids:
+            _copiar(cur, "cartas", ["cliente_id", "doll_id", "fecha", "estado", "contenido"], cartas)
+        conn.commit()
+
+        cur.execute("ANALYZE dolls; ANALYZE clientes; ANALYZE cartas;")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+    invalidar_dolls_activas()
+    refrescar_reporte()
+    return {
+        "dolls": n_dolls,
+        "activas": len(activas),
+        "clientes": len(cliente_ids),
+        "cartas": len(cartas) if cliente_ids else 0,
+        "en_espera": sum(1 for c in cartas if c[1] is None) if cliente_ids else 0,
+    }
+
+
+def limpiar():
+    """Borra todo lo sembrado (y lo que crearon los escenarios sobre esos datos)."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("DELETE FROM clientes WHERE contacto LIKE %s", (f"%@{DOMINIO_CLIENTE}",))
+    clientes = cur.rowcount
+    cur.execute("DELETE FROM dolls WHERE descripcion = %s", (MARCA_DOLL,))
+    dolls = cur.rowcount
+    # Trabajos de altas de clientes que ya no existen
+    cur.execute("""
+        DELETE FROM trabajos t
+        WHERE t.tipo = 'crear_carta_cliente'
+          AND NOT EXISTS (SELECT 1 FROM clientes c WHERE c.id = (t.payload->>'cliente_id')::int)
+    """)
+    conn.commit()
+    cur.close()
+    conn.close()
+    invalidar_dolls_activas()
+    refrescar_reporte()
+    return {"dolls": dolls, "clientes": clientes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dolls", type=int, default=1000)
+    parser.add_argument("--clientes", type=int, default=3000)
+    parser.add_argument("--cartas", type=int, default=4000)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--limpiar", action="store_true", help="borrar los datos sembrados y salir")
+    args = parser.parse_args()
+
+    if args.limpiar:
+        print(f"Borrado: {limpiar()}")
+        return
+
+    t0 = time.perf_counter()
+    resumen = sembrar(args.dolls, args.clientes, args.cartas, args.semilla)
+    print(f"Sembrado en {time.perf_counter() - t0:.1f}s: {resumen}")
+
+
+if __name__ == "__main__":
+    main()
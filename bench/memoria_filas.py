@@ -0,0 +1,114 @@
+"""
+Memoria por fila de los listados: tuplas de fetchall(), dicts y modelos.
+
+Siembra datos con bench/generador.py y arma cada listado con --filas filas
+(la consulta real se repite con generate_series hasta llegar a esa cantidad,
+así no hace falta sembrar un millón de cartas). Cada listado se materializa
+de tres formas:
+
+    tuplas   cur.fetchall(), lo que recibían las plantillas
+    dicts    un dict por fila armado sobre fetchall(), como hacían
+             buscar_carta_dict(), obtener_reporte_dolls() o get_dolls_activas()
+    modelos  modelos.cargar(cur, Modelo): una NamedTuple por fila
+
+Reporta bytes por fila que quedan retenidos en la lista, el pico durante la
+carga (tracemalloc; el buffer de libpq es memoria de C y no entra, es igual
+para las tres) y el tiempo de carga medido en una corrida aparte sin trazar.
+
+Uso:
+    python bench/memoria_filas.py --filas 1000000
+    python bench/memoria_filas.py --listados cartas --filas 200000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import get_db_connection
+from generador import limpiar, sembrar
+from modelos import CartaListado, Cliente, Doll, DollReporte, cargar
+from rutas.cartas import SQL_LISTADO_CARTAS
+from rutas.dolls import SQL_DOLLS
+from services.reportes_services import SQL_REPORTE_DOLLS
+
+LISTADOS = {
+    "cartas": (CartaListado, SQL_LISTADO_CARTAS),
+    "clientes": (Cliente, "SELECT id, nombre, ciudad, motivo, contacto FROM clientes"),
+    "dolls": (Doll, SQL_DOLLS),
+    "reporte": (DollReporte, SQL_REPORTE_DOLLS),
+}
+
+
+def _consulta(sql, filas):
+    """La consulta del listado repetida hasta `filas` filas."""
+    return f"""
+        SELECT l.* FROM ({sql}) l,
+             generate_series(1, CEIL(%(filas)s::numeric / GREATEST((SELECT COUNT(*) FROM ({sql}) c), 1))::int)
+        LIMIT %(filas)s
+    """
+
+
+def tuplas(cur, modelo):
+    return cur.fetchall()
+
+
+def dicts(cur, modelo):
+    return [dict(zip(modelo._fields, fila)) for fila in cur.fetchall()]
+
+
+def modelos(cur, modelo):
+    return cargar(cur, modelo)
+
+
+FORMAS = [tuplas, dicts, modelos]
+
+
+def cargar_listado(sql, filas, modelo, forma, trazar):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(_consulta(sql, filas), {"filas": filas})
+        if trazar:
+            tracemalloc.start()
+        t0 = time.perf_counter()
+        resultado = forma(cur, modelo)
+        duracion = time.perf_counter() - t0
+        if trazar:
+            retenida, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return len(resultado), retenida, pico
+        return len(resultado), duracion
+    finally:
+        cur.close()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listados", nargs="+", choices=list(LISTADOS), default=list(LISTADOS))
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--dolls", type=int, default=1000)
+    parser.add_argument("--clientes", type=int, default=3000)
+    parser.add_argument("--cartas", type=int, default=4000)
+    args = parser.parse_args()
+
+    limpiar()
+    print(f"Datos: {sembrar(args.dolls, args.clientes, args.cartas)}")
+    try:
+        print(f"{'listado':<10}{'forma':<9}{'filas':>9}{'bytes/fila':>12}{'pico MB':>9}{'carga s':>9}")
+        for nombre in args.listados:
+            modelo, sql = LISTADOS[nombre]
+            for forma in FORMAS:
+                _, duracion = cargar_listado(sql, args.filas, modelo, forma, trazar=False)
+                n, retenida, pico = cargar_listado(sql, args.filas, modelo, forma, trazar=True)
+                print(f"{nombre:<10}{forma.__name__:<9}{n:>9}{retenida / max(n, 1):>12.0f}"
+                      f"{pico / 2**20:>9.1f}{duracion:>9.2f}")
+    finally:
+        limpiar()
+
+
+if __name__ == "__main__":
+    main()
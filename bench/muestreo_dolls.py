@@ -0,0 +1,107 @@
+"""
+Sorteo de una doll activa: ORDER BY RANDOM() vs el sorteo en memoria.
+
+Para cada tamaño de tabla siembra dolls (la mitad activas) y mide el costo
+medio por llamada de:
+
+    order_by_random   SELECT id ... ORDER BY RANDOM() LIMIT 1 (lo de antes)
+    muestrear         muestrear_doll_activa(), con el cache ya cargado
+    asignar           asignar_doll_aleatoria_id(), sorteo + confirmación por id
+
+Al final comprueba con chi-cuadrado que el sorteo en memoria sea uniforme.
+Los datos sembrados se borran al terminar.
+
+Uso:
+    python bench/muestreo_dolls.py --tamanos 1000 10000 100000 --llamadas 200
+"""
+import argparse
+import collections
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import get_db_connection
+from services.dolls_services import asignar_doll_aleatoria_id, invalidar_dolls_activas, muestrear_doll_activa
+
+
+def order_by_random():
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT id FROM dolls WHERE estado = 'activo' ORDER BY RANDOM() LIMIT 1;")
+    row = cur.fetchone()
+    cur.close()
+    conn.close()
+    return row[0] if row else None
+
+
+def medir(funcion, llamadas):
+    funcion()   # calienta el cache / la conexión
+    t0 = time.perf_counter()
+    for _ in range(llamadas):
+        funcion()
+    return (time.perf_counter() - t0) * 1000 / llamadas
+
+
+def sembrar(cur, n):
+    cur.execute("""
+        INSERT INTO dolls (nombre, edad, estado)
+        SELECT 'muestreo_doll_' || n, 20, CASE WHEN n %% 2 = 0 THEN 'activo' ELSE 'inactivo' END
+        FROM generate_series(1, %s) AS n
+        RETURNING id
+    """, (n,))
+    return [row[0] for row in cur.fetchall()]
+
+
+def chi_cuadrado(muestras):
+    """Estadístico chi-cuadrado de las frecuencias contra la uniforme."""
+    conteo = collections.Counter(muestras)
+    esperado = len(muestras) / len(conteo)
+    return sum((c - esperado) ** 2 / esperado for c in conteo.values()), len(conteo) - 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--llamadas", type=int, default=200)
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM dolls WHERE estado = 'activo'")
+    if cur.fetchone()[0]:
+        print("Aviso: ya hay dolls activas en la base; se sortea también entre ellas.\n")
+
+    print(f"{'dolls':>8} {'order_by_random':>16} {'muestrear':>10} {'asignar':>9}   (ms por llamada)")
+    for n in args.tamanos:
+        dolls = sembrar(cur, n)
+        conn.commit()
+        invalidar_dolls_activas()
+        try:
+            t_random = medir(order_by_random, args.llamadas)
+            t_muestrear = medir(muestrear_doll_activa, args.llamadas)
+            t_asignar = medir(asignar_doll_aleatoria_id, args.llamadas)
+            print(f"{n:>8} {t_random:>16.3f} {t_muestrear:>10.4f} {t_asignar:>9.3f}")
+        finally:
+            cur.execute("DELETE FROM dolls WHERE id = ANY(%s)", (dolls,))
+            conn.commit()
+            invalidar_dolls_activas()
+
+    dolls = sembrar(cur, 40)
+    conn.commit()
+    invalidar_dolls_activas()
+    try:
+        chi2, grados = chi_cuadrado([muestrear_doll_activa() for _ in range(20000)])
+        # Con 19 grados de libertad, chi2 > 36.2 rechaza la uniforme al 1%
+        print(f"\nUniformidad: chi2 = {chi2:.1f} con {grados} grados de libertad")
+    finally:
+        cur.execute("DELETE FROM dolls WHERE id = ANY(%s)", (dolls,))
+        conn.commit()
+        invalidar_dolls_activas()
+    cur.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Latencia del reporte por doll según el tamaño de cartas.
+
+Para cada tamaño siembra cartas repartidas entre N dolls, refresca la vista
+materializada y mide, en promedio por llamada:
+
+    en_vivo        la consulta agrupada sobre cartas (lo que hacía antes /reporte_dolls)
+    materializado  obtener_reporte_dolls(), que lee mv_reporte_dolls
+    refresco       refrescar_reporte() (REFRESH ... CONCURRENTLY)
+
+La lectura materializada debería quedar plana; el refresco crece con cartas
+pero corre fuera del request. Los datos sembrados se borran al terminar.
+
+Uso:
+    python bench/reporte_materializado.py --dolls 100 --tamanos 10000 100000 500000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import get_db_connection
+from services.reportes_services import obtener_reporte_dolls, refrescar_reporte
+
+SQL_EN_VIVO = """
+    WITH metricas AS (
+        SELECT doll_id,
+               COUNT(*) AS total_cartas,
+               COUNT(*) FILTER (WHERE estado = 'borrador') AS cartas_borrador,
+               COUNT(*) FILTER (WHERE estado = 'revisado') AS cartas_en_proceso,
+               COUNT(*) FILTER (WHERE estado = 'enviado') AS enviadas,
+               COUNT(DISTINCT cliente_id) AS clientes_unicos
+        FROM cartas
+        WHERE doll_id IS NOT NULL
+        GROUP BY doll_id
+    )
+    SELECT d.id, d.nombre, m.*
+    FROM dolls d
+    LEFT JOIN metricas m ON m.doll_id = d.id
+    ORDER BY d.id ASC
+"""
+
+
+def en_vivo():
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(SQL_EN_VIVO)
+    cur.fetchall()
+    cur.close()
+    conn.close()
+
+
+def medir(funcion, llamadas):
+    t0 = time.perf_counter()
+    for _ in range(llamadas):
+        funcion()
+    return (time.perf_counter() - t0) * 1000 / llamadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dolls", type=int, default=100)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10000, 100000, 500000])
+    parser.add_argument("--llamadas", type=int, default=20)
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT INTO clientes (nombre, ciudad, motivo, contacto) VALUES ('reporte_bench', 'Leiden', 'bench', 'x@example.com') RETURNING id"
+    )
+    cliente_id = cur.fetchone()[0]
+    cur.execute("""
+        INSERT INTO dolls (nombre, edad, estado)
+        SELECT 'reporte_doll_' || n, 20, 'inactivo' FROM generate_series(1, %s) AS n
+        RETURNING id
+    """, (args.dolls,))
+    dolls = [row[0] for row in cur.fetchall()]
+    conn.commit()
+
+    print(f"{'cartas':>8} {'en_vivo':>9} {'materializado':>14} {'refresco':>9}   (ms)")
+    sembradas = 0
+    try:
+        for n in sorted(args.tamanos):
+            # Las cartas se insertan directo: el cupo de 5 no importa para medir el reporte
+            cur.execute("""
+                INSERT INTO cartas (cliente_id, doll_id, fecha, estado, contenido)
+                SELECT %s, (%s::int[])[1 + (g %% %s)], CURRENT_DATE,
+                       (ARRAY['borrador', 'revisado', 'enviado'])[1 + (g %% 3)], ''
+                FROM generate_series(1, %s) AS g
+            """, (cliente_id, dolls, len(dolls), n - sembradas))
+            conn.commit()
+            cur.execute("ANALYZE cartas")
+            conn.commit()
+            sembradas = n
+
+            t_refresco = refrescar_reporte()
+            t_vivo = medir(en_vivo, args.llamadas)
+            t_mat = medir(obtener_reporte_dolls, args.llamadas)
+            print(f"{n:>8} {t_vivo:>9.2f} {t_mat:>14.2f} {t_refresco:>9.1f}")
+    finally:
+        cur.execute("DELETE FROM cartas WHERE cliente_id = %s", (cliente_id,))
+        cur.execute("DELETE FROM clientes WHERE id = %s", (cliente_id,))
+        cur.execute("DELETE FROM dolls WHERE id = ANY(%s)", (dolls,))
+        conn.commit()
+        cur.close()
+        conn.close()
+        refrescar_reporte()
+
+
+if __name__ == "__main__":
+    main()
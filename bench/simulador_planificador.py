@@ -0,0 +1,131 @@
+"""
+Simulador del planificador de asignación, sin base de datos.
+
+Reproduce una secuencia de altas de clientes (ciudades con distribución
+sesgada) mientras algunas dolls se desactivan y otras se activan, y compara
+las políticas del planificador en memoria:
+
+    - decisiones por segundo
+    - cartas asignadas vs en espera al final
+    - equidad de la carga (índice de Jain sobre las dolls activas, 1.0 = pareja)
+    - porcentaje de cartas asignadas a una doll de la misma ciudad
+
+Igual que en la aplicación, al desactivar una doll sus cartas vuelven a la
+espera y al activar otra se llenan sus huecos con las más antiguas.
+
+Uso:
+    python bench/simulador_planificador.py --dolls 200 --altas 2000
+"""
+import argparse
+import collections
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.planificador_services import CUPO, POLITICAS, Planificador
+
+
+def generar_escenario(n_dolls, altas, ciudades, cambios_cada, semilla):
+    """Lista de eventos ('alta', ciudad) / ('baja', doll_id) / ('activa', doll_id) y las dolls iniciales."""
+    rnd = random.Random(semilla)
+    nombres_ciudad = [f"ciudad_{i}" for i in range(ciudades)]
+    # Pocas ciudades concentran la mayoría de los clientes
+    pesos = [1 / (i + 1) for i in range(ciudades)]
+    dolls = [(doll_id, rnd.choice(nombres_ciudad)) for doll_id in range(1, n_dolls + 1)]
+    activas = set(doll_id for doll_id, _ in dolls)
+    inactivas = set()
+
+    eventos = []
+    for i in range(altas):
+        eventos.append(("alta", rnd.choices(nombres_ciudad, pesos)[0]))
+        if cambios_cada and i % cambios_cada == cambios_cada - 1:
+            if inactivas:
+                doll_id = rnd.choice(sorted(inactivas))
+                inactivas.discard(doll_id)
+                activas.add(doll_id)
+                eventos.append(("activa", doll_id))
+            if len(activas) > 1:
+                doll_id = rnd.choice(sorted(activas))
+                activas.discard(doll_id)
+                inactivas.add(doll_id)
+                eventos.append(("baja", doll_id))
+    return dolls, eventos
+
+
+def simular(politica, dolls, eventos):
+    ciudad_de = dict(dolls)
+    planificador = Planificador(politica, [(doll_id, ciudad, 0) for doll_id, ciudad in dolls])
+    cartas = collections.defaultdict(list)     # doll_id -> [ciudad del cliente]
+    espera = collections.deque()
+    decisiones = 0
+    misma_ciudad = 0
+    asignadas = 0
+
+    def asignar(ciudad):
+        nonlocal decisiones, misma_ciudad, asignadas
+        decisiones += 1
+        doll_id = planificador.elegir(ciudad)
+        if doll_id is None:
+            return False
+        planificador.registrar(doll_id)
+        cartas[doll_id].append(ciudad)
+        asignadas += 1
+        misma_ciudad += ciudad_de[doll_id] == ciudad
+        return True
+
+    t0 = time.perf_counter()
+    for tipo, valor in eventos:
+        if tipo == "alta":
+            if not asignar(valor):
+                espera.append(valor)
+        elif tipo == "baja":
+            planificador.quitar(valor)
+            for ciudad in cartas.pop(valor, []):
+                asignadas -= 1
+                misma_ciudad -= ciudad_de[valor] == ciudad
+                espera.append(ciudad)
+        elif tipo == "activa":
+            planificador.agregar(valor, ciudad_de[valor], 0)
+            for _ in range(min(CUPO, len(espera))):
+                if not asignar(espera[0]):
+                    break
+                espera.popleft()
+    duracion = time.perf_counter() - t0
+
+    cargas = list(planificador.cargas().values())
+    suma = sum(cargas)
+    cuadrados = sum(c * c for c in cargas)
+    jain = (suma * suma) / (len(cargas) * cuadrados) if cuadrados else 1.0
+    return {
+        "decisiones_seg": decisiones / duracion if duracion else float("inf"),
+        "asignadas": asignadas,
+        "en_espera": len(espera),
+        "jain": jain,
+        "misma_ciudad": 100.0 * misma_ciudad / asignadas if asignadas else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dolls", type=int, default=200)
+    parser.add_argument("--altas", type=int, default=2000)
+    parser.add_argument("--ciudades", type=int, default=12)
+    parser.add_argument("--cambios-cada", type=int, default=25,
+                        help="cada cuántas altas se desactiva una doll y se activa otra (0 = nunca)")
+    parser.add_argument("--semilla", type=int, default=1)
+    args = parser.parse_args()
+
+    dolls, eventos = generar_escenario(args.dolls, args.altas, args.ciudades, args.cambios_cada, args.semilla)
+    print(f"{args.dolls} dolls, {args.altas} altas, {len(eventos) - args.altas} cambios de estado\n")
+    print(f"{'política':<16} {'decisiones/s':>13} {'asignadas':>10} {'en espera':>10} {'jain':>6} {'misma ciudad':>13}")
+    for politica in POLITICAS:
+        r = simular(politica, dolls, eventos)
+        print(f"{politica:<16} {r['decisiones_seg']:>13,.0f} {r['asignadas']:>10} {r['en_espera']:>10} "
+              f"{r['jain']:>6.3f} {r['misma_ciudad']:>12.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Suite de benchmarks de la aplicación, con resultados en JSON.
+
+Siembra datos con bench/generador.py (semilla fija), corre cada escenario
+contra la app Flask con el cliente de pruebas (rutas, SQL y templates, sin
+red) y reporta por escenario p50/p90/p99/máximo en ms y operaciones por
+segundo. Al terminar borra lo sembrado.
+
+Escenarios:
+    cartas           GET /cartas desde un after_id al azar
+    buscar_clientes  GET /clientes?q=<sílaba>
+    reporte_dolls    GET /reporte_dolls
+    alta_cliente     POST /clientes/nuevo (cliente + trabajo encolado)
+    activacion       POST /dolls/editar/<id> alternando activo/inactivo
+
+Con --comparar se contrasta contra una corrida anterior y se sale con
+código 1 si algún p50 o p90 empeoró más que --tolerancia.
+
+Uso:
+    python bench/suite.py --salida bench_resultado.json
+    python bench/suite.py --escenarios cartas reporte_dolls --iteraciones 500
+    python bench/suite.py --salida nuevo.json --comparar bench_resultado.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from db import get_db_connection
+from generador import DOMINIO_CLIENTE, MARCA_DOLL, SILABAS, limpiar, sembrar
+
+
+# =========================
+#       ESCENARIOS
+# =========================
+# Cada escenario recibe (cliente de pruebas, random, contexto) y hace una operación.
+
+def escenario_cartas(cliente, rnd, ctx):
+    return cliente.get(f"/cartas?after_id={rnd.randint(0, ctx['max_carta'])}")
+
+
+def escenario_buscar_clientes(cliente, rnd, ctx):
+    return cliente.get(f"/clientes?q={rnd.choice(SILABAS)}")
+
+
+def escenario_reporte_dolls(cliente, rnd, ctx):
+    return cliente.get("/reporte_dolls")
+
+
+def escenario_alta_cliente(cliente, rnd, ctx):
+    return cliente.post("/clientes/nuevo", data={
+        "nombre": f"Alta {rnd.randint(0, 10 ** 6)}",
+        "ciudad": "Leiden",
+        "motivo": "bench",
+        "contacto": f"alta@{DOMINIO_CLIENTE}",
+    })
+
+
+def escenario_activacion(cliente, rnd, ctx):
+    doll_id = rnd.choice(ctx["dolls"])
+    with ctx["lock"]:
+        estado = "inactivo" if ctx["estados"][doll_id] == "activo" else "activo"
+        ctx["estados"][doll_id] = estado
+    return cliente.post(f"/dolls/editar/{doll_id}", data={"nombre": f"bench_{doll_id}", "edad": 20, "estado": estado})
+
+
+ESCENARIOS = {
+    "cartas": escenario_cartas,
+    "buscar_clientes": escenario_buscar_clientes,
+    "reporte_dolls": escenario_reporte_dolls,
+    "alta_cliente": escenario_alta_cliente,
+    "activacion": escenario_activacion,
+}
+
+
+# =========================
+#        MEDICIÓN
+# =========================
+
+def percentil(ordenados, p):
+    """Percentil por el método del rango más cercano sobre una lista ordenada."""
+    if not ordenados:
+        return None
+    indice = max(0, min(len(ordenados) - 1, math.ceil(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+def correr(nombre, funcion, iteraciones, hilos, ctx, semilla):
+    """Corre el escenario repartiendo las iteraciones entre hilos. Retorna el resumen."""
+    latencias = []
+    errores = []
+    lock = threading.Lock()
+
+    def trabajar(indice, cantidad):
+        rnd = random.Random(f"{semilla}:{nombre}:{indice}")
+        cliente = app.test_client()
+        propias = []
+        fallidas = 0
+        for _ in range(cantidad):
+            t0 = time.perf_counter()
+            respuesta = funcion(cliente, rnd, ctx)
+            respuesta.get_data()
+            propias.append((time.perf_counter() - t0) * 1000)
+            fallidas += respuesta.status_code >= 400
+        with lock:
+            latencias.extend(propias)
+            errores.append(fallidas)
+
+    # Calentamiento: templates compilados, pool y caches cargados
+    trabajar(-1, min(10, iteraciones))
+    latencias.clear()
+    errores.clear()
+
+    por_hilo = [iteraciones // hilos + (i < iteraciones % hilos) for i in range(hilos)]
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=trabajar, args=(i, n)) for i, n in enumerate(por_hilo)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracion = time.perf_counter() - t0
+
+    latencias.sort()
+    return {
+        "n": len(latencias),
+        "errores": sum(errores),
+        "p50_ms": round(percentil(latencias, 50), 3),
+        "p90_ms": round(percentil(latencias, 90), 3),
+        "p99_ms": round(percentil(latencias, 99), 3),
+        "max_ms": round(latencias[-1], 3),
+        "media_ms": round(sum(latencias) / len(latencias), 3),
+        "ops_seg": round(len(latencias) / duracion, 1),
+    }
+
+
+def _contexto():
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM cartas")
+    max_carta = cur.fetchone()[0]
+    cur.execute("SELECT id, estado FROM dolls WHERE descripcion = %s ORDER BY id", (MARCA_DOLL,))
+    estados = dict(cur.fetchall())
+    cur.close()
+    conn.close()
+    return {"max_carta": max_carta, "dolls": sorted(estados), "estados": estados, "lock": threading.Lock()}
+
+
+def _commit_git():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def comparar(actual, anterior, tolerancia):
+    """Lista de (escenario, métrica, antes, ahora) que empeoraron más que la tolerancia."""
+    regresiones = []
+    for nombre, datos in actual["escenarios"].items():
+        previo = anterior.get("escenarios", {}).get(nombre)
+        if not previo:
+            continue
+        for metrica in ("p50_ms", "p90_ms"):
+            if previo[metrica] and datos[metrica] > previo[metrica] * (1 + tolerancia):
+                regresiones.append((nombre, metrica, previo[metrica], datos[metrica]))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dolls", type=int, default=1000)
+    parser.add_argument("--clientes", type=int, default=3000)
+    parser.add_argument("--cartas", type=int, default=4000)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--escenarios", nargs="+", choices=list(ESCENARIOS), default=list(ESCENARIOS))
+    parser.add_argument("--iteraciones", type=int, default=200)
+    parser.add_argument("--hilos", type=int, default=1)
+    parser.add_argument("--salida", help="archivo JSON donde guardar los resultados")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="empeoramiento aceptado (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    limpiar()
+    datos = sembrar(args.dolls, args.clientes, args.cartas, args.semilla)
+    print(f"Datos: {datos}")
+    try:
+        ctx = _contexto()
+        escenarios = {}
+        for nombre in args.escenarios:
+            resultado = correr(nombre, ESCENARIOS[nombre], args.iteraciones, args.hilos, ctx, args.semilla)
+            escenarios[nombre] = resultado
+            print(f"{nombre:<16} p50 {resultado['p50_ms']:>8.2f}  p90 {resultado['p90_ms']:>8.2f}  "
+                  f"p99 {resultado['p99_ms']:>8.2f}  max {resultado['max_ms']:>8.2f} ms  "
+                  f"{resultado['ops_seg']:>8.1f} ops/s  errores {resultado['errores']}")
+    finally:
+        limpiar()
+
+    resultado = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_git(),
+        "python": platform.python_version(),
+        "parametros": {k: v for k, v in vars(args).items() if k not in ("salida", "comparar")},
+        "datos": datos,
+        "escenarios": escenarios,
+    }
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+        print(f"Resultados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            anterior = json.load(archivo)
+        regresiones = comparar(resultado, anterior, args.tolerancia)
+        for nombre, metrica, antes, ahora in regresiones:
+            print(f"REGRESIÓN {nombre} {metrica}: {antes} -> {ahora} ms")
+        if regresiones:
+            sys.exit(1)
+        print(f"Sin regresiones contra {args.comparar} (tolerancia {args.tolerancia:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
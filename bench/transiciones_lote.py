@@ -0,0 +1,94 @@
+"""
+Envío masivo de cartas revisadas: una por una vs en lote.
+
+Siembra N cartas en 'revisado' y las pasa a 'enviado' de dos formas:
+
+    una_por_una  lo que hacía cambiar_estado_carta(): buscar la carta y
+                 actualizarla, con un viaje (y un commit) por consulta
+    lote         transicionar_cartas(ids, 'enviado'): un solo UPDATE que
+                 valida la transición en SQL y devuelve el resultado por id
+
+Comprueba que ambas dejen todo en 'enviado'. Los datos sembrados se borran
+al terminar.
+
+Uso:
+    python bench/transiciones_lote.py --cartas 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datos import actualizar_carta, buscar_carta
+from db import get_db_connection
+from services.cartas_services import transicionar_cartas
+
+
+def una_por_una(ids):
+    for carta_id in ids:
+        carta = buscar_carta(carta_id)
+        if carta and carta.estado == "revisado":
+            actualizar_carta(carta_id, {"estado": "enviado"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cartas", type=int, default=5000)
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT INTO clientes (nombre, ciudad, motivo, contacto) VALUES ('transiciones_bench', 'Leiden', 'bench', 'x@example.com') RETURNING id"
+    )
+    cliente_id = cur.fetchone()[0]
+    cur.execute("INSERT INTO dolls (nombre, edad, estado) VALUES ('transiciones_doll', 20, 'inactivo') RETURNING id")
+    doll_id = cur.fetchone()[0]
+    # Se insertan directo: el cupo de 5 no importa para medir las transiciones
+    cur.execute("""
+        INSERT INTO cartas (cliente_id, doll_id, fecha, estado, contenido)
+        SELECT %s, %s, CURRENT_DATE, 'revisado', '' FROM generate_series(1, %s)
+        RETURNING id
+    """, (cliente_id, doll_id, args.cartas))
+    ids = sorted(row[0] for row in cur.fetchall())
+    conn.commit()
+
+    def pendientes():
+        cur.execute("SELECT COUNT(*) FROM cartas WHERE id = ANY(%s) AND estado <> 'enviado'", (ids,))
+        return cur.fetchone()[0]
+
+    try:
+        t0 = time.perf_counter()
+        una_por_una(ids)
+        t_uno = time.perf_counter() - t0
+        quedan_uno = pendientes()
+
+        cur.execute("UPDATE cartas SET estado = 'revisado' WHERE id = ANY(%s)", (ids,))
+        conn.commit()
+
+        t0 = time.perf_counter()
+        resultados = transicionar_cartas(ids, "enviado")
+        t_lote = time.perf_counter() - t0
+        quedan_lote = pendientes()
+        aplicadas = sum(1 for r in resultados if r["resultado"] == "aplicada")
+    finally:
+        cur.execute("DELETE FROM cartas WHERE cliente_id = %s", (cliente_id,))
+        cur.execute("DELETE FROM clientes WHERE id = %s", (cliente_id,))
+        cur.execute("DELETE FROM dolls WHERE id = %s", (doll_id,))
+        conn.commit()
+        cur.close()
+        conn.close()
+
+    print(f"cartas: {len(ids)}")
+    print(f"una_por_una: {t_uno * 1000:9.1f} ms  ({len(ids) / t_uno:,.0f} cartas/s)  sin enviar: {quedan_uno}")
+    print(f"lote:        {t_lote * 1000:9.1f} ms  ({len(ids) / t_lote:,.0f} cartas/s)  sin enviar: {quedan_lote}"
+          f"  aplicadas: {aplicadas}")
+    if quedan_uno or quedan_lote or aplicadas != len(ids):
+        print("FALLO: quedaron cartas sin enviar")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import json
+import logging
+import select
+import threading
+import time
+
+import psycopg2
+
+from config import CACHE_CONFIG, DB_CONFIG
+
+log = logging.getLogger("cache")
+
+# =========================
+#    CACHE EN MEMORIA
+# =========================
+
+class CacheTTL:
+    """
+    Cache read-through en memoria del proceso, con expiración por TTL e
+    invalidación explícita. Con el backend 'postgres' las invalidaciones se
+    publican con NOTIFY para que los demás workers también las apliquen.
+    """
+
+    def __init__(self, nombre, ttl, max_entradas=None):
+        self.nombre = nombre
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._lock = threading.Lock()
+        self._datos = {}        # clave -> (expira_en, valor)
+        self._generacion = 0    # sube con cada invalidación
+        self.hits = 0
+        self.misses = 0
+        self.invalidaciones = 0
+
+    def obtener(self, clave, cargar):
+        """Retorna el valor guardado o lo calcula con cargar() y lo guarda."""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None and entrada[0] > time.monotonic():
+                self.hits += 1
+                return entrada[1]
+            self.misses += 1
+            generacion = self._generacion
+
+        valor = cargar()
+
+        with self._lock:
+            # Si hubo una invalidación mientras se cargaba, el valor ya puede
+            # estar viejo: se devuelve pero no se guarda.
+            if generacion == self._generacion:
+                self._datos[clave] = (time.monotonic() + self.ttl, valor)
+                if self.max_entradas and len(self._datos) > self.max_entradas:
+                    self._recortar()
+        return valor
+
+    def _recortar(self):
+        """Saca las entradas vencidas y, si aún sobran, las más viejas."""
+        ahora = time.monotonic()
+        for clave in [c for c, (expira_en, _) in self._datos.items() if expira_en <= ahora]:
+            del self._datos[clave]
+        while len(self._datos) > self.max_entradas:
+            del self._datos[next(iter(self._datos))]
+
+    def invalidar(self, clave=None, propagar=True):
+        """Borra una clave (o todo el cache si clave es None)."""
+        with self._lock:
+            if clave is None:
+                self._datos.clear()
+            else:
+                self._datos.pop(clave, None)
+            self._generacion += 1
+            self.invalidaciones += 1
+        if propagar and CACHE_CONFIG["backend"] == "postgres":
+            _publicar({"cache": self.nombre, "clave": clave})
+
+    @property
+    def generacion(self):
+        """Sube con cada invalidación: sirve para saber si algo derivado quedó viejo."""
+        return self._generacion
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entradas": len(self._datos),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidaciones": self.invalidaciones,
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(nombre, ttl=None, max_entradas=None):
+    """Retorna (creándolo si hace falta) el cache con ese nombre."""
+    with _caches_lock:
+        cache = _caches.get(nombre)
+        if cache is None:
+            cache = _caches[nombre] = CacheTTL(nombre, ttl or CACHE_CONFIG["ttl"], max_entradas)
+    if CACHE_CONFIG["backend"] == "postgres":
+        _iniciar_escucha()
+    return cache
+
+
+def cache_stats():
+    with _caches_lock:
+        caches = list(_caches.values())
+    return {cache.nombre: cache.stats() for cache in caches}
+
+
+# =========================
+#   VERSIONES POR TABLA
+# =========================
+# Un contador por tabla que sube cada vez que la aplicación la modifica. Quien
+# escribe llama a tocar_tablas() después del commit; quien guarda algo derivado
+# (ver cache_http.py) lo asocia a las versiones que leyó y deja de usarlo
+# cuando cambian. Con el backend 'postgres' los demás procesos también se
+# enteran; con 'local' solo se ven los cambios del propio proceso.
+
+_versiones = {}          # tabla -> (version, modificada_en)
+_versiones_lock = threading.Lock()
+_inicio = time.time()    # "modificada_en" de las tablas que aún no se tocaron
+
+
+def tocar_tablas(*tablas, propagar=True):
+    """Sube la versión de las tablas dadas. Llamar después del commit."""
+    ahora = time.time()
+    with _versiones_lock:
+        for tabla in tablas:
+            version, _ = _versiones.get(tabla, (0, _inicio))
+            _versiones[tabla] = (version + 1, ahora)
+    if propagar and CACHE_CONFIG["backend"] == "postgres":
+        _publicar({"tablas": list(tablas)})
+
+
+def versiones_tablas(tablas):
+    """Retorna (tupla de versiones, última modificación como epoch) de las tablas dadas."""
+    with _versiones_lock:
+        datos = [_versiones.get(tabla, (0, _inicio)) for tabla in tablas]
+    return tuple(version for version, _ in datos), max((m for _, m in datos), default=_inicio)
+
+
+# =========================
+#   BACKEND COMPARTIDO
+# =========================
+# Cada proceso escucha el canal con LISTEN en una conexión propia (fuera del
+# pool) y aplica las invalidaciones que publican los demás con NOTIFY, que
+# salen por otra conexión propia (también fuera del pool).
+
+_escucha = None
+_escucha_lock = threading.Lock()
+_publicador = None
+_publicador_lock = threading.Lock()
+
+
+def _publicar(datos):
+    # Conexión propia del proceso, fuera del pool y en autocommit: no confirma
+    # la transacción de quien invalida ni compite por el pool con el request
+    # que ya tiene la suya. El aviso sale después del commit de los datos, así
+    # que si falla se registra en lugar de convertir la escritura en un error.
+    global _publicador
+    mensaje = json.dumps(datos)
+    with _publicador_lock:
+        for _ in range(2):   # una reconexión si la conexión quedó rota
+            try:
+                if _publicador is None or _publicador.closed:
+                    _publicador = psycopg2.connect(**DB_CONFIG)
+                    _publicador.autocommit = True
+                with _publicador.cursor() as cur:
+                    cur.execute("SELECT pg_notify(%s, %s)", (CACHE_CONFIG["canal"], mensaje))
+                return
+            except (psycopg2.Error, OSError):
+                if _publicador is not None and not _publicador.closed:
+                    _publicador.close()
+                _publicador = None
+    log.warning("No se pudo publicar la invalidación %s", mensaje)
+
+
+def _aplicar(mensaje):
+    try:
+        datos = json.loads(mensaje)
+    except ValueError:
+        return
+    if "tablas" in datos:
+        tocar_tablas(*datos["tablas"], propagar=False)
+        return
+    with _caches_lock:
+        cache = _caches.get(datos.get("cache"))
+    if cache is not None:
+        cache.invalidar(datos.get("clave"), propagar=False)
+
+
+def _escuchar():
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(**DB_CONFIG)
+            conn.autocommit = True
+            cur = conn.cursor()
+            cur.execute(f"LISTEN {CACHE_CONFIG['canal']}")
+            # Pudimos perder avisos mientras no escuchábamos
+            for cache in list(_caches.values()):
+                cache.invalidar(propagar=False)
+            tocar_tablas(*list(_versiones), propagar=False)
+            while True:
+                if select.select([conn], [], [], 60) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    _aplicar(conn.notifies.pop(0).payload)
+        except (psycopg2.Error, OSError, ValueError):
+            if conn is not None and not conn.closed:
+                conn.close()
+            time.sleep(1)
+
+
+def _iniciar_escucha():
+    global _escucha
+    if _escucha is not None:
+        return
+    with _escucha_lock:
+        if _escucha is None:
+            _escucha = threading.Thread(target=_escuchar, name="cache-listen", daemon=True)
+            _escucha.start()
@@ -0,0 +1,83 @@
+"""
+Cache de respuestas para las páginas de listados y reportes.
+
+@cachear_respuesta("cartas", "dolls") guarda el HTML de una vista GET por
+(endpoint, argumentos de la URL, versiones de las tablas que lee). Las
+versiones las sube quien escribe, con cache.tocar_tablas(), así que una
+página solo se vuelve a armar cuando alguna de sus tablas cambió (o al
+vencer el TTL de HTTP_CACHE_CONFIG).
+
+Cada respuesta lleva ETag (hash del cuerpo), Last-Modified (último cambio
+de sus tablas visto por este proceso) y Cache-Control: no-cache, de modo que
+navegadores y proxies revalidan siempre y reciben 304 si nada cambió.
+
+No se guarda nada si hay mensajes flash pendientes (la página los muestra
+una sola vez) ni respuestas que no sean 200.
+
+Las versiones solo cruzan procesos con el backend 'postgres' de cache.py.
+Con 'local', una carta que crea worker.py o un reporte que refresca no suben
+las versiones del proceso web, así que por defecto (activa = None) el cache
+de respuestas queda apagado con ese backend.
+"""
+from functools import wraps
+
+from flask import make_response, request, session
+from werkzeug.wrappers import Response
+
+from cache import get_cache, versiones_tablas
+from config import CACHE_CONFIG, HTTP_CACHE_CONFIG
+
+cache_respuestas = get_cache("http", HTTP_CACHE_CONFIG["ttl"], HTTP_CACHE_CONFIG["max_entradas"])
+
+
+def respuestas_activas():
+    """Si el cache de respuestas está en uso (ver HTTP_CACHE_CONFIG['activa'])."""
+    activa = HTTP_CACHE_CONFIG["activa"]
+    if activa is None:
+        return CACHE_CONFIG["backend"] == "postgres"
+    return activa
+
+
+class _NoCacheable(Exception):
+    def __init__(self, respuesta):
+        self.respuesta = respuesta
+
+
+def _armar(vista, args, kwargs):
+    respuesta = make_response(vista(*args, **kwargs))
+    if respuesta.status_code != 200 or respuesta.is_streamed or "_flashes" in session:
+        raise _NoCacheable(respuesta)
+    respuesta.add_etag()
+    return respuesta.get_data(), respuesta.mimetype, respuesta.get_etag()[0]
+
+
+def cachear_respuesta(*tablas):
+    """Decorador para vistas GET cuyo resultado depende solo de la URL y de `tablas`."""
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            if not respuestas_activas() or request.method != "GET" or "_flashes" in session:
+                return vista(*args, **kwargs)
+
+            versiones, modificada_en = versiones_tablas(tablas)
+            clave = (request.endpoint, tuple(sorted(kwargs.items())),
+                     tuple(sorted(request.args.items(multi=True))), versiones)
+            armada = []
+
+            def cargar():
+                armada.append(True)
+                return _armar(vista, args, kwargs)
+
+            try:
+                cuerpo, mimetype, etag = cache_respuestas.obtener(clave, cargar)
+            except _NoCacheable as e:
+                return e.respuesta
+
+            respuesta = Response(cuerpo, mimetype=mimetype)
+            respuesta.set_etag(etag)
+            respuesta.last_modified = int(modificada_en)
+            respuesta.cache_control.no_cache = True
+            respuesta.headers["X-Cache"] = "MISS" if armada else "HIT"
+            return respuesta.make_conditional(request)
+        return envoltura
+    return decorador
@@ -4,3 +4,90 @@ DB_CONFIG = {
     'user': 'postgres',
     'password': '123'
 }
+
+# Pool de conexiones compartido (ver db.py)
+POOL_CONFIG = {
+    'minconn': 1,
+    'maxconn': 10,
+    'timeout': 5.0,       # segundos máximos esperando una conexión libre
+    'check_after': 30.0   # segundos ociosa antes de validar con SELECT 1
+}
+
+# Cola de trabajos en segundo plano (ver services/trabajos_services.py y worker.py)
+TRABAJOS_CONFIG = {
+    'lote': 50,            # trabajos que toma un worker por vuelta
+    'max_intentos': 5,
+    'backoff_base': 2.0,   # segundos; el reintento n espera base ** n (tope backoff_max)
+    'backoff_max': 300.0,
+    'lease': 300,          # segundos antes de retomar un trabajo de un worker caído
+    'espera_vacia': 1.0    # segundos que duerme el worker si la cola está vacía
+}
+
+# Cache en memoria (ver cache.py). Con 'postgres' las invalidaciones se
+# reparten entre workers con LISTEN/NOTIFY; con 'local' cada proceso solo
+# confía en el TTL para enterarse de cambios hechos por otros.
+CACHE_CONFIG = {
+    'ttl': 30.0,
+    'backend': 'local',
+    'canal': 'cache_invalidacion'
+}
+
+# Planificador en memoria para asignar cartas (ver services/planificador_services.py).
+# politica: None usa la asignación SQL (menos cargada); o 'menos_cargada',
+# 'round_robin', 'afinidad_ciudad'.
+PLANIFICADOR_CONFIG = {
+    'politica': None,
+    'ttl': 5.0   # segundos antes de resincronizar con la base
+}
+
+# Reporte por doll materializado (ver services/reportes_services.py)
+REPORTE_CONFIG = {
+    'refresco': 60.0   # cada cuántos segundos lo refresca worker.py (0 = nunca)
+}
+
+# Instrumentación por request (ver instrumentacion.py). Apagada por defecto.
+INSTRUMENTACION_CONFIG = {
+    'activa': False,
+    'lenta_ms': 200.0,         # sentencias más lentas que esto van al log de lentas
+    'log_lentas': None,        # archivo para ese log; None = logging estándar
+    'max_sentencias': 500      # cuántas sentencias distintas se agregan en /metrics
+}
+
+# API JSON /api/v1 (ver api_v1.py)
+API_CONFIG = {
+    'limite': 50,        # filas por página por defecto
+    'limite_max': 500,
+    'lote_max': 1000     # elementos por request en los endpoints de lote
+}
+
+# Cache de respuestas de listados y reportes (ver cache_http.py). Cada página
+# se guarda junto a las versiones de las tablas que lee (cache.tocar_tablas).
+# Con activa = None se usa solo si CACHE_CONFIG['backend'] es 'postgres': con
+# 'local' no se ven las escrituras del worker ni de otros procesos web.
+HTTP_CACHE_CONFIG = {
+    'activa': None,        # None = según el backend; True/False lo fuerza
+    'ttl': 30.0,           # segundos; tope para ver cambios de otros procesos con backend 'local'
+    'max_entradas': 1000
+}
+
+# Modo ASGI con asyncpg (ver asgi.py y db_async.py)
+ASYNC_CONFIG = {
+    'min_size': 2,
+    'max_size': 20,
+    'timeout': 5.0   # segundos máximos esperando una conexión libre
+}
+
+# Exportación a CSV/JSONL (ver services/exportacion_services.py)
+EXPORTACION_CONFIG = {
+    'bloque': 65536,     # bytes por bloque enviado
+    'en_vuelo': 8,       # bloques que COPY puede adelantar a quien lee
+    'itersize': 5000,    # filas por viaje del cursor con nombre (JSONL)
+    'nivel_gzip': 6
+}
+
+# Log de eventos de cartas y dolls (ver services/eventos_services.py)
+EVENTOS_CONFIG = {
+    'lote': 1000,            # eventos por lectura
+    'espera': 5.0,           # segundos sin avisos antes de volver a leer igual
+    'retencion_dias': 7      # worker.py borra los más viejos
+}
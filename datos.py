@@ -0,0 +1,210 @@
+"""
+Acceso a datos de cartas, sin Flask: lo usan los servicios, el worker y los
+scripts de bench sin levantar ninguna app.
+"""
+from cache import tocar_tablas
+from db import get_db_connection
+from modelos import Carta, cargar_una
+
+
+def guardar_carta(datos):
+    """
+    Inserta una carta en la base de datos y retorna el ID generado.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        INSERT INTO cartas (cliente_id, doll_id, fecha, estado, contenido)
+        VALUES (%s, %s, CURRENT_DATE, %s, %s)
+        RETURNING id;
+    """, (
+        datos.get("cliente_id"),
+        datos.get("doll_id"),
+        datos.get("estado", "borrador"),
+        datos.get("contenido", "")
+    ))
+    carta_id = cur.fetchone()[0]
+    conn.commit()
+    cur.close()
+    conn.close()
+    tocar_tablas("cartas")
+    return carta_id
+
+
+# Dolls ACTIVAS con cupo (máximo 5 cartas)
+SQL_DOLLS_CON_CUPO = """
+    SELECT k.doll_id
+    FROM contadores_dolls k
+    JOIN dolls d ON d.id = k.doll_id
+    WHERE d.estado = 'activo' AND k.total < 5
+"""
+
+ORDEN_MENOS_CARGADA = " ORDER BY k.total ASC, k.doll_id ASC LIMIT 1"
+
+
+def _elegir_doll(cur):
+    """
+    Bloquea la fila de contadores_dolls de la Doll activa con menos cartas y
+    cupo y retorna su id, o None si ninguna tiene cupo.
+
+    Primero se busca con SKIP LOCKED para no esperar si hay otra Doll libre.
+    Si todas las que tienen cupo están tomadas por otras altas, se espera el
+    bloqueo de la menos cargada, de a una fila y dentro de un savepoint: si
+    al liberarse ya se llenó, se suelta (así nunca se espera teniendo otra
+    fila bloqueada, lo que podría trabar dos altas entre sí) y se vuelve a
+    buscar. Cada vuelta perdida es una Doll que se llenó, así que el bucle
+    termina.
+    """
+    while True:
+        cur.execute(SQL_DOLLS_CON_CUPO + ORDEN_MENOS_CARGADA + " FOR UPDATE OF k SKIP LOCKED")
+        fila = cur.fetchone()
+        if fila is not None:
+            return fila[0]
+        cur.execute(SQL_DOLLS_CON_CUPO + ORDEN_MENOS_CARGADA)
+        fila = cur.fetchone()
+        if fila is None:
+            return None
+        cur.execute("SAVEPOINT elegir_doll")
+        cur.execute(SQL_DOLLS_CON_CUPO + " AND k.doll_id = %s FOR UPDATE OF k", (fila[0],))
+        fila = cur.fetchone()
+        if fila is not None:
+            cur.execute("RELEASE SAVEPOINT elegir_doll")
+            return fila[0]
+        cur.execute("ROLLBACK TO SAVEPOINT elegir_doll")
+
+
+def guardar_carta_con_doll(datos, cur=None):
+    """
+    Inserta una carta asignándole, en la misma transacción, la Doll ACTIVA
+    con menos cartas (máximo 5). Si no hay ninguna con cupo, la carta queda
+    'en espera' sin Doll. Retorna (carta_id, doll_id).
+
+    La fila de contadores_dolls de la Doll elegida queda bloqueada hasta el
+    commit, así que dos altas simultáneas nunca pasan del cupo, y la carta
+    solo queda en espera si ninguna Doll activa tiene cupo (ver _elegir_doll).
+    Si se pasa `cur`, corre en esa transacción y el commit lo hace quien llama.
+    """
+    if cur is None:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            resultado = guardar_carta_con_doll(datos, cur)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+        tocar_tablas("cartas")
+        return resultado
+
+    doll_id = _elegir_doll(cur)
+    cur.execute("""
+        INSERT INTO cartas (cliente_id, doll_id, fecha, estado, contenido)
+        VALUES (%s, %s, CURRENT_DATE, %s, %s)
+        RETURNING id;
+    """, (
+        datos.get("cliente_id"),
+        doll_id,
+        datos.get("estado", "borrador") if doll_id else "en espera",
+        datos.get("contenido", "")
+    ))
+    return cur.fetchone()[0], doll_id
+
+
+def guardar_carta_en_doll(datos, doll_id, cur=None):
+    """
+    Inserta una carta asignada a una Doll concreta (la que propone el
+    planificador), solo si sigue activa y con cupo. Bloquea su fila de
+    contadores_dolls igual que guardar_carta_con_doll, así que el cupo se
+    respeta aunque el planificador trabaje con datos algo viejos.
+    Retorna el id de la carta o None si la Doll ya no puede recibirla.
+    Si se pasa `cur`, corre en esa transacción y el commit lo hace quien llama.
+    """
+    if cur is None:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            carta_id = guardar_carta_en_doll(datos, doll_id, cur)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+        if carta_id is not None:
+            tocar_tablas("cartas")
+        return carta_id
+
+    cur.execute("""
+        WITH elegida AS (
+            SELECT k.doll_id
+            FROM contadores_dolls k
+            JOIN dolls d ON d.id = k.doll_id
+            WHERE k.doll_id = %(doll_id)s AND d.estado = 'activo' AND k.total < 5
+            FOR UPDATE OF k
+        )
+        INSERT INTO cartas (cliente_id, doll_id, fecha, estado, contenido)
+        SELECT %(cliente_id)s, e.doll_id, CURRENT_DATE, %(estado)s, %(contenido)s
+        FROM elegida e
+        RETURNING id;
+    """, {
+        "doll_id": doll_id,
+        "cliente_id": datos.get("cliente_id"),
+        "estado": datos.get("estado", "borrador"),
+        "contenido": datos.get("contenido", "")
+    })
+    fila = cur.fetchone()
+    return fila[0] if fila else None
+
+
+def buscar_carta(carta_id):
+    """
+    Busca una carta y la retorna como modelos.Carta (None si no existe).
+    No trae el cuerpo, solo la vista previa.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT id, cliente_id, doll_id, fecha, estado, contenido_preview
+        FROM cartas WHERE id = %s;
+    """, (carta_id,))
+    carta = cargar_una(cur, Carta)
+    cur.close()
+    conn.close()
+    return carta
+
+
+def actualizar_carta(carta_id, datos):
+    """
+    Actualiza una carta con los datos proporcionados.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    set_clauses = []
+    values = []
+    for campo, valor in datos.items():
+        set_clauses.append(f"{campo}=%s")
+        values.append(valor)
+    values.append(carta_id)
+    query = f"UPDATE cartas SET {', '.join(set_clauses)} WHERE id=%s"
+    cur.execute(query, values)
+    conn.commit()
+    cur.close()
+    conn.close()
+    tocar_tablas("cartas")
+
+
+def eliminar_carta_bd(carta_id):
+    """
+    Elimina una carta de la base de datos.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("DELETE FROM cartas WHERE id = %s", (carta_id,))
+    conn.commit()
+    cur.close()
+    conn.close()
+    tocar_tablas("cartas")
@@ -0,0 +1,278 @@
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+from config import DB_CONFIG, POOL_CONFIG
+
+# =========================
+#    POOL DE CONEXIONES
+# =========================
+
+class PoolConexiones:
+    """
+    Pool de conexiones psycopg2 compartido por todos los módulos.
+    Reutiliza conexiones abiertas en lugar de hacer un connect() por consulta,
+    valida la conexión al prestarla y lleva estadísticas de uso y espera.
+    """
+
+    def __init__(self, minconn=1, maxconn=10, timeout=5.0, check_after=30.0, **dsn):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.check_after = check_after
+        self.dsn = dsn
+
+        self._cond = threading.Condition()
+        self._libres = []       # [(conexion, momento en que se devolvió)]
+        self._abiertas = 0
+        self._en_uso = 0
+
+        self._prestamos = 0
+        self._esperas = 0
+        self._espera_total = 0.0
+        self._espera_max = 0.0
+        self._descartadas = 0
+
+        for _ in range(minconn):
+            self._libres.append((self._abrir(), time.monotonic()))
+            self._abiertas += 1
+
+    def _abrir(self):
+        return psycopg2.connect(**self.dsn)
+
+    def _sana(self, conn, devuelta_en):
+        """Health check: solo hace SELECT 1 si la conexión estuvo ociosa un buen rato."""
+        if conn.closed:
+            return False
+        if time.monotonic() - devuelta_en < self.check_after:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def obtener(self):
+        """
+        Presta una conexión. Si todas están ocupadas espera hasta `timeout`
+        segundos a que alguien devuelva una; si no, lanza PoolError.
+        """
+        inicio = time.monotonic()
+        with self._cond:
+            while not self._libres and self._abiertas >= self.maxconn:
+                restante = self.timeout - (time.monotonic() - inicio)
+                if restante <= 0:
+                    raise PoolError("No hay conexiones disponibles en el pool")
+                self._cond.wait(restante)
+
+            if self._libres:
+                conn, devuelta_en = self._libres.pop()
+            else:
+                conn, devuelta_en = None, None
+                self._abiertas += 1
+            self._en_uso += 1
+
+            espera = time.monotonic() - inicio
+            self._prestamos += 1
+            if espera > 0.001:
+                self._esperas += 1
+            self._espera_total += espera
+            self._espera_max = max(self._espera_max, espera)
+
+        try:
+            if conn is not None and not self._sana(conn, devuelta_en):
+                self._cerrar(conn)
+                with self._cond:
+                    self._descartadas += 1
+                conn = None
+            if conn is None:
+                conn = self._abrir()
+        except Exception:
+            with self._cond:
+                self._abiertas -= 1
+                self._en_uso -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def devolver(self, conn, cerrar=False):
+        """Regresa la conexión al pool dejando la transacción limpia."""
+        if not cerrar and not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                cerrar = True
+
+        if cerrar or conn.closed:
+            self._cerrar(conn)
+
+        with self._cond:
+            self._en_uso -= 1
+            if cerrar or conn.closed:
+                self._abiertas -= 1
+            else:
+                self._libres.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def _cerrar(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def cerrar_todo(self):
+        with self._cond:
+            libres, self._libres = self._libres, []
+            self._abiertas -= len(libres)
+        for conn, _ in libres:
+            self._cerrar(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max": self.maxconn,
+                "abiertas": self._abiertas,
+                "en_uso": self._en_uso,
+                "libres": len(self._libres),
+                "prestamos": self._prestamos,
+                "esperas": self._esperas,
+                "espera_total_ms": round(self._espera_total * 1000, 3),
+                "espera_max_ms": round(self._espera_max * 1000, 3),
+                "descartadas": self._descartadas,
+            }
+
+
+class ConexionPrestada:
+    """
+    Envoltorio de la conexión que entrega get_db_connection().
+    Se usa igual que una conexión psycopg2, pero close() la devuelve al pool.
+    Si es la conexión compartida de un request, close() no la suelta:
+    se devuelve al terminar el request.
+    """
+
+    def __init__(self, pool, conn, compartida=False):
+        self._pool = pool
+        self._conn = conn
+        self._compartida = compartida
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+    def cursor(self, *args, **kwargs):
+        if _cursor_factory is not None and "cursor_factory" not in kwargs:
+            kwargs["cursor_factory"] = _cursor_factory
+        return self._conn.cursor(*args, **kwargs)
+
+    def close(self):
+        if self._conn is None:
+            return
+        if self._compartida:
+            # Una función anidada falló a mitad de transacción: limpiamos
+            # para que el resto del request pueda seguir usando la conexión.
+            if self._conn.get_transaction_status() == extensions.TRANSACTION_STATUS_INERROR:
+                self._conn.rollback()
+            return
+        self.liberar()
+
+    def liberar(self, cerrar=False):
+        """Devuelve la conexión al pool; con cerrar=True la descarta (quedó en un estado dudoso)."""
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        self._pool.devolver(conn, cerrar)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Ganchos que usa instrumentacion.py (None = sin instrumentar)
+_cursor_factory = None
+_al_pedir_conexion = None
+
+
+def instrumentar(cursor_factory, al_pedir_conexion):
+    """
+    Hace que los cursores de get_db_connection() se creen con `cursor_factory`
+    y que cada llamada avise a al_pedir_conexion(prestamo_nuevo).
+    """
+    global _cursor_factory, _al_pedir_conexion
+    _cursor_factory = cursor_factory
+    _al_pedir_conexion = al_pedir_conexion
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolConexiones(**POOL_CONFIG, **DB_CONFIG)
+    return _pool
+
+
+def pool_stats():
+    return get_pool().stats()
+
+
+def get_db_connection():
+    """
+    Devuelve una conexión del pool.
+    Dentro de un request de una app registrada con init_app() todas las
+    llamadas comparten la misma conexión, que se devuelve en el teardown.
+    Fuera de un request (scripts, workers) cada llamada presta una conexión
+    propia que se devuelve con close().
+    """
+    from flask import current_app, g, has_request_context
+
+    if has_request_context() and "db_pool" in current_app.extensions:
+        prestada = g.get("_conexion_db")
+        nueva = prestada is None
+        if nueva:
+            prestada = ConexionPrestada(get_pool(), get_pool().obtener(), compartida=True)
+            g._conexion_db = prestada
+    else:
+        prestada = ConexionPrestada(get_pool(), get_pool().obtener())
+        nueva = True
+    if _al_pedir_conexion is not None:
+        _al_pedir_conexion(nueva)
+    return prestada
+
+
+def iterar_consulta(sql, params=None, nombre="cursor_stream", itersize=2000, modelo=None):
+    """
+    Generador que recorre el resultado con un cursor con nombre (del lado del
+    servidor), trayendo `itersize` filas por viaje en lugar de todo con fetchall().
+    Con `modelo` (ver modelos.py) entrega cada fila como esa NamedTuple.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor(name=nombre)
+    cur.itersize = itersize
+    try:
+        cur.execute(sql, params)
+        if modelo is None:
+            yield from cur
+        else:
+            yield from map(modelo._make, cur)
+    finally:
+        cur.close()
+        conn.close()
+
+
+def _devolver_conexion_request(exc=None):
+    from flask import g
+
+    prestada = g.pop("_conexion_db", None)
+    if prestada is not None:
+        prestada.liberar()
+
+
+def init_app(app):
+    """Registra el préstamo de conexión por request en la app Flask."""
+    app.extensions["db_pool"] = get_pool
+    app.teardown_appcontext(_devolver_conexion_request)
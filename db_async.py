@@ -0,0 +1,111 @@
+"""
+Pool asyncpg para el modo ASGI (asgi.py).
+
+Las sentencias se escriben una sola vez, con los marcadores de psycopg2
+(%s, %(nombre)s, %%), y las comparten el modo sincrónico y el asíncrono:
+a_asyncpg() las traduce a los $1, $2... de asyncpg. Así las reglas que viven
+en el SQL de cartas_services y dolls_services no se duplican.
+"""
+import re
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+import asyncpg
+
+from config import ASYNC_CONFIG, DB_CONFIG
+
+_RE_MARCADOR = re.compile(r"%\((\w+)\)s|%s|%%")
+
+_pool = None
+
+
+@lru_cache(maxsize=256)
+def a_asyncpg(sql):
+    """
+    Traduce una sentencia con marcadores de psycopg2 a la sintaxis de asyncpg.
+    Retorna (sql, nombres): nombres es la tupla de parámetros con nombre en el
+    orden de $1..$n, o None si la sentencia usa %s posicionales.
+    """
+    nombres = []
+    posicionales = 0
+
+    def reemplazar(m):
+        nonlocal posicionales
+        if m.group(0) == "%%":
+            return "%"
+        if m.group(1) is None:
+            posicionales += 1
+            return f"${posicionales}"
+        if m.group(1) not in nombres:
+            nombres.append(m.group(1))
+        return f"${nombres.index(m.group(1)) + 1}"
+
+    traducida = _RE_MARCADOR.sub(reemplazar, sql)
+    if nombres and posicionales:
+        raise ValueError("No se pueden mezclar %s y %(nombre)s en una sentencia")
+    return traducida, (tuple(nombres) if nombres else None)
+
+
+def argumentos(sql, params):
+    """(sql traducida, lista de argumentos) para pasarle a asyncpg."""
+    traducida, nombres = a_asyncpg(sql)
+    if params is None:
+        return traducida, []
+    if nombres is None:
+        return traducida, list(params)
+    return traducida, [params[nombre] for nombre in nombres]
+
+
+async def abrir_pool():
+    global _pool
+    if _pool is None:
+        _pool = await asyncpg.create_pool(
+            min_size=ASYNC_CONFIG["min_size"], max_size=ASYNC_CONFIG["max_size"], **DB_CONFIG
+        )
+    return _pool
+
+
+async def cerrar_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def pool_stats():
+    if _pool is None:
+        return {}
+    return {
+        "max": _pool.get_max_size(),
+        "abiertas": _pool.get_size(),
+        "libres": _pool.get_idle_size(),
+    }
+
+
+@asynccontextmanager
+async def conexion():
+    """Presta una conexión del pool (esperando a lo sumo ASYNC_CONFIG['timeout'])."""
+    pool = await abrir_pool()
+    async with pool.acquire(timeout=ASYNC_CONFIG["timeout"]) as con:
+        yield con
+
+
+async def consultar(con, sql, params=None):
+    """Filas (asyncpg.Record) de una sentencia escrita con marcadores de psycopg2."""
+    return await con.fetch(*_con_args(sql, params))
+
+
+async def consultar_fila(con, sql, params=None):
+    return await con.fetchrow(*_con_args(sql, params))
+
+
+async def ejecutar(con, sql, params=None):
+    """Ejecuta sin traer filas. Retorna cuántas filas afectó."""
+    estado = await con.execute(*_con_args(sql, params))
+    # asyncpg retorna la etiqueta del comando, ej. "UPDATE 3"
+    return int(estado.rsplit(" ", 1)[-1]) if estado[-1:].isdigit() else 0
+
+
+def _con_args(sql, params):
+    traducida, args = argumentos(sql, params)
+    return (traducida, *args)
@@ -0,0 +1,271 @@
+"""
+Instrumentación opcional por request.
+
+Con INSTRUMENTACION_CONFIG['activa'] = True, init_instrumentacion(app):
+
+  - hace que los cursores de get_db_connection() midan cada sentencia
+    (tiempo, filas) agrupándola por su texto normalizado;
+  - cuenta por request las llamadas a get_db_connection(), los préstamos
+    reales del pool, las consultas, el tiempo en SQL, las filas y el tiempo
+    de render de templates;
+  - agrega todo por endpoint y lo expone en /metrics (formato de texto de
+    Prometheus), junto con el estado del pool y de los caches;
+  - manda al logger 'instrumentacion.lentas' las sentencias que superan
+    'lenta_ms', y agrega un encabezado Server-Timing a cada respuesta.
+
+En cursores con nombre (iterar_consulta) solo se mide el execute; el tiempo
+de ir trayendo las filas queda dentro del tiempo total del request.
+"""
+import logging
+import re
+import threading
+import time
+
+from flask import Response, before_render_template, g, has_request_context, request, template_rendered
+from psycopg2 import extensions
+
+import db
+from cache import cache_stats
+from config import INSTRUMENTACION_CONFIG
+
+log_lentas = logging.getLogger("instrumentacion.lentas")
+
+_RE_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_RE_PARAMS = re.compile(r"%\(\w+\)s|%s")
+_RE_NUMEROS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_ESPACIOS = re.compile(r"\s+")
+
+# Columnas de las métricas por endpoint, en el orden en que se guardan
+CAMPOS_REQUEST = ["segundos", "conexiones", "prestamos", "consultas", "sql_segundos", "filas", "render_segundos"]
+
+
+def normalizar_sql(sql):
+    """Texto de la sentencia sin literales ni parámetros y con los espacios colapsados."""
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", errors="replace")
+    elif not isinstance(sql, str):
+        sql = str(sql)
+    sql = _RE_CADENAS.sub("?", sql)
+    sql = _RE_PARAMS.sub("?", sql)
+    sql = _RE_NUMEROS.sub("?", sql)
+    return _RE_ESPACIOS.sub(" ", sql).strip().rstrip(";")
+
+
+class Metricas:
+    """Acumulados del proceso, por endpoint y por sentencia normalizada."""
+
+    def __init__(self, max_sentencias=500):
+        self.max_sentencias = max_sentencias
+        self._lock = threading.Lock()
+        self._requests = {}     # endpoint -> [n] + CAMPOS_REQUEST
+        self._sentencias = {}   # sql -> [llamadas, segundos, max_segundos, filas]
+        self.lentas = 0
+
+    def registrar_sentencia(self, sql, segundos, filas, lenta):
+        with self._lock:
+            if sql not in self._sentencias and len(self._sentencias) >= self.max_sentencias:
+                sql = "(otras)"
+            datos = self._sentencias.setdefault(sql, [0, 0.0, 0.0, 0])
+            datos[0] += 1
+            datos[1] += segundos
+            datos[2] = max(datos[2], segundos)
+            datos[3] += filas
+            if lenta:
+                self.lentas += 1
+
+    def registrar_request(self, endpoint, valores):
+        with self._lock:
+            datos = self._requests.setdefault(endpoint, [0] + [0] * len(CAMPOS_REQUEST))
+            datos[0] += 1
+            for i, campo in enumerate(CAMPOS_REQUEST, start=1):
+                datos[i] += valores[campo]
+
+    def exportar(self):
+        """Texto en el formato de exposición de Prometheus."""
+        with self._lock:
+            requests = {k: list(v) for k, v in self._requests.items()}
+            sentencias = {k: list(v) for k, v in self._sentencias.items()}
+            lentas = self.lentas
+
+        lineas = []
+
+        def metrica(nombre, tipo, ayuda, muestras):
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            for etiquetas, valor in muestras:
+                valor = f"{valor:.6f}" if isinstance(valor, float) else valor
+                lineas.append(f"{nombre}{_etiquetas(etiquetas)} {valor}")
+
+        por_endpoint = sorted(requests.items())
+        metrica("app_requests_total", "counter", "Requests atendidos.",
+                [({"endpoint": e}, d[0]) for e, d in por_endpoint])
+        ayudas = {
+            "segundos": ("app_request_seconds_total", "Tiempo total de los requests."),
+            "conexiones": ("app_request_db_connections_total", "Llamadas a get_db_connection()."),
+            "prestamos": ("app_request_pool_checkouts_total", "Conexiones realmente prestadas por el pool."),
+            "consultas": ("app_request_queries_total", "Sentencias SQL ejecutadas."),
+            "sql_segundos": ("app_request_sql_seconds_total", "Tiempo ejecutando SQL."),
+            "filas": ("app_request_rows_total", "Filas devueltas o afectadas."),
+            "render_segundos": ("app_request_render_seconds_total", "Tiempo de render de templates."),
+        }
+        for i, campo in enumerate(CAMPOS_REQUEST, start=1):
+            nombre, ayuda = ayudas[campo]
+            metrica(nombre, "counter", ayuda, [({"endpoint": e}, d[i]) for e, d in por_endpoint])
+
+        por_sql = sorted(sentencias.items())
+        metrica("app_sql_calls_total", "counter", "Ejecuciones por sentencia normalizada.",
+                [({"sql": s}, d[0]) for s, d in por_sql])
+        metrica("app_sql_seconds_total", "counter", "Tiempo por sentencia normalizada.",
+                [({"sql": s}, d[1]) for s, d in por_sql])
+        metrica("app_sql_max_seconds", "gauge", "Ejecución más lenta por sentencia normalizada.",
+                [({"sql": s}, d[2]) for s, d in por_sql])
+        metrica("app_sql_rows_total", "counter", "Filas por sentencia normalizada.",
+                [({"sql": s}, d[3]) for s, d in por_sql])
+        metrica("app_sql_slow_total", "counter", "Sentencias por encima de lenta_ms.", [({}, lentas)])
+
+        pool = db.pool_stats()
+        for clave in ("abiertas", "en_uso", "libres"):
+            metrica(f"app_pool_{clave}", "gauge", f"Conexiones {clave.replace('_', ' ')} en el pool.", [({}, pool[clave])])
+        metrica("app_pool_checkouts_total", "counter", "Préstamos del pool.", [({}, pool["prestamos"])])
+        metrica("app_pool_waits_total", "counter", "Préstamos que tuvieron que esperar.", [({}, pool["esperas"])])
+        metrica("app_pool_wait_seconds_total", "counter", "Tiempo total esperando una conexión.",
+                [({}, pool["espera_total_ms"] / 1000)])
+
+        caches = sorted(cache_stats().items())
+        for clave in ("hits", "misses", "invalidaciones"):
+            metrica(f"app_cache_{clave}_total", "counter", f"Cache: {clave}.",
+                    [({"cache": nombre}, datos[clave]) for nombre, datos in caches])
+
+        return "\n".join(lineas) + "\n"
+
+
+def _etiquetas(etiquetas):
+    if not etiquetas:
+        return ""
+    partes = []
+    for clave, valor in etiquetas.items():
+        valor = str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        partes.append(f'{clave}="{valor}"')
+    return "{" + ",".join(partes) + "}"
+
+
+metricas = Metricas(INSTRUMENTACION_CONFIG["max_sentencias"])
+
+
+# =========================
+#    CURSOR Y CONEXIONES
+# =========================
+
+def _registrar(query, segundos, filas):
+    sql = normalizar_sql(query)
+    filas = max(filas, 0)
+    lenta = segundos * 1000 >= INSTRUMENTACION_CONFIG["lenta_ms"]
+    metricas.registrar_sentencia(sql, segundos, filas, lenta)
+
+    endpoint = None
+    if has_request_context():
+        endpoint = request.endpoint
+        datos = g.get("_instrumentacion")
+        if datos is not None:
+            datos["consultas"] += 1
+            datos["sql_segundos"] += segundos
+            datos["filas"] += filas
+    if lenta:
+        log_lentas.warning("%.1f ms [%s] %s", segundos * 1000, endpoint or "-", sql)
+
+
+class CursorInstrumentado(extensions.cursor):
+    """Cursor psycopg2 que mide cada sentencia."""
+
+    def execute(self, query, vars=None):
+        inicio = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            _registrar(query, time.perf_counter() - inicio, self.rowcount)
+
+    def executemany(self, query, vars_list):
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            _registrar(query, time.perf_counter() - inicio, self.rowcount)
+
+    def copy_expert(self, sql, file, size=8192):
+        inicio = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            _registrar(sql, time.perf_counter() - inicio, self.rowcount)
+
+
+def _conexion_pedida(nueva):
+    if has_request_context():
+        datos = g.get("_instrumentacion")
+        if datos is not None:
+            datos["conexiones"] += 1
+            datos["prestamos"] += nueva
+
+
+# =========================
+#      HOOKS DE FLASK
+# =========================
+
+def _iniciar_request():
+    g._instrumentacion = dict.fromkeys(CAMPOS_REQUEST, 0)
+    g._instrumentacion["segundos"] = time.perf_counter()
+
+
+def _server_timing(response):
+    datos = g.get("_instrumentacion")
+    if datos is not None:
+        response.headers["Server-Timing"] = (
+            f'db;dur={datos["sql_segundos"] * 1000:.1f};desc="{datos["consultas"]} consultas", '
+            f'tpl;dur={datos["render_segundos"] * 1000:.1f}'
+        )
+    return response
+
+
+def _cerrar_request(exc=None):
+    datos = g.pop("_instrumentacion", None)
+    if datos is None:
+        return
+    datos["segundos"] = time.perf_counter() - datos["segundos"]
+    metricas.registrar_request(request.endpoint or "(sin ruta)", datos)
+
+
+def _antes_de_render(sender, template, context, **extra):
+    g._inicio_render = time.perf_counter()
+
+
+def _despues_de_render(sender, template, context, **extra):
+    inicio = g.pop("_inicio_render", None)
+    datos = g.get("_instrumentacion")
+    if inicio is not None and datos is not None:
+        datos["render_segundos"] += time.perf_counter() - inicio
+
+
+def _vista_metrics():
+    return Response(metricas.exportar(), mimetype="text/plain; version=0.0.4")
+
+
+def init_instrumentacion(app):
+    """Activa la instrumentación en la app si la configuración lo pide. Retorna si quedó activa."""
+    if not INSTRUMENTACION_CONFIG["activa"]:
+        return False
+
+    archivo = INSTRUMENTACION_CONFIG["log_lentas"]
+    if archivo and not log_lentas.handlers:
+        handler = logging.FileHandler(archivo, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        log_lentas.addHandler(handler)
+
+    db.instrumentar(CursorInstrumentado, _conexion_pedida)
+    app.before_request(_iniciar_request)
+    app.after_request(_server_timing)
+    app.teardown_request(_cerrar_request)
+    before_render_template.connect(_antes_de_render, app)
+    template_rendered.connect(_despues_de_render, app)
+    app.add_url_rule("/metrics", "metrics", _vista_metrics)
+    app.extensions["instrumentacion"] = metricas
+    return True
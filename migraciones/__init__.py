@@ -0,0 +1,127 @@
+"""
+Migraciones versionadas del esquema.
+
+Cada módulo vNNNN_nombre.py de este paquete define:
+    DESCRIPCION  texto corto
+    subir(cur)   aplica el cambio
+    bajar(cur)   lo revierte
+
+Las versiones aplicadas se guardan en la tabla schema_migrations. Cada
+migración corre en su propia transacción junto con su registro, así que o
+queda aplicada completa o no queda.
+
+Uso:
+    python -m migraciones estado
+    python -m migraciones aplicar [version]    # hasta la última o hasta version
+    python -m migraciones revertir [version]   # la última, o todas las > version
+    python -m migraciones verificar            # EXPLAIN de las consultas calientes
+"""
+import importlib
+import pkgutil
+
+from db import get_db_connection
+
+# Clave fija para pg_advisory_xact_lock: evita dos procesos migrando a la vez
+LOCK_MIGRACIONES = 734001
+
+DDL_REGISTRO = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version     INTEGER PRIMARY KEY,
+    nombre      TEXT NOT NULL,
+    aplicada_en TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+
+def listar_migraciones():
+    """Retorna [(version, nombre, modulo)] ordenadas por versión."""
+    migraciones = []
+    for info in pkgutil.iter_modules(__path__):
+        if not info.name.startswith("v") or "_" not in info.name:
+            continue
+        numero = info.name[1:].split("_", 1)[0]
+        if not numero.isdigit():
+            continue
+        modulo = importlib.import_module(f"{__name__}.{info.name}")
+        migraciones.append((int(numero), info.name, modulo))
+    return sorted(migraciones, key=lambda m: m[0])
+
+
+def versiones_aplicadas(cur):
+    cur.execute(DDL_REGISTRO)
+    cur.execute("SELECT version FROM schema_migrations ORDER BY version")
+    return [row[0] for row in cur.fetchall()]
+
+
+def estado():
+    """Retorna [(version, nombre, aplicada)]."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    aplicadas = set(versiones_aplicadas(cur))
+    conn.commit()
+    cur.close()
+    conn.close()
+    return [(version, nombre, version in aplicadas) for version, nombre, _ in listar_migraciones()]
+
+
+def aplicar(hasta=None):
+    """Aplica en orden las migraciones pendientes. Retorna los nombres aplicados."""
+    aplicadas_ahora = []
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        for version, nombre, modulo in listar_migraciones():
+            if hasta is not None and version > hasta:
+                break
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (LOCK_MIGRACIONES,))
+            if version in versiones_aplicadas(cur):
+                conn.commit()
+                continue
+            modulo.subir(cur)
+            cur.execute(
+                "INSERT INTO schema_migrations (version, nombre) VALUES (%s, %s)",
+                (version, nombre)
+            )
+            conn.commit()
+            aplicadas_ahora.append(nombre)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+    return aplicadas_ahora
+
+
+def revertir(hasta=None):
+    """
+    Revierte migraciones aplicadas, de la más nueva a la más vieja.
+    Sin `hasta` revierte solo la última; con `hasta` deja aplicadas las <= hasta.
+    Retorna los nombres revertidos.
+    """
+    revertidas = []
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (LOCK_MIGRACIONES,))
+        aplicadas = set(versiones_aplicadas(cur))
+        conn.commit()
+        for version, nombre, modulo in reversed(listar_migraciones()):
+            if version not in aplicadas:
+                continue
+            if hasta is None and revertidas:
+                break
+            if hasta is not None and version <= hasta:
+                break
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (LOCK_MIGRACIONES,))
+            modulo.bajar(cur)
+            cur.execute("DELETE FROM schema_migrations WHERE version = %s", (version,))
+            conn.commit()
+            revertidas.append(nombre)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+    return revertidas
@@ -0,0 +1,42 @@
+import sys
+
+from migraciones import aplicar, estado, revertir
+from migraciones.verificar import verificar_indices
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    comando = argv[0] if argv else "estado"
+    version = int(argv[1]) if len(argv) > 1 else None
+
+    if comando == "estado":
+        for numero, nombre, aplicada in estado():
+            print(f"[{'x' if aplicada else ' '}] {nombre}")
+    elif comando == "aplicar":
+        nombres = aplicar(version)
+        for nombre in nombres:
+            print(f"aplicada: {nombre}")
+        if not nombres:
+            print("Nada que aplicar.")
+    elif comando == "revertir":
+        nombres = revertir(version)
+        for nombre in nombres:
+            print(f"revertida: {nombre}")
+        if not nombres:
+            print("Nada que revertir.")
+    elif comando == "verificar":
+        fallos = 0
+        for descripcion, indice_esperado, usados in verificar_indices():
+            ok = indice_esperado in usados
+            fallos += not ok
+            print(f"[{'ok' if ok else 'FALLO'}] {descripcion}: espera {indice_esperado}, usa {usados or 'ningún índice'}")
+        return 1 if fallos else 0
+    else:
+        from migraciones import __doc__ as ayuda
+        print(ayuda)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+DESCRIPCION = "Tablas dolls, clientes y cartas"
+
+# IF NOT EXISTS para adoptar bases que ya tenían las tablas creadas a mano.
+# Las consultas nombran sus columnas (ver modelos.py): el orden acá no importa.
+
+
+def subir(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS dolls (
+            id                SERIAL PRIMARY KEY,
+            nombre            VARCHAR(100) NOT NULL,
+            edad              INTEGER,
+            estado            VARCHAR(20) NOT NULL DEFAULT 'inactivo'
+                              CHECK (estado IN ('activo', 'inactivo')),
+            ciudad            VARCHAR(100),
+            descripcion       TEXT,
+            cartas_en_proceso INTEGER DEFAULT 0
+        );
+
+        CREATE TABLE IF NOT EXISTS clientes (
+            id       SERIAL PRIMARY KEY,
+            nombre   VARCHAR(100) NOT NULL,
+            ciudad   VARCHAR(100),
+            motivo   TEXT,
+            contacto VARCHAR(150)
+        );
+
+        CREATE TABLE IF NOT EXISTS cartas (
+            id         SERIAL PRIMARY KEY,
+            cliente_id INTEGER REFERENCES clientes(id) ON DELETE CASCADE,
+            doll_id    INTEGER REFERENCES dolls(id) ON DELETE SET NULL,
+            fecha      DATE NOT NULL DEFAULT CURRENT_DATE,
+            estado     VARCHAR(20) NOT NULL DEFAULT 'borrador'
+                       CHECK (estado IN ('en espera', 'borrador', 'revisado', 'enviado')),
+            contenido  TEXT NOT NULL DEFAULT ''
+        );
+    """)
+
+
+def bajar(cur):
+    cur.execute("DROP TABLE IF EXISTS cartas, clientes, dolls")
@@ -0,0 +1,27 @@
+DESCRIPCION = "Índices de las consultas calientes sobre cartas y dolls"
+
+
+def subir(cur):
+    cur.execute("""
+        -- contar_cartas_en_estado, generar_reporte_doll, liberar_cartas_de_doll
+        CREATE INDEX IF NOT EXISTS idx_cartas_doll_estado ON cartas (doll_id, estado);
+
+        -- borrar/listar cartas de un cliente (y el ON DELETE CASCADE)
+        CREATE INDEX IF NOT EXISTS idx_cartas_cliente ON cartas (cliente_id);
+
+        -- cola FIFO de cartas en espera (reasignar / rebalancear)
+        CREATE INDEX IF NOT EXISTS idx_cartas_en_espera ON cartas (id)
+            WHERE estado = 'en espera' AND doll_id IS NULL;
+
+        -- get_dolls_activas, asignación de cartas
+        CREATE INDEX IF NOT EXISTS idx_dolls_estado ON dolls (estado);
+    """)
+
+
+def bajar(cur):
+    cur.execute("""
+        DROP INDEX IF EXISTS idx_cartas_doll_estado;
+        DROP INDEX IF EXISTS idx_cartas_cliente;
+        DROP INDEX IF EXISTS idx_cartas_en_espera;
+        DROP INDEX IF EXISTS idx_dolls_estado;
+    """)
@@ -0,0 +1,97 @@
+DESCRIPCION = "Contadores de cartas por doll (tabla + triggers)"
+
+
+def subir(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS contadores_dolls (
+            doll_id  INTEGER PRIMARY KEY REFERENCES dolls(id) ON DELETE CASCADE,
+            total    INTEGER NOT NULL DEFAULT 0,
+            borrador INTEGER NOT NULL DEFAULT 0,
+            revisado INTEGER NOT NULL DEFAULT 0,
+            enviado  INTEGER NOT NULL DEFAULT 0
+        );
+
+        CREATE OR REPLACE FUNCTION actualizar_contadores_doll() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE'
+               AND OLD.doll_id IS NOT DISTINCT FROM NEW.doll_id
+               AND OLD.estado IS NOT DISTINCT FROM NEW.estado THEN
+                RETURN NULL;
+            END IF;
+
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.doll_id IS NOT NULL THEN
+                UPDATE contadores_dolls
+                SET total    = total - 1,
+                    borrador = borrador - (OLD.estado = 'borrador')::int,
+                    revisado = revisado - (OLD.estado = 'revisado')::int,
+                    enviado  = enviado  - (OLD.estado = 'enviado')::int
+                WHERE doll_id = OLD.doll_id;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.doll_id IS NOT NULL THEN
+                INSERT INTO contadores_dolls (doll_id, total, borrador, revisado, enviado)
+                VALUES (NEW.doll_id, 1,
+                        (NEW.estado = 'borrador')::int,
+                        (NEW.estado = 'revisado')::int,
+                        (NEW.estado = 'enviado')::int)
+                ON CONFLICT (doll_id) DO UPDATE
+                SET total    = contadores_dolls.total + 1,
+                    borrador = contadores_dolls.borrador + EXCLUDED.borrador,
+                    revisado = contadores_dolls.revisado + EXCLUDED.revisado,
+                    enviado  = contadores_dolls.enviado  + EXCLUDED.enviado;
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS trg_contadores_dolls ON cartas;
+        CREATE TRIGGER trg_contadores_dolls
+        AFTER INSERT OR DELETE OR UPDATE OF doll_id, estado ON cartas
+        FOR EACH ROW EXECUTE FUNCTION actualizar_contadores_doll();
+
+        -- Cada doll tiene su fila de contador desde que se crea: la asignación
+        -- de cartas bloquea esa fila para no pasarse del cupo.
+        CREATE OR REPLACE FUNCTION crear_contador_doll() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO contadores_dolls (doll_id) VALUES (NEW.id) ON CONFLICT DO NOTHING;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS trg_contador_nueva_doll ON dolls;
+        CREATE TRIGGER trg_contador_nueva_doll
+        AFTER INSERT ON dolls
+        FOR EACH ROW EXECUTE FUNCTION crear_contador_doll();
+
+        -- Carga inicial desde las cartas existentes (mismo cálculo que
+        -- contadores_services.reconstruir_contadores, copiado acá para que la
+        -- migración no cambie si cambia el servicio)
+        LOCK TABLE cartas IN SHARE MODE;
+        DELETE FROM contadores_dolls;
+        INSERT INTO contadores_dolls (doll_id, total, borrador, revisado, enviado)
+        SELECT d.id,
+               COALESCE(r.total, 0), COALESCE(r.borrador, 0),
+               COALESCE(r.revisado, 0), COALESCE(r.enviado, 0)
+        FROM dolls d
+        LEFT JOIN (
+            SELECT doll_id,
+                   COUNT(*) AS total,
+                   COUNT(*) FILTER (WHERE estado = 'borrador') AS borrador,
+                   COUNT(*) FILTER (WHERE estado = 'revisado') AS revisado,
+                   COUNT(*) FILTER (WHERE estado = 'enviado') AS enviado
+            FROM cartas
+            WHERE doll_id IS NOT NULL
+            GROUP BY doll_id
+        ) r ON r.doll_id = d.id;
+    """)
+
+
+def bajar(cur):
+    cur.execute("""
+        DROP TRIGGER IF EXISTS trg_contador_nueva_doll ON dolls;
+        DROP TRIGGER IF EXISTS trg_contadores_dolls ON cartas;
+        DROP FUNCTION IF EXISTS crear_contador_doll();
+        DROP FUNCTION IF EXISTS actualizar_contadores_doll();
+        DROP TABLE IF EXISTS contadores_dolls;
+    """)
@@ -0,0 +1,19 @@
+DESCRIPCION = "Índices de trigramas para la búsqueda de clientes"
+
+
+def subir(cur):
+    cur.execute("""
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS idx_clientes_nombre_trgm ON clientes USING gin (nombre gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_clientes_ciudad_trgm ON clientes USING gin (ciudad gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_clientes_motivo_trgm ON clientes USING gin (motivo gin_trgm_ops);
+    """)
+
+
+def bajar(cur):
+    # La extensión se deja: otras bases/consultas pueden depender de ella
+    cur.execute("""
+        DROP INDEX IF EXISTS idx_clientes_nombre_trgm;
+        DROP INDEX IF EXISTS idx_clientes_ciudad_trgm;
+        DROP INDEX IF EXISTS idx_clientes_motivo_trgm;
+    """)
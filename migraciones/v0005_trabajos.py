@@ -0,0 +1,33 @@
+DESCRIPCION = "Cola de trabajos en segundo plano"
+
+
+def subir(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS trabajos (
+            id            BIGSERIAL PRIMARY KEY,
+            tipo          VARCHAR(50) NOT NULL,
+            payload       JSONB NOT NULL DEFAULT '{}',
+            estado        VARCHAR(20) NOT NULL DEFAULT 'pendiente'
+                          CHECK (estado IN ('pendiente', 'en_proceso', 'hecho', 'fallido')),
+            intentos      INTEGER NOT NULL DEFAULT 0,
+            max_intentos  INTEGER NOT NULL DEFAULT 5,
+            disponible_en TIMESTAMPTZ NOT NULL DEFAULT now(),
+            tomado_en     TIMESTAMPTZ,
+            tomado_por    VARCHAR(100),
+            ultimo_error  TEXT,
+            creado_en     TIMESTAMPTZ NOT NULL DEFAULT now(),
+            terminado_en  TIMESTAMPTZ
+        );
+
+        -- Lo que busca el worker: pendientes ya disponibles, en orden
+        CREATE INDEX IF NOT EXISTS idx_trabajos_pendientes ON trabajos (disponible_en, id)
+            WHERE estado = 'pendiente';
+
+        -- Trabajos tomados por un worker que pudo haberse caído
+        CREATE INDEX IF NOT EXISTS idx_trabajos_en_proceso ON trabajos (tomado_en)
+            WHERE estado = 'en_proceso';
+    """)
+
+
+def bajar(cur):
+    cur.execute("DROP TABLE IF EXISTS trabajos")
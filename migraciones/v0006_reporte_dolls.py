@@ -0,0 +1,60 @@
+DESCRIPCION = "Reporte por doll materializado (refresco concurrente)"
+
+
+def subir(cur):
+    cur.execute("""
+        -- Métricas por doll calculadas sobre cartas. Se leen unidas a dolls
+        -- (nombre y estado al día); solo los conteos pueden estar atrasados
+        -- hasta el próximo refresco.
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_reporte_dolls AS
+        SELECT doll_id,
+               COUNT(*) AS total_cartas,
+               COUNT(*) FILTER (WHERE estado = 'borrador') AS cartas_borrador,
+               COUNT(*) FILTER (WHERE estado = 'revisado') AS cartas_en_proceso,
+               COUNT(*) FILTER (WHERE estado = 'enviado') AS enviadas,
+               COUNT(DISTINCT cliente_id) AS clientes_unicos
+        FROM cartas
+        WHERE doll_id IS NOT NULL
+        GROUP BY doll_id;
+
+        -- REFRESH ... CONCURRENTLY necesita un índice único
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_reporte_dolls ON mv_reporte_dolls (doll_id);
+
+        -- Cuándo se refrescó cada vista materializada y cuánto tardó
+        CREATE TABLE IF NOT EXISTS refrescos_reportes (
+            vista          VARCHAR(63) PRIMARY KEY,
+            actualizado_en TIMESTAMPTZ NOT NULL,
+            duracion_ms    NUMERIC(10, 1)
+        );
+        INSERT INTO refrescos_reportes (vista, actualizado_en)
+        VALUES ('mv_reporte_dolls', now())
+        ON CONFLICT (vista) DO UPDATE SET actualizado_en = EXCLUDED.actualizado_en;
+
+        -- Nombres que usaba el database.py viejo, ahora sobre la vista materializada
+        CREATE OR REPLACE VIEW v_reporte_doll AS
+        SELECT d.id, d.nombre, d.estado,
+               COALESCE(m.cartas_en_proceso, 0) AS cartas_en_proceso,
+               COALESCE(m.total_cartas, 0) AS total_cartas,
+               COALESCE(m.enviadas, 0) AS enviadas,
+               COALESCE(m.clientes_unicos, 0) AS clientes_unicos
+        FROM dolls d
+        LEFT JOIN mv_reporte_dolls m ON m.doll_id = d.id;
+
+        CREATE OR REPLACE VIEW reportes_dolls AS
+        SELECT d.id AS doll_id, d.nombre AS doll_nombre,
+               COALESCE(m.total_cartas, 0) AS total_cartas,
+               COALESCE(m.cartas_borrador, 0) AS cartas_borrador,
+               COALESCE(m.cartas_en_proceso, 0) AS cartas_revisado,
+               COALESCE(m.enviadas, 0) AS cartas_enviado
+        FROM dolls d
+        LEFT JOIN mv_reporte_dolls m ON m.doll_id = d.id;
+    """)
+
+
+def bajar(cur):
+    cur.execute("""
+        DROP VIEW IF EXISTS reportes_dolls;
+        DROP VIEW IF EXISTS v_reporte_doll;
+        DROP TABLE IF EXISTS refrescos_reportes;
+        DROP MATERIALIZED VIEW IF EXISTS mv_reporte_dolls;
+    """)
@@ -0,0 +1,85 @@
+DESCRIPCION = "Contenido de cartas aparte (cartas_contenido), con vista previa y compresión"
+
+# Filas de cartas_contenido más largas que esto (bytes) se comprimen (TOAST).
+# El mínimo que acepta Postgres es 128; el default (~2 KB) casi nunca comprime cartas.
+UMBRAL_COMPRESION = 256
+
+
+def subir(cur):
+    cur.execute("""
+        -- El cuerpo de la carta vive acá y solo se lee en el editor. La FK es
+        -- diferida porque el trigger escribe el cuerpo antes de que exista la
+        -- fila de cartas (BEFORE INSERT).
+        CREATE TABLE IF NOT EXISTS cartas_contenido (
+            carta_id  INTEGER PRIMARY KEY
+                      REFERENCES cartas(id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+            contenido TEXT NOT NULL
+        );
+        ALTER TABLE cartas_contenido SET (toast_tuple_target = %(umbral)s);
+
+        -- lz4 comprime y descomprime más rápido que pglz, si el servidor lo trae
+        DO $$
+        BEGIN
+            ALTER TABLE cartas_contenido ALTER COLUMN contenido SET COMPRESSION lz4;
+        EXCEPTION WHEN feature_not_supported THEN
+            NULL;
+        END;
+        $$;
+
+        -- Lo que necesitan los listados, sin tocar el cuerpo
+        ALTER TABLE cartas
+            ADD COLUMN IF NOT EXISTS contenido_preview VARCHAR(50) NOT NULL DEFAULT '',
+            ADD COLUMN IF NOT EXISTS contenido_largo   INTEGER NOT NULL DEFAULT 0,
+            ALTER COLUMN contenido DROP NOT NULL;
+
+        -- Backfill: los cuerpos existentes pasan a cartas_contenido
+        INSERT INTO cartas_contenido (carta_id, contenido)
+        SELECT id, contenido FROM cartas WHERE contenido IS NOT NULL
+        ON CONFLICT (carta_id) DO NOTHING;
+        UPDATE cartas
+        SET contenido_preview = LEFT(contenido, 50),
+            contenido_largo   = char_length(contenido),
+            contenido         = NULL
+        WHERE contenido IS NOT NULL;
+
+        -- cartas.contenido queda solo para escribir: lo que llegue (INSERT,
+        -- UPDATE, COPY) se guarda en cartas_contenido, se recalculan la vista
+        -- previa y el largo, y la columna vuelve a NULL. Un UPDATE con
+        -- contenido NULL deja el cuerpo como estaba.
+        CREATE OR REPLACE FUNCTION guardar_contenido_carta() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.contenido IS NULL THEN
+                RETURN NEW;
+            END IF;
+            INSERT INTO cartas_contenido (carta_id, contenido)
+            VALUES (NEW.id, NEW.contenido)
+            ON CONFLICT (carta_id) DO UPDATE SET contenido = EXCLUDED.contenido;
+            NEW.contenido_preview := LEFT(NEW.contenido, 50);
+            NEW.contenido_largo := char_length(NEW.contenido);
+            NEW.contenido := NULL;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS trg_contenido_carta ON cartas;
+        CREATE TRIGGER trg_contenido_carta
+        BEFORE INSERT OR UPDATE OF contenido ON cartas
+        FOR EACH ROW EXECUTE FUNCTION guardar_contenido_carta();
+    """, {"umbral": UMBRAL_COMPRESION})
+
+
+def bajar(cur):
+    cur.execute("""
+        DROP TRIGGER IF EXISTS trg_contenido_carta ON cartas;
+        DROP FUNCTION IF EXISTS guardar_contenido_carta();
+        UPDATE cartas c
+        SET contenido = cc.contenido
+        FROM cartas_contenido cc
+        WHERE cc.carta_id = c.id;
+        UPDATE cartas SET contenido = '' WHERE contenido IS NULL;
+        ALTER TABLE cartas
+            ALTER COLUMN contenido SET NOT NULL,
+            DROP COLUMN IF EXISTS contenido_preview,
+            DROP COLUMN IF EXISTS contenido_largo;
+        DROP TABLE IF EXISTS cartas_contenido;
+    """)
@@ -0,0 +1,92 @@
+DESCRIPCION = "Log de eventos de cartas y dolls (triggers + NOTIFY)"
+
+# Canal del NOTIFY; eventos_services.CANAL_EVENTOS debe coincidir. Se copia
+# en lugar de importarlo para que la migración no cambie con el servicio.
+CANAL_EVENTOS = "eventos"
+
+
+def subir(cur):
+    cur.execute("""
+        -- Solo se agregan filas (purgar_eventos borra las viejas). xid es la
+        -- transacción que escribió el evento: los suscriptores avanzan por
+        -- (xid, id) y solo leen transacciones ya terminadas, así no se saltean
+        -- eventos de una transacción que confirma después de otra más nueva.
+        CREATE TABLE IF NOT EXISTS eventos (
+            id        BIGSERIAL PRIMARY KEY,
+            xid       BIGINT NOT NULL DEFAULT pg_current_xact_id()::text::bigint,
+            creado_en TIMESTAMPTZ NOT NULL DEFAULT now(),
+            tabla     VARCHAR(20) NOT NULL,
+            fila_id   INTEGER NOT NULL,
+            operacion VARCHAR(6) NOT NULL CHECK (operacion IN ('INSERT', 'UPDATE', 'DELETE')),
+            antes     JSONB,
+            despues   JSONB
+        );
+        CREATE INDEX IF NOT EXISTS idx_eventos_posicion ON eventos (xid, id);
+        CREATE INDEX IF NOT EXISTS idx_eventos_creado_en ON eventos (creado_en);
+
+        -- antes/despues guardan solo las columnas que se siguen de cada tabla
+        -- (armar el JSON de la fila entera y filtrarlo duplica el costo). Los
+        -- avisos con el mismo texto se juntan en uno por transacción, así que
+        -- un UPDATE de mil cartas hace un solo NOTIFY.
+        CREATE OR REPLACE FUNCTION registrar_evento() RETURNS trigger AS $$
+        DECLARE
+            antes   JSONB;
+            despues JSONB;
+        BEGIN
+            IF TG_TABLE_NAME = 'cartas' THEN
+                IF TG_OP <> 'INSERT' THEN
+                    antes := jsonb_build_object('estado', OLD.estado, 'doll_id', OLD.doll_id);
+                END IF;
+                IF TG_OP <> 'DELETE' THEN
+                    despues := jsonb_build_object('estado', NEW.estado, 'doll_id', NEW.doll_id);
+                END IF;
+            ELSE
+                IF TG_OP <> 'INSERT' THEN
+                    antes := jsonb_build_object('estado', OLD.estado);
+                END IF;
+                IF TG_OP <> 'DELETE' THEN
+                    despues := jsonb_build_object('estado', NEW.estado);
+                END IF;
+            END IF;
+            INSERT INTO eventos (tabla, fila_id, operacion, antes, despues)
+            VALUES (TG_TABLE_NAME, COALESCE(NEW.id, OLD.id), TG_OP, antes, despues);
+            PERFORM pg_notify(%(canal)s, TG_TABLE_NAME);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS trg_eventos_cartas ON cartas;
+        CREATE TRIGGER trg_eventos_cartas
+        AFTER INSERT OR DELETE ON cartas
+        FOR EACH ROW EXECUTE FUNCTION registrar_evento();
+
+        DROP TRIGGER IF EXISTS trg_eventos_cartas_cambio ON cartas;
+        CREATE TRIGGER trg_eventos_cartas_cambio
+        AFTER UPDATE OF estado, doll_id ON cartas
+        FOR EACH ROW
+        WHEN (OLD.estado IS DISTINCT FROM NEW.estado OR OLD.doll_id IS DISTINCT FROM NEW.doll_id)
+        EXECUTE FUNCTION registrar_evento();
+
+        DROP TRIGGER IF EXISTS trg_eventos_dolls ON dolls;
+        CREATE TRIGGER trg_eventos_dolls
+        AFTER INSERT OR DELETE ON dolls
+        FOR EACH ROW EXECUTE FUNCTION registrar_evento();
+
+        DROP TRIGGER IF EXISTS trg_eventos_dolls_cambio ON dolls;
+        CREATE TRIGGER trg_eventos_dolls_cambio
+        AFTER UPDATE OF estado ON dolls
+        FOR EACH ROW
+        WHEN (OLD.estado IS DISTINCT FROM NEW.estado)
+        EXECUTE FUNCTION registrar_evento();
+    """, {"canal": CANAL_EVENTOS})
+
+
+def bajar(cur):
+    cur.execute("""
+        DROP TRIGGER IF EXISTS trg_eventos_dolls_cambio ON dolls;
+        DROP TRIGGER IF EXISTS trg_eventos_dolls ON dolls;
+        DROP TRIGGER IF EXISTS trg_eventos_cartas_cambio ON cartas;
+        DROP TRIGGER IF EXISTS trg_eventos_cartas ON cartas;
+        DROP FUNCTION IF EXISTS registrar_evento();
+        DROP TABLE IF EXISTS eventos;
+    """)
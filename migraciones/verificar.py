@@ -0,0 +1,52 @@
+"""
+Comprueba con EXPLAIN que las consultas calientes pueden usar sus índices.
+
+Con tablas chicas Postgres prefiere un Seq Scan aunque exista el índice, así
+que se desactiva enable_seqscan dentro de la transacción: lo que se verifica
+es que el índice sirve para la consulta, no la elección del planner con los
+datos actuales. Por eso cada consulta tiene que poder usar su índice aun con
+la tabla vacía; tests/test_indices.py falla si alguna deja de hacerlo.
+"""
+from db import get_db_connection
+
+# (descripción, índice esperado, consulta, parámetros)
+CONSULTAS_CALIENTES = [
+    ("contar_cartas_en_estado", "idx_cartas_doll_estado",
+     "SELECT COUNT(*) FROM cartas WHERE doll_id = %s AND estado = %s", (1, "borrador")),
+    ("liberar_cartas_de_doll", "idx_cartas_doll_estado",
+     "UPDATE cartas SET doll_id = NULL, estado = 'en espera' WHERE doll_id = %s", (1,)),
+    ("cola de cartas en espera (rebalanceo)", "idx_cartas_en_espera",
+     "SELECT id FROM cartas WHERE estado = 'en espera' AND doll_id IS NULL ORDER BY id ASC LIMIT %s", (5,)),
+    ("cartas de un cliente", "idx_cartas_cliente",
+     "SELECT id FROM cartas WHERE cliente_id = %s", (1,)),
+    ("get_dolls_activas", "idx_dolls_estado",
+     "SELECT id, nombre FROM dolls WHERE estado = 'activo'", ()),
+    ("buscar_clientes por nombre", "idx_clientes_nombre_trgm",
+     "SELECT id FROM clientes WHERE nombre ILIKE %s", ("%violet%",)),
+]
+
+
+def _indices_del_plan(nodo, encontrados):
+    if "Index Name" in nodo:
+        encontrados.append(nodo["Index Name"])
+    for hijo in nodo.get("Plans", []):
+        _indices_del_plan(hijo, encontrados)
+    return encontrados
+
+
+def verificar_indices():
+    """Retorna [(descripción, índice esperado, índices usados en el plan)]."""
+    resultados = []
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("SET LOCAL enable_seqscan = off")
+        for descripcion, indice, sql, params in CONSULTAS_CALIENTES:
+            cur.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cur.fetchone()[0][0]["Plan"]
+            resultados.append((descripcion, indice, _indices_del_plan(plan, [])))
+    finally:
+        conn.rollback()
+        cur.close()
+        conn.close()
+    return resultados
@@ -0,0 +1,108 @@
+"""
+Modelos de fila: una NamedTuple por forma de consulta.
+
+Cada fila es una tupla con nombres de columna: no lleva un dict por instancia
+como los {"id": ..., "nombre": ...} que se armaban antes, y sigue sirviendo
+por posición (fila[0]) para el código que todavía la desarma así. Los campos
+van en el mismo orden que el SELECT que los llena.
+
+    cur.execute("SELECT id, nombre, ciudad, motivo, contacto FROM clientes")
+    clientes = cargar(cur, Cliente)
+"""
+from datetime import date, datetime
+from typing import NamedTuple, Optional
+
+
+class Doll(NamedTuple):
+    """Fila de /dolls y del formulario de edición (cartas_en_proceso sale de contadores_dolls)."""
+    id: int
+    nombre: str
+    edad: Optional[int]
+    estado: str
+    cartas_en_proceso: int
+
+
+class DollActiva(NamedTuple):
+    """Doll activa con su cupo libre (cache de get_dolls_activas)."""
+    id: int
+    nombre: str
+    cupo: int
+
+
+class DollReporte(NamedTuple):
+    """Fila de /reporte_dolls: la doll y sus conteos de mv_reporte_dolls."""
+    id: int
+    nombre: str
+    edad: Optional[int]
+    estado: str
+    total_cartas: int
+    cartas_borrador: int
+    cartas_en_proceso: int
+    enviadas: int
+    clientes_unicos: int
+
+
+class Cliente(NamedTuple):
+    id: int
+    nombre: str
+    ciudad: Optional[str]
+    motivo: Optional[str]
+    contacto: Optional[str]
+
+
+class Carta(NamedTuple):
+    """Carta sin el cuerpo: el contenido completo solo lo carga el editor (CartaCompleta)."""
+    id: int
+    cliente_id: Optional[int]
+    doll_id: Optional[int]
+    fecha: date
+    estado: str
+    contenido_preview: str
+
+
+class CartaCompleta(NamedTuple):
+    """Carta con el contenido de cartas_contenido (formulario de edición)."""
+    id: int
+    cliente_id: Optional[int]
+    doll_id: Optional[int]
+    fecha: date
+    estado: str
+    contenido: str
+
+
+class CartaListado(NamedTuple):
+    """Fila de /cartas: nombres en lugar de ids y solo el inicio del contenido."""
+    id: int
+    cliente_nombre: str
+    doll_nombre: Optional[str]
+    fecha: date
+    estado: str
+    contenido_preview: str
+    contenido_truncado: bool
+
+
+class Evento(NamedTuple):
+    """Cambio registrado en eventos: antes/despues solo traen las columnas seguidas."""
+    id: int
+    xid: int
+    creado_en: datetime
+    tabla: str
+    fila_id: int
+    operacion: str
+    antes: Optional[dict]
+    despues: Optional[dict]
+
+
+def cargar(cur, modelo):
+    """
+    Las filas que quedan en `cur` como instancias de `modelo`. Recorre el
+    cursor en lugar de fetchall(): la tupla cruda de cada fila se libera al
+    armar la siguiente, así que no hay una segunda lista del tamaño del resultado.
+    """
+    return list(map(modelo._make, cur))
+
+
+def cargar_una(cur, modelo):
+    """La siguiente fila de `cur` como `modelo`, o None si no quedan."""
+    fila = cur.fetchone()
+    return None if fila is None else modelo._make(fila)
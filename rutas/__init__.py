@@ -0,0 +1 @@
+"""Blueprints de las páginas HTML, uno por dominio (ver app.crear_app)."""
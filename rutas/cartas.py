@@ -0,0 +1,139 @@
+"""Cartas: listado por keyset, listado completo en streaming, alta, edición y baja."""
+from flask import Blueprint, flash, redirect, render_template, request, stream_template, url_for
+
+from cache import tocar_tablas
+from cache_http import cachear_respuesta
+from db import get_db_connection, iterar_consulta
+from modelos import CartaCompleta, CartaListado, Cliente, cargar, cargar_una
+from services.cartas_services import crear_carta, editar_carta_completa
+from services.dolls_services import get_dolls_activas
+
+bp = Blueprint("cartas", __name__)
+
+# Solo para selects/etiquetas; la validación real está en cartas_services
+ESTADOS = ["en espera", "borrador", "revisado", "enviado"]
+
+CARTAS_POR_PAGINA = 50
+
+# El contenido completo no viaja: solo la vista previa guardada en cartas
+# (migración v0007_contenido_cartas) y si hay más. Columnas de modelos.CartaListado
+SQL_LISTADO_CARTAS = """
+    SELECT cartas.id,
+           clientes.nombre AS cliente_nombre,
+           dolls.nombre   AS doll_nombre,
+           cartas.fecha,
+           cartas.estado,
+           cartas.contenido_preview,
+           cartas.contenido_largo > 50 AS contenido_truncado
+    FROM cartas
+    JOIN clientes ON cartas.cliente_id = clientes.id
+    LEFT JOIN dolls ON cartas.doll_id = dolls.id
+"""
+
+
+@bp.route('/cartas')
+@cachear_respuesta("cartas", "clientes", "dolls")
+def listar_cartas():
+    # Paginación por keyset: ?after_id=<último id de la página anterior>
+    after_id = request.args.get('after_id', 0, type=int)
+    por_pagina = request.args.get('por_pagina', CARTAS_POR_PAGINA, type=int)
+    por_pagina = max(1, min(por_pagina, 500))
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(
+        SQL_LISTADO_CARTAS + " WHERE cartas.id > %s ORDER BY cartas.id ASC LIMIT %s;",
+        (after_id, por_pagina + 1)
+    )
+    cartas = cargar(cur, CartaListado)
+    cur.close()
+    conn.close()
+
+    siguiente = None
+    if len(cartas) > por_pagina:
+        cartas = cartas[:por_pagina]
+        siguiente = cartas[-1].id
+    return render_template('cartas.html', cartas=cartas, siguiente=siguiente,
+                           por_pagina=por_pagina, after_id=after_id)
+
+
+@bp.route('/cartas/todas')
+def listar_cartas_stream():
+    """
+    Todas las cartas en una sola página, renderizada a medida que se leen
+    (cursor con nombre en el servidor): la memoria no crece con la tabla.
+    """
+    cartas = iterar_consulta(SQL_LISTADO_CARTAS + " ORDER BY cartas.id ASC", nombre="listado_cartas",
+                             modelo=CartaListado)
+    return stream_template('cartas.html', cartas=cartas, streaming=True)
+
+
+@bp.route('/cartas/nuevo', methods=['GET', 'POST'])
+def nueva_carta():
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT id, nombre, ciudad, motivo, contacto FROM clientes;")
+    clientes = cargar(cur, Cliente)
+    cur.close()
+    conn.close()
+
+    if request.method == 'POST':
+        datos = {
+            "cliente_id": request.form['cliente_id'],
+            "contenido": request.form['contenido']
+        }
+        try:
+            crear_carta(datos)
+            flash("Carta creada (asignada si había Doll activa; si no, quedó en 'en espera').", "success")
+        except Exception as e:
+            flash(str(e), "warning")
+        return redirect(url_for('.listar_cartas'))
+
+    # Solo orientativo (cache): la Doll real se elige al guardar
+    con_cupo = [d for d in get_dolls_activas() if d.cupo > 0]
+    doll = max(con_cupo, key=lambda d: d.cupo) if con_cupo else None
+    return render_template('form_carta.html', clientes=clientes, doll=doll)
+
+
+@bp.route('/cartas/editar/<int:id>', methods=['GET', 'POST'])
+def editar_carta(id):
+    if request.method == 'POST':
+        try:
+            # Estado y contenido se guardan juntos o no se guarda nada
+            editar_carta_completa(id, request.form['estado'], request.form['contenido'])
+            flash("Carta actualizada", "info")
+        except Exception as e:
+            flash(str(e), "warning")
+        return redirect(url_for('.listar_cartas'))
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    # El único lugar que lee el cuerpo de la carta
+    cur.execute("""
+        SELECT c.id, c.cliente_id, c.doll_id, c.fecha, c.estado, COALESCE(cc.contenido, '')
+        FROM cartas c
+        LEFT JOIN cartas_contenido cc ON cc.carta_id = c.id
+        WHERE c.id = %s
+    """, (id,))
+    carta = cargar_una(cur, CartaCompleta)
+    cur.close()
+    conn.close()
+    return render_template('form_carta.html', carta=carta)
+
+
+@bp.route('/cartas/eliminar/<int:id>')
+def eliminar_carta(id):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT estado FROM cartas WHERE id=%s", (id,))
+    carta = cur.fetchone()
+    if carta and carta[0] in ('borrador', 'en espera'):
+        cur.execute("DELETE FROM cartas WHERE id=%s", (id,))
+        conn.commit()
+        tocar_tablas("cartas")
+        flash("Carta eliminada", "danger")
+    else:
+        flash("Solo se pueden eliminar cartas en 'borrador' o 'en espera'.", "warning")
+    cur.close()
+    conn.close()
+    return redirect(url_for('.listar_cartas'))
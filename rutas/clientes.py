@@ -0,0 +1,107 @@
+"""Clientes: búsqueda paginada, alta (con su carta en la cola), importación, edición y baja."""
+import io
+
+from flask import Blueprint, flash, redirect, render_template, request, url_for
+
+from cache import tocar_tablas
+from cache_http import cachear_respuesta
+from db import get_db_connection
+from modelos import Cliente, cargar_una
+from services.clientes_services import CLIENTES_POR_PAGINA, buscar_clientes
+from services.trabajos_services import encolar
+
+bp = Blueprint("clientes", __name__)
+
+
+@bp.route('/clientes')
+@cachear_respuesta("clientes")
+def listar_clientes():
+    q = request.args.get('q', '')
+    ciudad = request.args.get('ciudad', '')
+    motivo = request.args.get('motivo', '')
+    limite = max(1, min(request.args.get('limite', CLIENTES_POR_PAGINA, type=int), 500))
+    offset = max(0, request.args.get('offset', 0, type=int))
+    clientes, hay_mas = buscar_clientes(q, ciudad, motivo, limite, offset)
+    return render_template('clientes.html', clientes=clientes, hay_mas=hay_mas,
+                           limite=limite, offset=offset)
+
+
+@bp.route('/clientes/nuevo', methods=['GET', 'POST'])
+def nuevo_cliente():
+    if request.method == 'POST':
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO clientes (nombre, ciudad, motivo, contacto) VALUES (%s, %s, %s, %s) RETURNING id",
+            (request.form['nombre'], request.form['ciudad'], request.form['motivo'], request.form['contacto'])
+        )
+        cliente_id = cur.fetchone()[0]
+        # La carta la genera un worker; el trabajo se confirma junto con el cliente
+        encolar("crear_carta_cliente", {"cliente_id": cliente_id}, cur)
+        conn.commit()
+        cur.close()
+        conn.close()
+        tocar_tablas("clientes")
+
+        flash("Cliente creado. Su carta se generará en unos instantes (asignada o en espera).", "success")
+        return redirect(url_for('.listar_clientes'))
+    return render_template('form_cliente.html')
+
+
+@bp.route('/clientes/importar', methods=['GET', 'POST'])
+def importar_clientes_archivo():
+    if request.method == 'POST':
+        # Se carga recién acá: la importación (csv, COPY) se usa poco
+        from services.importacion_services import importar_clientes
+
+        archivo = request.files.get('archivo')
+        if not archivo or not archivo.filename:
+            flash("Seleccione un archivo CSV o JSONL.", "warning")
+            return redirect(url_for('.importar_clientes_archivo'))
+        formato = 'jsonl' if archivo.filename.lower().endswith('.jsonl') else 'csv'
+        try:
+            texto = io.TextIOWrapper(archivo.stream, encoding='utf-8-sig', newline='')
+            resumen = importar_clientes(texto, formato)
+            flash(f"{resumen['clientes']} clientes importados ({resumen['filas_por_seg']} filas/s): "
+                  f"{resumen['asignadas']} cartas asignadas, {resumen['en_espera']} en espera.", "success")
+        except Exception as e:
+            flash(f"No se importó nada: {e}", "danger")
+            return redirect(url_for('.importar_clientes_archivo'))
+        return redirect(url_for('.listar_clientes'))
+    return render_template('form_importar.html')
+
+
+@bp.route('/clientes/editar/<int:id>', methods=['GET', 'POST'])
+def editar_cliente(id):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    if request.method == 'POST':
+        cur.execute(
+            "UPDATE clientes SET nombre=%s, ciudad=%s, motivo=%s, contacto=%s WHERE id=%s",
+            (request.form['nombre'], request.form['ciudad'], request.form['motivo'], request.form['contacto'], id)
+        )
+        conn.commit()
+        cur.close()
+        conn.close()
+        tocar_tablas("clientes")
+        flash("Cliente actualizado", "info")
+        return redirect(url_for('.listar_clientes'))
+    cur.execute("SELECT id, nombre, ciudad, motivo, contacto FROM clientes WHERE id=%s", (id,))
+    cliente = cargar_una(cur, Cliente)
+    cur.close()
+    conn.close()
+    return render_template('form_cliente.html', cliente=cliente)
+
+
+@bp.route('/clientes/eliminar/<int:id>')
+def eliminar_cliente(id):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("DELETE FROM clientes WHERE id=%s", (id,))
+    conn.commit()
+    cur.close()
+    conn.close()
+    # Sus cartas se borran en cascada
+    tocar_tablas("clientes", "cartas")
+    flash("Cliente eliminado", "danger")
+    return redirect(url_for('.listar_clientes'))
@@ -0,0 +1,139 @@
+"""Dolls: listado, alta, edición (activar/desactivar con sus efectos) y baja."""
+import random
+
+from flask import Blueprint, flash, redirect, render_template, request, url_for
+
+from cache import tocar_tablas
+from cache_http import cachear_respuesta
+from db import get_db_connection
+from modelos import Doll, cargar, cargar_una
+from services.dolls_services import activar_doll, desactivar_doll, invalidar_dolls_activas, liberar_cartas_de_doll
+
+bp = Blueprint("dolls", __name__)
+
+# Columnas de modelos.Doll
+SQL_DOLLS = """
+    SELECT d.id, d.nombre, d.edad, d.estado,
+           COALESCE(k.revisado, 0) AS cartas_en_proceso
+    FROM dolls d
+    LEFT JOIN contadores_dolls k ON k.doll_id = d.id
+"""
+
+
+def completar_datos_doll(nombre=None, edad=None, estado=None):
+    if not nombre or nombre.strip() == "":
+        nombre = f"Doll_{random.randint(100,999)}"
+    if not edad or str(edad).strip() == "":
+        edad = random.randint(18, 40)
+    if not estado or estado.strip() == "":
+        estado = random.choice(["activo", "inactivo"])
+    return nombre, edad, estado
+
+
+@bp.route('/dolls')
+@cachear_respuesta("dolls", "cartas")
+def listar_dolls():
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(SQL_DOLLS + " ORDER BY d.id ASC;")
+    dolls = cargar(cur, Doll)
+    cur.close()
+    conn.close()
+    return render_template('dolls.html', dolls=dolls)
+
+
+@bp.route('/dolls/nuevo', methods=['GET', 'POST'])
+def nuevo_doll():
+    if request.method == 'POST':
+        nombre = request.form.get('nombre')
+        edad = request.form.get('edad')
+        estado = request.form.get('estado')
+        nombre, edad, estado = completar_datos_doll(nombre, edad, estado)
+
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO dolls (nombre, edad, estado) VALUES (%s, %s, %s) RETURNING id",
+            (nombre, edad, estado)
+        )
+        new_id = cur.fetchone()[0]
+        conn.commit()
+        cur.close()
+        conn.close()
+        tocar_tablas("dolls")
+
+        if estado == 'activo':
+            try:
+                reasignadas = activar_doll(new_id)
+                if reasignadas:
+                    flash(f"Doll creada y activada. Reasignadas {reasignadas} cartas en espera.", "success")
+                else:
+                    flash("Doll creada y activada. No había cartas en espera o ya tiene 5.", "info")
+            except Exception as e:
+                flash(f"Doll creada, pero falló la reasignación: {e}", "warning")
+        else:
+            flash("Doll creada correctamente (estado inactivo).", "success")
+
+        return redirect(url_for('.listar_dolls'))
+    return render_template('form_doll.html')
+
+
+@bp.route('/dolls/editar/<int:id>', methods=['GET', 'POST'])
+def editar_doll(id):
+    if request.method == 'POST':
+        nombre = request.form.get('nombre')
+        edad = request.form.get('edad')
+        estado = request.form.get('estado')  # 'activo' o 'inactivo'
+
+        # Actualiza nombre/edad
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("UPDATE dolls SET nombre=%s, edad=%s WHERE id=%s", (nombre, edad, id))
+        conn.commit()
+        cur.close()
+        conn.close()
+        tocar_tablas("dolls")
+
+        # Cambiamos estado con side-effects 
+        try:
+            if estado == 'activo':
+                reasignadas = activar_doll(id)
+                if reasignadas:
+                    flash(f"Doll activada. Se reasignaron {reasignadas} cartas en espera.", "success")
+                else:
+                    flash("Doll activada. No había cartas en espera o ya tiene 5.", "info")
+            else:
+                desactivar_doll(id)
+                flash("Doll desactivada. Sus cartas fueron puestas en 'en espera'.", "warning")
+        except Exception as e:
+            flash(f"Error al cambiar estado de la Doll: {e}", "danger")
+
+        return redirect(url_for('.listar_dolls'))
+
+    # GET
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(SQL_DOLLS + " WHERE d.id = %s", (id,))
+    doll = cargar_una(cur, Doll)
+    cur.close()
+    conn.close()
+    return render_template('form_doll.html', doll=doll)
+
+
+@bp.route('/dolls/eliminar/<int:id>')
+def eliminar_doll(id):
+    try:
+        liberar_cartas_de_doll(id)
+    except Exception as e:
+        flash(f"No se pudieron liberar las cartas de la Doll: {e}", "warning")
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("DELETE FROM dolls WHERE id=%s", (id,))
+    conn.commit()
+    cur.close()
+    conn.close()
+    invalidar_dolls_activas()
+    tocar_tablas("dolls", "cartas")
+    flash("Doll eliminada (sus cartas pasaron a 'en espera').", "danger")
+    return redirect(url_for('.listar_dolls'))
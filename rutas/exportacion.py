@@ -0,0 +1,20 @@
+"""Descarga de cartas, clientes y el reporte por doll en CSV o JSONL, en streaming."""
+from flask import Blueprint, Response, abort, request
+
+bp = Blueprint("exportacion", __name__)
+
+
+@bp.route('/exportar/<nombre>')
+def exportar_datos(nombre):
+    # Se carga recién acá, igual que la importación
+    from services.exportacion_services import EXPORTACIONES, FORMATOS, exportar, nombre_archivo
+
+    formato = request.args.get('formato', 'csv')
+    comprimir = request.args.get('gzip') == '1'
+    if nombre not in EXPORTACIONES or formato not in FORMATOS:
+        abort(404)
+    return Response(
+        exportar(nombre, formato, comprimir),
+        mimetype='application/gzip' if comprimir else FORMATOS[formato],
+        headers={'Content-Disposition': f'attachment; filename="{nombre_archivo(nombre, formato, comprimir)}"'},
+    )
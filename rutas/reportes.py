@@ -0,0 +1,25 @@
+"""Reporte por doll (vista materializada) y su refresco manual."""
+from flask import Blueprint, flash, redirect, render_template, url_for
+
+from cache_http import cachear_respuesta
+from services.reportes_services import obtener_reporte_dolls, refrescar_reporte, reporte_actualizado_en
+
+bp = Blueprint("reportes", __name__)
+
+
+@bp.route('/reporte_dolls')
+@cachear_respuesta("reporte", "dolls")
+def reporte_dolls():
+    reporte = obtener_reporte_dolls()
+    return render_template('v_reporte_doll.html', reporte=reporte,
+                           actualizado_en=reporte_actualizado_en())
+
+
+@bp.route('/reporte_dolls/refrescar', methods=['POST'])
+def refrescar_reporte_dolls():
+    duracion = refrescar_reporte()
+    if duracion is None:
+        flash("Ya se está actualizando el reporte", "info")
+    else:
+        flash(f"Reporte actualizado ({duracion} ms)", "success")
+    return redirect(url_for('.reporte_dolls'))
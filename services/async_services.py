@@ -0,0 +1,81 @@
+"""
+Versiones asíncronas (asyncpg) de las escrituras de cartas que sirve el modo
+ASGI (asgi.py): transiciones y alta en lote. El resto de las escrituras
+(edición, activar/desactivar dolls, rebalanceo) solo existen en el modo
+sincrónico.
+
+No repiten reglas: usan las mismas sentencias (SQL_TRANSICION,
+SQL_CREAR_CARTAS_LOTE...) y las mismas validaciones que cartas_services,
+solo cambia el driver. Las cartas nuevas siempre se asignan con el SQL (el
+planificador en memoria es del modo sincrónico).
+"""
+import asyncio
+
+from cache import tocar_tablas
+from config import CACHE_CONFIG
+from db_async import conexion, consultar
+from services.cartas_services import (
+    SQL_CLIENTES_FALTANTES,
+    SQL_CREAR_CARTAS_LOTE,
+    SQL_TRANSICION,
+    ErrorLote,
+    agrupar_por_destino,
+    ordenar_resultados,
+    params_cartas_lote,
+    resultado_transicion,
+)
+from services.dolls_services import invalidar_dolls_activas
+
+
+async def _avisar(*tablas, dolls_activas=False):
+    """Invalida caches y sube versiones; con el backend 'postgres' eso hace un NOTIFY (sincrónico)."""
+    def avisar():
+        if dolls_activas:
+            invalidar_dolls_activas()
+        tocar_tablas(*tablas)
+
+    if CACHE_CONFIG["backend"] == "postgres":
+        await asyncio.to_thread(avisar)
+    else:
+        avisar()
+
+
+# =========================
+#          CARTAS
+# =========================
+
+async def transicionar_cartas(ids, destino, con=None):
+    """Igual que cartas_services.transicionar_cartas. Con `con`, corre en su transacción."""
+    if con is None:
+        async with conexion() as con:
+            resultados = await transicionar_cartas(ids, destino, con)
+        await _avisar("cartas")
+        return resultados
+    filas = await consultar(con, SQL_TRANSICION, {"ids": list(ids), "destino": destino})
+    return [resultado_transicion(*fila) for fila in filas]
+
+
+async def transicionar_lote(cambios):
+    """Igual que cartas_services.transicionar_lote: una transacción, una sentencia por destino."""
+    por_destino, repetidas = agrupar_por_destino(cambios)
+    resultados = {}
+    async with conexion() as con:
+        async with con.transaction():
+            for destino, ids in por_destino.items():
+                for r in await transicionar_cartas(ids, destino, con):
+                    resultados[r["id"]] = r
+    await _avisar("cartas")
+    return ordenar_resultados(cambios, resultados, repetidas)
+
+
+async def crear_cartas_lote(cartas):
+    """Igual que cartas_services.crear_cartas_lote: todas o ninguna, en una sentencia."""
+    params = params_cartas_lote(cartas)
+    async with conexion() as con:
+        async with con.transaction():
+            faltan = await consultar(con, SQL_CLIENTES_FALTANTES, {"clientes": params["clientes"]})
+            if faltan:
+                raise ErrorLote([{"indice": i, "error": "Cliente no encontrado"} for (i,) in faltan])
+            creadas = sorted(tuple(fila) for fila in await consultar(con, SQL_CREAR_CARTAS_LOTE, params))
+    await _avisar("cartas", dolls_activas=True)
+    return [{"id": r[0], "cliente_id": r[1], "doll_id": r[2], "estado": r[3]} for r in creadas]
@@ -1,75 +1,250 @@
 import random
-from database import guardar_carta, buscar_carta_dict, actualizar_carta, eliminar_carta_bd
-from services.dolls_services import asignar_doll_disponible, get_dolls_activas
+from cache import tocar_tablas
+from datos import guardar_carta_con_doll, guardar_carta_en_doll, buscar_carta, eliminar_carta_bd
+from db import get_db_connection
+from services.dolls_services import CTE_HUECOS, invalidar_dolls_activas
+from services.planificador_services import get_planificador
 
 # Estados unificados
 ESTADOS = ["en espera", "borrador", "revisado", "enviado"]
 
+# Único avance permitido desde cada estado
+TRANSICIONES = {"borrador": "revisado", "revisado": "enviado"}
 
-def crear_carta(datos):
+# Las mismas transiciones como tabla para validarlas dentro del SQL
+SQL_TABLA_TRANSICIONES = "(VALUES " + ", ".join(
+    f"('{origen}', '{destino}')" for origen, destino in TRANSICIONES.items()
+) + ") AS t(origen, destino)"
+
+# Mueve al estado `destino` las cartas pedidas que estén en el estado de
+# origen permitido, en una sola sentencia. Por cada id pedido devuelve el
+# estado que tenía y si se aplicó (el SELECT externo ve la foto anterior al UPDATE).
+SQL_TRANSICION = """
+    WITH pedidas AS (
+        SELECT DISTINCT unnest(%(ids)s::int[]) AS id
+    ),
+    aplicadas AS (
+        UPDATE cartas c
+        SET estado = t.destino
+        FROM pedidas p, """ + SQL_TABLA_TRANSICIONES + """
+        WHERE c.id = p.id AND t.destino = %(destino)s AND c.estado = t.origen
+        RETURNING c.id
+    )
+    SELECT p.id, c.estado, a.id IS NOT NULL
+    FROM pedidas p
+    LEFT JOIN cartas c ON c.id = p.id
+    LEFT JOIN aplicadas a ON a.id = p.id
+"""
+
+# Estados en los que se puede reescribir el contenido sin cambiar de estado
+ESTADOS_EDITABLES = ("borrador", "revisado")
+
+# Edición de una carta (estado + contenido) en una sentencia: se guarda si el
+# cambio es una transición permitida, o si el estado no cambia y es editable
+# (una carta enviada o en espera no se reescribe).
+SQL_EDITAR_CARTA = """
+    WITH actual AS (
+        SELECT id, estado FROM cartas WHERE id = %(id)s
+    ),
+    editada AS (
+        UPDATE cartas c
+        SET estado = %(estado)s, contenido = %(contenido)s
+        FROM actual a
+        WHERE c.id = a.id
+          AND ((c.estado = %(estado)s AND c.estado IN (""" + ", ".join(f"'{e}'" for e in ESTADOS_EDITABLES) + """))
+               OR EXISTS (SELECT 1 FROM """ + SQL_TABLA_TRANSICIONES + """
+                          WHERE t.origen = c.estado AND t.destino = %(estado)s))
+        RETURNING c.id
+    )
+    SELECT a.estado, EXISTS (SELECT 1 FROM editada) FROM actual a
+"""
+
+MENSAJES_TRANSICION = {
+    "no_encontrada": "Carta no encontrada",
+    "en_espera": "No se puede cambiar estado de una carta en espera hasta que tenga Doll asignada",
+    "invalida": "Cambio de estado inválido",
+}
+
+# Cartas nuevas en lote: ocupan los huecos de las Dolls activas (de a una por
+# Doll, como la importación) y las que no entran quedan 'en espera'.
+SQL_CREAR_CARTAS_LOTE = """
+    WITH """ + CTE_HUECOS + """,
+    nuevas AS (
+        SELECT cliente_id, estado, contenido, pos
+        FROM unnest(%(clientes)s::int[], %(estados)s::text[], %(contenidos)s::text[])
+             WITH ORDINALITY AS t(cliente_id, estado, contenido, pos)
+    )
+    INSERT INTO cartas (cliente_id, doll_id, fecha, estado, contenido)
+    SELECT n.cliente_id, h.doll_id, CURRENT_DATE,
+           CASE WHEN h.doll_id IS NULL THEN 'en espera' ELSE n.estado END,
+           n.contenido
+    FROM nuevas n
+    LEFT JOIN huecos h ON h.pos = n.pos
+    ORDER BY n.pos
+    RETURNING id, cliente_id, doll_id, estado
+"""
+
+# Posiciones (desde 0) de los clientes del lote que no existen
+SQL_CLIENTES_FALTANTES = """
+    SELECT (t.pos - 1)::int
+    FROM unnest(%(clientes)s::int[]) WITH ORDINALITY AS t(cliente_id, pos)
+    WHERE NOT EXISTS (SELECT 1 FROM clientes c WHERE c.id = t.cliente_id)
+"""
+
+
+class ErrorLote(Exception):
+    """Una operación en lote no se aplicó; `errores` es [{"indice"/"id", "error"}]."""
+
+    def __init__(self, errores):
+        super().__init__(f"{len(errores)} elementos con errores; no se aplicó ningún cambio")
+        self.errores = errores
+
+
+def _ciudad_cliente(cliente_id):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT ciudad FROM clientes WHERE id = %s", (cliente_id,))
+    fila = cur.fetchone()
+    cur.close()
+    conn.close()
+    return fila[0] if fila else None
+
+
+def _guardar_carta(datos, ciudad=None, cur=None):
     """
-    Crea una carta y asigna automáticamente una Doll ACTIVA disponible (menos de 5 cartas).
-    Si no hay Dolls activas, la carta queda en estado 'en espera'.
+    Guarda la carta en la Doll que propone el planificador en memoria (si hay
+    una política configurada). Si la propuesta ya no tiene cupo en la base, el
+    planificador se resincroniza y se usa la asignación SQL de siempre.
+    Con `cur`, todo corre en la transacción de quien llama.
     """
-    dolls_activas = get_dolls_activas()
-
-    if not dolls_activas:
-        # No hay dolls activas → dejamos carta en espera
-        datos["estado"] = "en espera"
-        datos["doll_id"] = None
-        return guardar_carta(datos)
+    planificador = get_planificador()
+    if planificador is not None:
+        if planificador.usa_ciudad and ciudad is None:
+            ciudad = _ciudad_cliente(datos.get("cliente_id"))
+        doll_id = planificador.elegir(ciudad)
+        if doll_id is not None:
+            carta_id = guardar_carta_en_doll(datos, doll_id, cur)
+            if carta_id is not None:
+                planificador.registrar(doll_id)
+                return carta_id
+        planificador.invalidar()
+    carta_id, _ = guardar_carta_con_doll(datos, cur)
+    return carta_id
 
-    doll = asignar_doll_disponible()
-    if not doll:
-        # Todas las dolls activas están ocupadas → carta queda en espera
-        datos["estado"] = "en espera"
-        datos["doll_id"] = None
-        return guardar_carta(datos)
 
-    # Si hay doll disponible, la asignamos
-    datos["doll_id"] = doll["id"]
+def crear_carta(datos):
+    """
+    Crea una carta y asigna automáticamente una Doll ACTIVA disponible (menos de 5 cartas).
+    Si no hay Dolls activas con cupo, la carta queda en estado 'en espera'.
+    Elegir la Doll e insertar ocurre en una sola transacción (ver guardar_carta_con_doll).
+    """
     datos["estado"] = datos.get("estado", "borrador")
-    return guardar_carta(datos)
+    return _guardar_carta(datos)
 
 
-def crear_carta_para_cliente(cliente_id):
+def crear_carta_para_cliente(cliente_id, ciudad=None, cur=None):
     """
     Se llama justo después de crear un cliente.
-    Si hay Dolls activas, asigna una Doll con espacio y un estado aleatorio.
-    Si no hay Dolls activas, la carta queda en 'en espera'.
-    """
-    dolls_activas = get_dolls_activas()
-
-    if not dolls_activas:
-        # Guardamos en espera
-        datos = {
-            "cliente_id": cliente_id,
-            "doll_id": None,
-            "estado": "en espera",
-            "contenido": ""
-        }
-        return guardar_carta(datos)
-
-    doll = asignar_doll_disponible()
-    if not doll:
-        # Guardamos en espera porque todas las activas están llenas
-        datos = {
-            "cliente_id": cliente_id,
-            "doll_id": None,
-            "estado": "en espera",
-            "contenido": ""
-        }
-        return guardar_carta(datos)
-
-    # Si hay doll disponible
-    estado = random.choice(["borrador", "revisado", "enviado"])
+    Si hay Dolls activas con cupo, asigna una y un estado aleatorio.
+    Si no, la carta queda en 'en espera'.
+    Si se pasa `cur`, corre en esa transacción y el commit lo hace quien llama.
+    """
     datos = {
         "cliente_id": cliente_id,
-        "doll_id": doll["id"],
-        "estado": estado,
+        "estado": random.choice(["borrador", "revisado", "enviado"]),
         "contenido": ""
     }
-    return guardar_carta(datos)
+    return _guardar_carta(datos, ciudad, cur)
+
+
+def resultado_transicion(carta_id, estado_anterior, aplicada):
+    if aplicada:
+        resultado = "aplicada"
+    elif estado_anterior is None:
+        resultado = "no_encontrada"
+    elif estado_anterior == "en espera":
+        resultado = "en_espera"
+    else:
+        resultado = "invalida"
+    return {"id": carta_id, "resultado": resultado, "estado_anterior": estado_anterior}
+
+
+def transicionar_cartas(ids, destino, cur=None):
+    """
+    Pasa a `destino` todas las cartas de `ids` cuyo estado actual lo permita,
+    con un solo UPDATE. Retorna un resultado por id:
+    {"id", "resultado": aplicada | no_encontrada | en_espera | invalida, "estado_anterior"}.
+    Si se pasa `cur`, corre en esa transacción y el commit lo hace quien llama.
+    """
+    if cur is not None:
+        cur.execute(SQL_TRANSICION, {"ids": list(ids), "destino": destino})
+        return [resultado_transicion(*fila) for fila in cur.fetchall()]
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        resultados = transicionar_cartas(ids, destino, cur)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+    tocar_tablas("cartas")
+    return resultados
+
+
+def agrupar_por_destino(cambios):
+    """
+    Agrupa [{"id", "estado"}] por estado destino. Retorna ({destino: [ids]},
+    ids repetidos); los repetidos no se aplican (no se puede saltar de
+    borrador a enviado en un lote).
+    """
+    por_destino = {}
+    repetidas = set()
+    vistos = set()
+    for cambio in cambios:
+        if cambio["id"] in vistos:
+            repetidas.add(cambio["id"])
+        vistos.add(cambio["id"])
+        por_destino.setdefault(cambio["estado"], []).append(cambio["id"])
+    por_destino = {destino: [i for i in ids if i not in repetidas] for destino, ids in por_destino.items()}
+    return {destino: ids for destino, ids in por_destino.items() if ids}, repetidas
+
+
+def ordenar_resultados(cambios, resultados, repetidas):
+    """Resultados ({id: resultado}) en el orden de `cambios`, marcando los repetidos."""
+    return [
+        {"id": cambio["id"], "resultado": "repetida", "estado_anterior": None}
+        if cambio["id"] in repetidas else resultados[cambio["id"]]
+        for cambio in cambios
+    ]
+
+
+def transicionar_lote(cambios):
+    """
+    Aplica [{"id", "estado"}] en una transacción, con una sentencia por estado
+    destino. Cada id se procesa una sola vez (ver agrupar_por_destino).
+    Retorna los resultados en el orden recibido.
+    """
+    por_destino, repetidas = agrupar_por_destino(cambios)
+    resultados = {}
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        for destino, ids in por_destino.items():
+            for r in transicionar_cartas(ids, destino, cur):
+                resultados[r["id"]] = r
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+    tocar_tablas("cartas")
+    return ordenar_resultados(cambios, resultados, repetidas)
 
 
 def cambiar_estado_carta(carta_id, nuevo_estado):
@@ -78,31 +253,165 @@ def cambiar_estado_carta(carta_id, nuevo_estado):
     borrador → revisado → enviado.
     No aplica a cartas en 'en espera'.
     """
-    carta = buscar_carta_dict(carta_id)
-    if not carta:
-        raise Exception("Carta no encontrada")
+    resultado = transicionar_cartas([carta_id], nuevo_estado)[0]["resultado"]
+    if resultado != "aplicada":
+        raise Exception(MENSAJES_TRANSICION[resultado])
 
-    estado_actual = carta["estado"]
 
-    if estado_actual == "en espera":
-        raise Exception("No se puede cambiar estado de una carta en espera hasta que tenga Doll asignada")
-
-    if (estado_actual == "borrador" and nuevo_estado == "revisado") or \
-       (estado_actual == "revisado" and nuevo_estado == "enviado"):
-        actualizar_carta(carta_id, {"estado": nuevo_estado})
-    else:
-        raise Exception("Cambio de estado inválido")
+def editar_carta_completa(carta_id, estado, contenido):
+    """
+    Guarda estado y contenido de una carta en una sola sentencia. Dejar el
+    estado como está solo cambia el contenido, y solo en borrador o revisado;
+    si no, debe ser una transición permitida. Si no se puede, no guarda nada
+    y lanza Exception.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(SQL_EDITAR_CARTA, {"id": carta_id, "estado": estado, "contenido": contenido})
+    fila = cur.fetchone()
+    conn.commit()
+    cur.close()
+    conn.close()
+    tocar_tablas("cartas")
+    if fila is None:
+        raise Exception(MENSAJES_TRANSICION["no_encontrada"])
+    estado_anterior, guardada = fila
+    if not guardada:
+        raise Exception(MENSAJES_TRANSICION["en_espera" if estado_anterior == "en espera" else "invalida"])
 
 
 def eliminar_carta(carta_id):
     """
     Elimina una carta solo si está en estado 'borrador' o 'en espera'.
     """
-    carta = buscar_carta_dict(carta_id)
+    carta = buscar_carta(carta_id)
     if not carta:
         raise Exception("Carta no encontrada")
 
-    if carta["estado"] not in ["borrador", "en espera"]:
+    if carta.estado not in ["borrador", "en espera"]:
         raise Exception("Solo se pueden eliminar cartas en borrador o en espera")
 
     eliminar_carta_bd(carta_id)
+
+
+def params_cartas_lote(cartas):
+    """
+    Valida [{"cliente_id", "contenido"?, "estado"?}] y arma los parámetros de
+    SQL_CREAR_CARTAS_LOTE. Lanza ErrorLote si algún elemento es inválido.
+    """
+    errores = []
+    for i, carta in enumerate(cartas):
+        if not isinstance(carta.get("cliente_id"), int):
+            errores.append({"indice": i, "error": "cliente_id debe ser un entero"})
+        elif carta.get("estado", "borrador") not in ("borrador", "revisado", "enviado"):
+            errores.append({"indice": i, "error": f"Estado inicial inválido: {carta.get('estado')}"})
+        elif not isinstance(carta.get("contenido", ""), str):
+            errores.append({"indice": i, "error": "contenido debe ser texto"})
+    if errores:
+        raise ErrorLote(errores)
+    return {
+        "doll_ids": None,
+        "clientes": [c["cliente_id"] for c in cartas],
+        "estados": [c.get("estado", "borrador") for c in cartas],
+        "contenidos": [c.get("contenido", "") for c in cartas],
+    }
+
+
+def crear_cartas_lote(cartas):
+    """
+    Crea varias cartas en una sola transacción y una sola sentencia.
+    `cartas` es [{"cliente_id", "contenido"?, "estado"?}]; el estado pedido
+    (borrador por defecto) se respeta si la carta consigue Doll.
+    Retorna [{"id", "cliente_id", "doll_id", "estado"}] en el orden recibido.
+    Si algún elemento es inválido lanza ErrorLote y no crea ninguna.
+    """
+    params = params_cartas_lote(cartas)
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(SQL_CLIENTES_FALTANTES, {"clientes": params["clientes"]})
+        faltan = [{"indice": i, "error": "Cliente no encontrado"} for (i,) in cur.fetchall()]
+        if faltan:
+            raise ErrorLote(faltan)
+
+        cur.execute(SQL_CREAR_CARTAS_LOTE, params)
+        # Los ids salen de la secuencia en el orden de inserción (n.pos)
+        creadas = sorted(cur.fetchall())
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+    invalidar_dolls_activas()
+    tocar_tablas("cartas")
+    return [{"id": r[0], "cliente_id": r[1], "doll_id": r[2], "estado": r[3]} for r in creadas]
+
+
+def actualizar_cartas_lote(cambios):
+    """
+    Aplica en una transacción cambios de contenido y/o estado a varias cartas.
+    `cambios` es [{"id", "estado"?, "contenido"?}]. Los estados siguen el flujo
+    de cambiar_estado_carta (borrador → revisado → enviado; pedir el estado
+    actual no es un cambio) y, como en el editor, el contenido sin cambio de
+    estado solo se reescribe en borrador o revisado. Todo o nada: si alguna carta no existe o el
+    cambio no es válido lanza ErrorLote. Retorna cuántas cartas se actualizaron.
+    """
+    errores = []
+    ids = []
+    vistos = set()
+    for i, cambio in enumerate(cambios):
+        if not isinstance(cambio.get("id"), int):
+            errores.append({"indice": i, "error": "id debe ser un entero"})
+        elif cambio.get("estado") is not None and cambio["estado"] not in ESTADOS:
+            errores.append({"indice": i, "error": f"Estado inválido: {cambio['estado']}"})
+        elif cambio.get("contenido") is not None and not isinstance(cambio["contenido"], str):
+            errores.append({"indice": i, "error": "contenido debe ser texto"})
+        elif cambio["id"] in vistos:
+            errores.append({"id": cambio["id"], "error": "id repetido en el lote"})
+        else:
+            ids.append(cambio["id"])
+            vistos.add(cambio["id"])
+    if errores:
+        raise ErrorLote(errores)
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT id, estado FROM cartas WHERE id = ANY(%s) FOR UPDATE", (ids,))
+        actuales = dict(cur.fetchall())
+        for cambio in cambios:
+            carta_id, nuevo = cambio["id"], cambio.get("estado")
+            if carta_id not in actuales:
+                errores.append({"id": carta_id, "error": "Carta no encontrada"})
+            elif nuevo is not None and nuevo != actuales[carta_id]:
+                if actuales[carta_id] == "en espera":
+                    errores.append({"id": carta_id, "error": "No se puede cambiar estado de una carta en espera"})
+                elif TRANSICIONES.get(actuales[carta_id]) != nuevo:
+                    errores.append({"id": carta_id, "error": f"Cambio de estado inválido: {actuales[carta_id]} → {nuevo}"})
+            elif cambio.get("contenido") is not None and actuales[carta_id] not in ESTADOS_EDITABLES:
+                # Igual que el editor: sin cambio de estado solo se reescribe en borrador o revisado
+                errores.append({"id": carta_id, "error": f"No se puede cambiar el contenido de una carta en {actuales[carta_id]}"})
+        if errores:
+            raise ErrorLote(errores)
+
+        # contenido NULL deja el cuerpo como estaba (trigger trg_contenido_carta)
+        cur.execute("""
+            UPDATE cartas c
+            SET estado = COALESCE(v.estado, c.estado),
+                contenido = v.contenido
+            FROM unnest(%s::int[], %s::text[], %s::text[]) AS v(id, estado, contenido)
+            WHERE c.id = v.id
+        """, (ids, [c.get("estado") for c in cambios], [c.get("contenido") for c in cambios]))
+        actualizadas = cur.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+    tocar_tablas("cartas")
+    return actualizadas
@@ -0,0 +1,60 @@
+"""
+Búsqueda de clientes.
+
+Los filtros de /clientes son subcadenas (ILIKE '%texto%'), que un índice
+B-tree no puede usar. Con pg_trgm e índices GIN de trigramas sobre nombre,
+ciudad y motivo, Postgres resuelve esos ILIKE con el índice y además permite
+ordenar por parecido (word_similarity). Los índices los crea la migración
+v0004_busqueda_clientes.
+"""
+from db import get_db_connection
+from modelos import Cliente, cargar
+
+CLIENTES_POR_PAGINA = 50
+
+
+def _patron(texto):
+    """'%texto%' escapando los comodines de LIKE que escriba el usuario."""
+    texto = texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{texto}%"
+
+
+def buscar_clientes(q="", ciudad="", motivo="", limite=CLIENTES_POR_PAGINA, offset=0):
+    """
+    Busca clientes por subcadena de nombre (q), ciudad y motivo.
+    Con q, los resultados van ordenados por parecido del nombre; sin q, por id.
+    Retorna (clientes, hay_mas): como mucho `limite` modelos.Cliente y si quedan más.
+    """
+    q, ciudad, motivo = q.strip(), ciudad.strip(), motivo.strip()
+
+    condiciones = []
+    params = {"q": q, "limite": limite + 1, "offset": offset}
+    if q:
+        condiciones.append("nombre ILIKE %(patron_q)s")
+        params["patron_q"] = _patron(q)
+    if ciudad:
+        condiciones.append("ciudad ILIKE %(patron_ciudad)s")
+        params["patron_ciudad"] = _patron(ciudad)
+    if motivo:
+        condiciones.append("motivo ILIKE %(patron_motivo)s")
+        params["patron_motivo"] = _patron(motivo)
+
+    where = ("WHERE " + " AND ".join(condiciones)) if condiciones else ""
+    orden = "word_similarity(%(q)s, nombre) DESC, id ASC" if q else "id ASC"
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(f"""
+        SELECT id, nombre, ciudad, motivo, contacto
+        FROM clientes
+        {where}
+        ORDER BY {orden}
+        LIMIT %(limite)s OFFSET %(offset)s
+    """, params)
+    clientes = cargar(cur, Cliente)
+    cur.close()
+    conn.close()
+
+    hay_mas = len(clientes) > limite
+    return clientes[:limite], hay_mas
+
@@ -0,0 +1,124 @@
+"""
+Contadores de cartas por doll y por estado.
+
+La tabla contadores_dolls guarda, por cada doll, cuántas cartas tiene en total
+y cuántas en borrador / revisado / enviado. Un trigger sobre cartas la mantiene
+al día dentro de la misma transacción que cambia la carta (guardar_carta,
+actualizar_carta, liberar_cartas_de_doll, reasignar_cartas_a_doll,
+eliminar_carta_bd y cualquier SQL directo de las rutas), así que consultar la
+carga de una doll es leer una fila en lugar de contar toda la tabla cartas.
+
+La tabla y los triggers los crea la migración v0003_contadores.
+
+Uso:
+    python -m services.contadores_services reconstruir   # recalcula desde cartas
+    python -m services.contadores_services verificar     # compara contra cartas
+"""
+import sys
+
+from db import get_db_connection
+
+# Estados que tienen su propia columna en contadores_dolls
+ESTADOS_CONTADOS = ["borrador", "revisado", "enviado"]
+
+# Recalcula los contadores desde cero a partir de cartas
+SQL_CONTEO_REAL = """
+    SELECT doll_id,
+           COUNT(*) AS total,
+           COUNT(*) FILTER (WHERE estado = 'borrador') AS borrador,
+           COUNT(*) FILTER (WHERE estado = 'revisado') AS revisado,
+           COUNT(*) FILTER (WHERE estado = 'enviado') AS enviado
+    FROM cartas
+    WHERE doll_id IS NOT NULL
+    GROUP BY doll_id
+"""
+
+
+def _reconstruir(cur):
+    """Recalcula contadores_dolls en el cursor dado (sin commit). Retorna filas escritas."""
+    cur.execute("LOCK TABLE cartas IN SHARE MODE")
+    cur.execute("DELETE FROM contadores_dolls")
+    cur.execute(f"""
+        WITH real AS ({SQL_CONTEO_REAL})
+        INSERT INTO contadores_dolls (doll_id, total, borrador, revisado, enviado)
+        SELECT d.id,
+               COALESCE(r.total, 0), COALESCE(r.borrador, 0),
+               COALESCE(r.revisado, 0), COALESCE(r.enviado, 0)
+        FROM dolls d
+        LEFT JOIN real r ON r.doll_id = d.id
+    """)
+    return cur.rowcount
+
+
+def reconstruir_contadores():
+    """
+    Recalcula contadores_dolls desde cartas.
+    Bloquea escrituras sobre cartas mientras dura, para no perder cambios.
+    Retorna la cantidad de dolls con contador (todas las dolls).
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    filas = _reconstruir(cur)
+    conn.commit()
+    cur.close()
+    conn.close()
+    return filas
+
+
+def verificar_contadores():
+    """
+    Compara contadores_dolls contra un conteo real de cartas.
+    Retorna una lista de (doll_id, guardado, real) con las diferencias.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(f"""
+        WITH real AS ({SQL_CONTEO_REAL})
+        SELECT COALESCE(k.doll_id, r.doll_id),
+               ARRAY[COALESCE(k.total, 0), COALESCE(k.borrador, 0),
+                     COALESCE(k.revisado, 0), COALESCE(k.enviado, 0)],
+               ARRAY[COALESCE(r.total, 0), COALESCE(r.borrador, 0),
+                     COALESCE(r.revisado, 0), COALESCE(r.enviado, 0)]
+        FROM contadores_dolls k
+        FULL OUTER JOIN real r ON r.doll_id = k.doll_id
+        ORDER BY 1
+    """)
+    rows = cur.fetchall()
+    cur.close()
+    conn.close()
+    return [(doll_id, guardado, real) for doll_id, guardado, real in rows if guardado != real]
+
+
+def carga_doll(doll_id):
+    """Cantidad total de cartas asignadas a la doll (lectura O(1))."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT total FROM contadores_dolls WHERE doll_id = %s", (doll_id,))
+    row = cur.fetchone()
+    cur.close()
+    conn.close()
+    return row[0] if row else 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    comando = argv[0] if argv else "verificar"
+
+    if comando == "reconstruir":
+        print(f"Contadores reconstruidos ({reconstruir_contadores()} dolls).")
+    elif comando == "verificar":
+        diferencias = verificar_contadores()
+        for doll_id, guardado, real in diferencias:
+            print(f"doll {doll_id}: guardado={guardado} real={real}  [total, borrador, revisado, enviado]")
+        if diferencias:
+            print(f"{len(diferencias)} dolls con contadores desfasados. Ejecute 'reconstruir'.")
+            return 1
+        print("Contadores OK.")
+    else:
+        print(__doc__)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
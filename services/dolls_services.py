@@ -1,6 +1,14 @@
-from database import get_db_connection
+from cache import get_cache, tocar_tablas
+from db import get_db_connection
+from modelos import DollActiva, cargar
+from services.contadores_services import ESTADOS_CONTADOS
 import random
 
+# Dolls activas y su cupo libre. Se invalida al activar/desactivar/eliminar;
+# el cupo puede atrasarse hasta el TTL (la asignación real siempre lee el
+# contador bajo bloqueo, ver guardar_carta_con_doll).
+cache_dolls_activas = get_cache("dolls_activas")
+
 # =========================
 #    QUERIES BÁSICAS
 # =========================
@@ -26,6 +34,7 @@ def insert_doll(nombre, descripcion):
     conn.commit()
     cur.close()
     conn.close()
+    tocar_tablas("dolls")
 
 
 def asignar_doll_disponible():
@@ -38,11 +47,10 @@ def asignar_doll_disponible():
     cur.execute("""
         SELECT d.id, d.nombre
         FROM dolls d
-        LEFT JOIN cartas c ON c.doll_id = d.id
+        LEFT JOIN contadores_dolls k ON k.doll_id = d.id
         WHERE d.estado = 'activo'
-        GROUP BY d.id, d.nombre
-        HAVING COUNT(c.id) < 5
-        ORDER BY COUNT(c.id) ASC
+          AND COALESCE(k.total, 0) < 5
+        ORDER BY COALESCE(k.total, 0) ASC
         LIMIT 1
     """)
     doll = cur.fetchone()
@@ -55,40 +63,91 @@ def asignar_doll_disponible():
     return {"id": doll[0], "nombre": doll[1]}
 
 
-def asignar_doll_aleatoria_id():
-    """
-    Devuelve el ID de una Doll aleatoria ACTIVA (sin validar límite de 5 cartas).
-    """
+def _cargar_ids_activas():
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute("SELECT id FROM dolls WHERE estado = 'activo' ORDER BY RANDOM() LIMIT 1;")
-    row = cur.fetchone()
+    cur.execute("SELECT id FROM dolls WHERE estado = 'activo'")
+    ids = tuple(row[0] for row in cur.fetchall())
     cur.close()
     conn.close()
-    return row[0] if row else None
+    return ids
+
+
+def muestrear_doll_activa():
+    """
+    Id de una Doll activa elegida al azar (uniforme), o None si no hay.
+    Sortea sobre la tupla de ids activos que guarda el cache, así que cuesta lo
+    mismo con 10 que con 100.000 Dolls. La tupla se recarga al activar,
+    desactivar o eliminar (invalidar_dolls_activas) o al vencer el TTL.
+    """
+    ids = cache_dolls_activas.obtener("ids", _cargar_ids_activas)
+    return random.choice(ids) if ids else None
+
+
+def asignar_doll_aleatoria_id():
+    """
+    Devuelve el ID de una Doll aleatoria ACTIVA (sin validar límite de 5 cartas).
+    El sorteo es en memoria (muestrear_doll_activa); acá solo se confirma por
+    id que la Doll sigue activa, por si otro proceso la cambió antes del TTL.
+    """
+    for _ in range(2):
+        doll_id = muestrear_doll_activa()
+        if doll_id is None:
+            return None
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT 1 FROM dolls WHERE id = %s AND estado = 'activo'", (doll_id,))
+        vigente = cur.fetchone() is not None
+        cur.close()
+        conn.close()
+        if vigente:
+            return doll_id
+        invalidar_dolls_activas()
+    return None
 
 
 def contar_cartas_en_estado(doll_id, estado):
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute(
-        "SELECT COUNT(*) FROM cartas WHERE doll_id = %s AND estado = %s",
-        (doll_id, estado)
-    )
-    count = cur.fetchone()[0]
+    if estado in ESTADOS_CONTADOS:
+        # El nombre de columna viene de la lista fija, no del usuario
+        cur.execute(f"SELECT {estado} FROM contadores_dolls WHERE doll_id = %s", (doll_id,))
+        row = cur.fetchone()
+        count = row[0] if row else 0
+    else:
+        cur.execute(
+            "SELECT COUNT(*) FROM cartas WHERE doll_id = %s AND estado = %s",
+            (doll_id, estado)
+        )
+        count = cur.fetchone()[0]
     cur.close()
     conn.close()
     return count
 
 
-def get_dolls_activas():
+def _cargar_dolls_activas():
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute("SELECT id, nombre FROM dolls WHERE estado = 'activo'")
-    rows = cur.fetchall()
+    cur.execute("""
+        SELECT d.id, d.nombre, GREATEST(0, 5 - COALESCE(k.total, 0)) AS cupo
+        FROM dolls d
+        LEFT JOIN contadores_dolls k ON k.doll_id = d.id
+        WHERE d.estado = 'activo'
+        ORDER BY d.id
+    """)
+    dolls = cargar(cur, DollActiva)
     cur.close()
     conn.close()
-    return [{"id": row[0], "nombre": row[1]} for row in rows]
+    return dolls
+
+
+def get_dolls_activas():
+    return cache_dolls_activas.obtener("todas", _cargar_dolls_activas)
+
+
+def invalidar_dolls_activas():
+    """Llamar después de cualquier cambio en el conjunto de Dolls activas."""
+    cache_dolls_activas.invalidar()
 
 
 def asignar_carta_a_doll(doll_id):
@@ -99,83 +158,132 @@ def asignar_carta_a_doll(doll_id):
     conn.commit()
     cur.close()
     conn.close()
+    tocar_tablas("cartas")
 
 # =========================
 #   SINCRONIZACIÓN CARTAS
 # =========================
 
-def reasignar_cartas_a_doll(doll_id):
-    """
-    Asigna cartas en 'en espera' (doll_id IS NULL) a la Doll indicada,
-    hasta un máximo total de 5 cartas asignadas a esa Doll.
-    Retorna la cantidad de cartas reasignadas.
-    """
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    # ¿Cuántas cartas tiene ya esta doll?
-    cur.execute("SELECT COUNT(*) FROM cartas WHERE doll_id = %s", (doll_id,))
-    usadas = cur.fetchone()[0]
-    cupo_restante = max(0, 5 - usadas)
-    if cupo_restante <= 0:
-        cur.close()
-        conn.close()
-        return 0
+# Huecos libres (hasta 5 por Doll) de las Dolls activas, numerados en `pos`
+# repartiendo de a uno por Doll. Las filas de contadores_dolls se bloquean en
+# orden de id para que dos operaciones que reparten cartas no se crucen.
+CTE_HUECOS = """
+    cupos AS (
+        SELECT k.doll_id, k.total, 5 - k.total AS cupo
+        FROM contadores_dolls k
+        JOIN dolls d ON d.id = k.doll_id
+        WHERE d.estado = 'activo' AND k.total < 5
+          AND (%(doll_ids)s::int[] IS NULL OR k.doll_id = ANY(%(doll_ids)s::int[]))
+        ORDER BY k.doll_id
+        FOR UPDATE OF k
+    ),
+    huecos AS (
+        SELECT c.doll_id, ROW_NUMBER() OVER (ORDER BY n, c.total, c.doll_id) AS pos
+        FROM cupos c, generate_series(1, c.cupo) AS n
+    )
+"""
 
-    # Tomamos las primeras cartas en espera
-    cur.execute("""
+# Llena los huecos con las cartas en espera, en orden FIFO por id, con un solo
+# UPDATE. Las cartas en espera se toman con SKIP LOCKED para que no se asigne
+# la misma carta dos veces.
+SQL_REBALANCEAR = """
+    WITH """ + CTE_HUECOS + """,
+    en_espera AS (
         SELECT id FROM cartas
         WHERE estado = 'en espera' AND doll_id IS NULL
         ORDER BY id ASC
-        LIMIT %s
-    """, (cupo_restante,))
-    cartas_espera = cur.fetchall()
-
-    reasignadas = 0
-    for (carta_id,) in cartas_espera:
-        cur.execute("""
-            UPDATE cartas
-            SET doll_id = %s, estado = 'borrador'
-            WHERE id = %s
-        """, (doll_id, carta_id))
-        reasignadas += 1
+        LIMIT (SELECT COALESCE(SUM(cupo), 0) FROM cupos)
+        FOR UPDATE SKIP LOCKED
+    ),
+    cola AS (
+        SELECT id, ROW_NUMBER() OVER (ORDER BY id) AS pos FROM en_espera
+    )
+    UPDATE cartas
+    SET doll_id = h.doll_id, estado = 'borrador'
+    FROM cola
+    JOIN huecos h ON h.pos = cola.pos
+    WHERE cartas.id = cola.id
+"""
+
+
+# Todas las cartas de una Doll vuelven a la cola
+SQL_LIBERAR_CARTAS = """
+    UPDATE cartas
+    SET doll_id = NULL, estado = 'en espera'
+    WHERE doll_id = %s
+"""
+
+
+def _rebalancear(cur, doll_ids=None):
+    """Ejecuta el rebalanceo en el cursor dado (sin commit). Retorna cartas asignadas."""
+    cur.execute(SQL_REBALANCEAR, {"doll_ids": doll_ids})
+    return cur.rowcount
 
+
+def rebalancear_cartas(doll_ids=None):
+    """
+    Reparte las cartas en 'en espera' entre las Dolls activas con cupo.
+    Si se pasa doll_ids solo llena esas Dolls; si no, todas las activas.
+    Retorna la cantidad de cartas reasignadas.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    reasignadas = _rebalancear(cur, doll_ids)
     conn.commit()
     cur.close()
     conn.close()
+    if reasignadas:
+        tocar_tablas("cartas")
     return reasignadas
 
 
+def reasignar_cartas_a_doll(doll_id):
+    """
+    Asigna cartas en 'en espera' (doll_id IS NULL) a la Doll indicada,
+    hasta un máximo total de 5 cartas asignadas a esa Doll.
+    Retorna la cantidad de cartas reasignadas.
+    """
+    return rebalancear_cartas([doll_id])
+
+
 def liberar_cartas_de_doll(doll_id):
     """
     Pone en 'en espera' todas las cartas de una Doll (ej. cuando se desactiva o elimina).
     """
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute("""
-        UPDATE cartas
-        SET doll_id = NULL, estado = 'en espera'
-        WHERE doll_id = %s
-    """, (doll_id,))
+    cur.execute(SQL_LIBERAR_CARTAS, (doll_id,))
     conn.commit()
     cur.close()
     conn.close()
+    invalidar_dolls_activas()
+    tocar_tablas("cartas")
 
 
-def activar_doll(doll_id):
+def activar_dolls(doll_ids):
     """
-    Cambia la doll a ACTIVO y luego intenta absorber cartas en 'en espera'
-    hasta completar 5 asignadas a esa doll.
+    Activa varias Dolls a la vez (ej. tras una caída) y reparte entre ellas
+    las cartas en espera, todo en una transacción.
+    Retorna la cantidad de cartas reasignadas.
     """
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute("UPDATE dolls SET estado = 'activo' WHERE id = %s", (doll_id,))
+    cur.execute("UPDATE dolls SET estado = 'activo' WHERE id = ANY(%s)", (list(doll_ids),))
+    reasignadas = _rebalancear(cur, list(doll_ids))
     conn.commit()
     cur.close()
     conn.close()
+    invalidar_dolls_activas()
+    tocar_tablas("dolls", "cartas")
+    return reasignadas
 
-    # Reasigna inmediatamente cartas en espera
-    return reasignar_cartas_a_doll(doll_id)
+
+def activar_doll(doll_id):
+    """
+    Cambia la doll a ACTIVO y luego intenta absorber cartas en 'en espera'
+    hasta completar 5 asignadas a esa doll.
+    """
+    return activar_dolls([doll_id])
 
 
 def desactivar_doll(doll_id):
@@ -185,8 +293,9 @@ def desactivar_doll(doll_id):
     conn = get_db_connection()
     cur = conn.cursor()
     cur.execute("UPDATE dolls SET estado = 'inactivo' WHERE id = %s", (doll_id,))
+    cur.execute(SQL_LIBERAR_CARTAS, (doll_id,))
     conn.commit()
     cur.close()
     conn.close()
-
-    liberar_cartas_de_doll(doll_id)
+    invalidar_dolls_activas()
+    tocar_tablas("dolls", "cartas")
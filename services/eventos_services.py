@@ -0,0 +1,220 @@
+"""
+Log de eventos: cada alta, baja y cambio de estado o doll de una carta, y cada
+alta, baja y cambio de estado de una doll, queda como una fila en eventos.
+
+Los escriben triggers (migración v0008), así que salen en la misma transacción
+que el cambio, sea cual sea el camino (desactivar_doll liberando cartas,
+reasignar_cartas_a_doll, los lotes de /api/v1, un UPDATE a mano): si el cambio
+se confirma el evento existe, y si no, tampoco. Al confirmar, Postgres manda un
+NOTIFY por tabla tocada en el canal CANAL_EVENTOS.
+
+Quien quiera mantener algo al día (un cache, un contador, una tabla de
+reporte) se suscribe y aplica los cambios en lugar de recontar todo:
+
+    def aplicar(eventos):
+        for e in eventos:
+            ...
+
+    suscripcion = suscribir(aplicar, tablas=["cartas"])
+
+La posición de un suscriptor es (xid, id) del último evento aplicado. Solo se
+leen eventos de transacciones ya terminadas (xid menor que el xmin del
+snapshot), así un evento con id más bajo que confirma tarde no se pierde. La
+entrega es al menos una vez: si el manejador falla, la tanda se repite.
+
+Uso:
+    python -m services.eventos_services seguir --tablas cartas
+    python -m services.eventos_services purgar --dias 7
+"""
+import argparse
+import json
+import logging
+import select
+import sys
+import threading
+
+import psycopg2
+
+from config import DB_CONFIG, EVENTOS_CONFIG
+from db import get_db_connection
+from modelos import Evento, cargar
+
+CANAL_EVENTOS = "eventos"
+
+# Antes del primer evento posible
+INICIO = (0, 0)
+
+SQL_LEER = """
+    SELECT id, xid, creado_en, tabla, fila_id, operacion, antes, despues
+    FROM eventos
+    WHERE (xid, id) > (%(xid)s, %(id)s)
+      AND xid < pg_snapshot_xmin(pg_current_snapshot())::text::bigint
+      AND (%(tablas)s::text[] IS NULL OR tabla = ANY(%(tablas)s::text[]))
+    ORDER BY xid, id
+    LIMIT %(limite)s
+"""
+
+log = logging.getLogger("eventos")
+
+
+def _leer(cur, posicion, tablas, limite):
+    cur.execute(SQL_LEER, {"xid": posicion[0], "id": posicion[1],
+                           "tablas": list(tablas) if tablas else None, "limite": limite})
+    return cargar(cur, Evento)
+
+
+def leer_eventos(posicion=INICIO, tablas=None, limite=None):
+    """
+    Eventos posteriores a `posicion` (de transacciones terminadas), en orden,
+    como modelos.Evento. La posición para seguir es (e.xid, e.id) del último.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    eventos = _leer(cur, posicion, tablas, limite or EVENTOS_CONFIG["lote"])
+    conn.commit()
+    cur.close()
+    conn.close()
+    return eventos
+
+
+def posicion_actual():
+    """
+    Posición a partir de la cual solo quedan eventos de transacciones que no
+    habían terminado al llamarla. Para arrancar un suscriptor junto con una
+    carga inicial: con escrituras en curso puede repetir algunos eventos ya
+    incluidos en esa carga, nunca saltearse uno.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+    xmin = cur.fetchone()[0]
+    conn.commit()
+    cur.close()
+    conn.close()
+    return (xmin - 1, 2**63 - 1)
+
+
+def purgar_eventos(dias=None):
+    """Borra los eventos de hace más de `dias` días (retencion_dias por defecto). Retorna cuántos."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("DELETE FROM eventos WHERE creado_en < now() - %s * interval '1 day'",
+                (EVENTOS_CONFIG["retencion_dias"] if dias is None else dias,))
+    borrados = cur.rowcount
+    conn.commit()
+    cur.close()
+    conn.close()
+    return borrados
+
+
+# =========================
+#    SUSCRIPCIÓN
+# =========================
+
+class Suscripcion:
+    """
+    Lee los eventos nuevos y se los pasa a manejador(eventos) en tandas de
+    hasta EVENTOS_CONFIG['lote']. Usa su propia conexión (fuera del pool) con
+    LISTEN en CANAL_EVENTOS; sin avisos vuelve a leer cada
+    EVENTOS_CONFIG['espera'] segundos, porque un evento puede quedar retenido
+    por otra transacción larga que al terminar no avisa nada. Si se corta la
+    conexión, se reconecta y sigue desde la última posición aplicada.
+    """
+
+    def __init__(self, manejador, tablas=None, desde=None):
+        self.manejador = manejador
+        self.tablas = list(tablas) if tablas else None
+        self.posicion = desde if desde is not None else posicion_actual()
+        self.aplicados = 0
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def iniciar(self):
+        """Corre la suscripción en un hilo daemon. Retorna self."""
+        self._hilo = threading.Thread(target=self.correr, name="eventos-listen", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self, esperar=True):
+        self._detener.set()
+        if esperar and self._hilo is not None and self._hilo is not threading.current_thread():
+            self._hilo.join()
+
+    def correr(self):
+        """Bucle de la suscripción en el hilo actual, hasta detener()."""
+        while not self._detener.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(**DB_CONFIG)
+                conn.autocommit = True
+                cur = conn.cursor()
+                cur.execute(f"LISTEN {CANAL_EVENTOS}")
+                while not self._detener.is_set():
+                    self._ponerse_al_dia(cur)
+                    if select.select([conn], [], [], EVENTOS_CONFIG["espera"]) != ([], [], []):
+                        conn.poll()
+                        conn.notifies.clear()
+            except (psycopg2.Error, OSError, ValueError):
+                self._detener.wait(1)
+            finally:
+                if conn is not None and not conn.closed:
+                    conn.close()
+
+    def _ponerse_al_dia(self, cur):
+        lote = EVENTOS_CONFIG["lote"]
+        while not self._detener.is_set():
+            eventos = _leer(cur, self.posicion, self.tablas, lote)
+            if not eventos:
+                return
+            try:
+                self.manejador(eventos)
+            except Exception:
+                # La posición no avanza: la tanda se repite
+                log.exception("El manejador de eventos falló; se reintenta la tanda")
+                self._detener.wait(1)
+                return
+            self.posicion = (eventos[-1].xid, eventos[-1].id)
+            self.aplicados += len(eventos)
+            if len(eventos) < lote:
+                return
+
+
+def suscribir(manejador, tablas=None, desde=None):
+    """
+    Llama a manejador(eventos) en un hilo aparte con cada tanda de eventos de
+    `tablas` ('cartas', 'dolls'; todas si es None) posteriores a `desde`
+    (por defecto, posicion_actual()). Retorna la Suscripcion; su atributo
+    `posicion` es lo que hay que guardar para retomar después.
+    """
+    return Suscripcion(manejador, tablas, desde).iniciar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="comando", required=True)
+    seguir = sub.add_parser("seguir", help="imprimir los eventos como JSONL a medida que llegan")
+    seguir.add_argument("--tablas", nargs="+", choices=["cartas", "dolls"])
+    seguir.add_argument("--desde-inicio", action="store_true", help="empezar por el evento más viejo que quede")
+    purgar = sub.add_parser("purgar", help="borrar eventos viejos")
+    purgar.add_argument("--dias", type=int, default=EVENTOS_CONFIG["retencion_dias"])
+    args = parser.parse_args(argv)
+
+    if args.comando == "purgar":
+        print(f"{purgar_eventos(args.dias)} eventos borrados")
+        return 0
+
+    def imprimir(eventos):
+        for e in eventos:
+            print(json.dumps(e._asdict(), default=str, ensure_ascii=False))
+        sys.stdout.flush()
+
+    suscripcion = Suscripcion(imprimir, args.tablas, INICIO if args.desde_inicio else None)
+    try:
+        suscripcion.correr()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+Exportación de cartas, clientes y el reporte por doll a CSV o JSONL.
+
+Nada se junta en memoria: el CSV sale de COPY ... TO STDOUT y el JSONL de un
+cursor con nombre (cada fila ya viene como JSON desde Postgres), en bloques de
+EXPORTACION_CONFIG['bloque'] bytes. Exportar diez millones de cartas ocupa lo
+mismo que exportar diez. Con gzip los bloques se comprimen a medida que salen.
+
+Uso:
+    python -m services.exportacion_services cartas > cartas.csv
+    python -m services.exportacion_services cartas --formato jsonl --gzip -o cartas.jsonl.gz
+    python -m services.exportacion_services reporte -o reporte.csv
+"""
+import argparse
+import queue
+import sys
+import threading
+import time
+import zlib
+
+from config import EXPORTACION_CONFIG
+from db import get_db_connection, iterar_consulta
+from services.reportes_services import SQL_REPORTE_DOLLS
+
+EXPORTACIONES = {
+    "cartas": """
+        SELECT c.id, c.cliente_id, c.doll_id, c.fecha, c.estado, COALESCE(cc.contenido, '') AS contenido
+        FROM cartas c
+        LEFT JOIN cartas_contenido cc ON cc.carta_id = c.id
+        ORDER BY c.id
+    """,
+    "clientes": "SELECT id, nombre, ciudad, motivo, contacto FROM clientes ORDER BY id",
+    "reporte": SQL_REPORTE_DOLLS + " ORDER BY d.id",
+}
+
+FORMATOS = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+_FIN = object()
+
+
+class ExportacionCancelada(Exception):
+    """Quien leía la exportación dejó de hacerlo (ej. el cliente HTTP cortó)."""
+
+
+class _SalidaCopy:
+    """
+    Archivo de escritura para copy_expert(). COPY escribe de a una fila; acá
+    se juntan en bloques y cada bloque pasa a una cola acotada, así que si
+    quien lee se atrasa, COPY espera en lugar de acumular.
+    """
+
+    def __init__(self, bloque, en_vuelo):
+        self.cola = queue.Queue(maxsize=en_vuelo)
+        self.cancelada = threading.Event()
+        self._bloque = bloque
+        self._partes = []
+        self._largo = 0
+
+    def write(self, datos):
+        self._partes.append(datos)
+        self._largo += len(datos)
+        if self._largo >= self._bloque:
+            self._pasar(b"".join(self._partes))
+            self._partes, self._largo = [], 0
+
+    def terminar(self, error=None):
+        if self._partes and error is None:
+            self._pasar(b"".join(self._partes))
+        self._pasar(_FIN if error is None else error)
+
+    def _pasar(self, item):
+        while True:
+            if self.cancelada.is_set():
+                raise ExportacionCancelada()
+            try:
+                self.cola.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                pass
+
+
+def _bloques_csv(sql):
+    salida = _SalidaCopy(EXPORTACION_CONFIG["bloque"], EXPORTACION_CONFIG["en_vuelo"])
+
+    def copiar():
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            cur.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER)", salida)
+            cur.close()
+            conn.close()
+            salida.terminar()
+        except ExportacionCancelada:
+            # COPY quedó a medias: la conexión no vuelve al pool
+            conn.liberar(cerrar=True)
+        except Exception as e:
+            conn.liberar(cerrar=True)
+            try:
+                salida.terminar(e)
+            except ExportacionCancelada:
+                pass
+
+    hilo = threading.Thread(target=copiar, name="exportacion_copy", daemon=True)
+    hilo.start()
+    try:
+        while True:
+            item = salida.cola.get()
+            if item is _FIN:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        salida.cancelada.set()
+        hilo.join()
+
+
+def _bloques_jsonl(sql):
+    bloque = EXPORTACION_CONFIG["bloque"]
+    partes, largo = [], 0
+    filas = iterar_consulta(f"SELECT row_to_json(t)::text FROM ({sql}) t", nombre="exportacion",
+                            itersize=EXPORTACION_CONFIG["itersize"])
+    for (linea,) in filas:
+        partes.append(linea)
+        largo += len(linea) + 1
+        if largo >= bloque:
+            partes.append("")
+            yield "\n".join(partes).encode("utf-8")
+            partes, largo = [], 0
+    if partes:
+        partes.append("")
+        yield "\n".join(partes).encode("utf-8")
+
+
+def _comprimir(bloques):
+    gz = zlib.compressobj(EXPORTACION_CONFIG["nivel_gzip"], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for bloque in bloques:
+        comprimido = gz.compress(bloque)
+        if comprimido:
+            yield comprimido
+    yield gz.flush()
+
+
+def exportar(nombre, formato="csv", comprimir=False):
+    """
+    Valida y retorna un generador con los bytes de la exportación `nombre`
+    (ver EXPORTACIONES) en `formato` ('csv' con encabezado o 'jsonl'),
+    opcionalmente en gzip. La consulta arranca al pedir el primer bloque.
+    """
+    if nombre not in EXPORTACIONES:
+        raise Exception(f"No se puede exportar '{nombre}'")
+    if formato not in FORMATOS:
+        raise Exception(f"Formato no soportado: {formato}")
+    bloques = (_bloques_csv if formato == "csv" else _bloques_jsonl)(EXPORTACIONES[nombre])
+    return _comprimir(bloques) if comprimir else bloques
+
+
+def nombre_archivo(nombre, formato, comprimir=False):
+    return f"{nombre}.{formato}" + (".gz" if comprimir else "")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("nombre", choices=list(EXPORTACIONES))
+    parser.add_argument("--formato", choices=list(FORMATOS), default="csv")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("-o", "--salida", help="archivo de salida (por defecto, la salida estándar)")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    escritos = 0
+    destino = open(args.salida, "wb") if args.salida else sys.stdout.buffer
+    try:
+        for bloque in exportar(args.nombre, args.formato, args.gzip):
+            destino.write(bloque)
+            escritos += len(bloque)
+    finally:
+        if args.salida:
+            destino.close()
+        else:
+            destino.flush()
+    segundos = time.perf_counter() - inicio
+    print(f"{args.nombre}: {escritos / 2**20:.1f} MB en {segundos:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
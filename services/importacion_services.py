@@ -0,0 +1,201 @@
+"""
+Importación masiva de clientes desde CSV o JSONL.
+
+Las filas se cargan con COPY a una tabla temporal y desde ahí, en la misma
+transacción, se insertan en clientes y se genera una carta por cliente: las
+primeras ocupan el cupo libre de las Dolls activas (repartidas de a una por
+Doll) y el resto queda 'en espera'. Si algo falla no queda nada a medias.
+
+Uso:
+    python -m services.importacion_services clientes.csv
+    python -m services.importacion_services clientes.jsonl --formato jsonl
+
+El CSV debe traer encabezado con las columnas nombre, ciudad, motivo, contacto
+(en cualquier orden; solo nombre es obligatoria). En JSONL cada línea es un
+objeto con esas claves.
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+
+from cache import tocar_tablas
+from db import get_db_connection
+from services.dolls_services import CTE_HUECOS, invalidar_dolls_activas
+
+COLUMNAS = ["nombre", "ciudad", "motivo", "contacto"]
+
+# Una carta por cliente importado, en el orden del archivo
+SQL_CARTAS_IMPORTADAS = """
+    WITH """ + CTE_HUECOS + """,
+    nuevos AS (
+        SELECT cliente_id, ROW_NUMBER() OVER (ORDER BY fila) AS pos
+        FROM importacion_ids
+    )
+    INSERT INTO cartas (cliente_id, doll_id, fecha, estado, contenido)
+    SELECT n.cliente_id, h.doll_id, CURRENT_DATE,
+           CASE WHEN h.doll_id IS NULL THEN 'en espera'
+                ELSE (ARRAY['borrador', 'revisado', 'enviado'])[1 + floor(random() * 3)::int]
+           END,
+           ''
+    FROM nuevos n
+    LEFT JOIN huecos h ON h.pos = n.pos
+    RETURNING doll_id
+"""
+
+
+class _JsonlComoCsv:
+    """Adapta un archivo JSONL a la interfaz read() que espera COPY, emitiendo CSV."""
+
+    def __init__(self, archivo):
+        self._lineas = iter(archivo)
+        self._pendiente = ""
+        self.numero = 0
+
+    def read(self, tamano=-1):
+        salida = io.StringIO()
+        escritor = csv.writer(salida, lineterminator="\n")
+        total = len(self._pendiente)
+        partes = [self._pendiente]
+        while tamano < 0 or total < tamano:
+            linea = next(self._lineas, None)
+            if linea is None:
+                break
+            self.numero += 1
+            if not linea.strip():
+                continue
+            try:
+                fila = json.loads(linea)
+            except ValueError:
+                raise Exception(f"Línea {self.numero}: JSON inválido")
+            escritor.writerow([fila.get(columna) for columna in COLUMNAS])
+            parte = salida.getvalue()
+            salida.seek(0)
+            salida.truncate()
+            partes.append(parte)
+            total += len(parte)
+        datos = "".join(partes)
+        if tamano < 0:
+            self._pendiente = ""
+            return datos
+        self._pendiente = datos[tamano:]
+        return datos[:tamano]
+
+
+def _columnas_csv(archivo):
+    """Lee el encabezado del CSV y valida sus columnas."""
+    encabezado = next(csv.reader([archivo.readline()]), [])
+    columnas = [c.strip().lower() for c in encabezado]
+    desconocidas = [c for c in columnas if c not in COLUMNAS]
+    if desconocidas:
+        raise Exception(f"Columnas desconocidas en el CSV: {', '.join(desconocidas)}")
+    if "nombre" not in columnas:
+        raise Exception("El CSV debe tener la columna 'nombre'")
+    return columnas
+
+
+def importar_clientes(archivo, formato="csv"):
+    """
+    Importa clientes desde un archivo de texto abierto (CSV o JSONL) y genera
+    sus cartas. Todo en una transacción.
+    Retorna un resumen con clientes, cartas asignadas/en espera y filas por segundo.
+    """
+    inicio = time.perf_counter()
+    if formato == "csv":
+        columnas = _columnas_csv(archivo)
+        origen = archivo
+    elif formato == "jsonl":
+        columnas = COLUMNAS
+        origen = _JsonlComoCsv(archivo)
+    else:
+        raise Exception(f"Formato no soportado: {formato}")
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            CREATE TEMP TABLE importacion_clientes (
+                fila     BIGSERIAL,
+                nombre   TEXT,
+                ciudad   TEXT,
+                motivo   TEXT,
+                contacto TEXT
+            ) ON COMMIT DROP;
+            CREATE TEMP TABLE importacion_ids (
+                fila       BIGINT,
+                cliente_id INTEGER
+            ) ON COMMIT DROP;
+        """)
+        cur.copy_expert(
+            f"COPY importacion_clientes ({', '.join(columnas)}) FROM STDIN WITH (FORMAT csv)",
+            origen
+        )
+
+        cur.execute("""
+            SELECT fila FROM importacion_clientes
+            WHERE nombre IS NULL OR btrim(nombre) = ''
+            ORDER BY fila LIMIT 1
+        """)
+        sin_nombre = cur.fetchone()
+        if sin_nombre:
+            raise Exception(f"Fila {sin_nombre[0]}: falta el nombre")
+
+        # Se inserta de a una fila por cliente conservando la relación fila -> id
+        cur.execute("""
+            WITH ordenadas AS (
+                SELECT fila, nextval(pg_get_serial_sequence('clientes', 'id')) AS cliente_id,
+                       nombre, ciudad, motivo, contacto
+                FROM importacion_clientes
+                ORDER BY fila
+            ),
+            insertados AS (
+                INSERT INTO clientes (id, nombre, ciudad, motivo, contacto)
+                SELECT cliente_id, btrim(nombre), ciudad, motivo, contacto FROM ordenadas
+            )
+            INSERT INTO importacion_ids (fila, cliente_id)
+            SELECT fila, cliente_id FROM ordenadas
+        """)
+        clientes = cur.rowcount
+
+        cur.execute(SQL_CARTAS_IMPORTADAS, {"doll_ids": None})
+        asignadas = sum(1 for (doll_id,) in cur.fetchall() if doll_id is not None)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+    invalidar_dolls_activas()
+    tocar_tablas("clientes", "cartas")
+    segundos = time.perf_counter() - inicio
+    return {
+        "clientes": clientes,
+        "asignadas": asignadas,
+        "en_espera": clientes - asignadas,
+        "segundos": round(segundos, 3),
+        "filas_por_seg": round(clientes / segundos, 1) if segundos > 0 else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("archivo")
+    parser.add_argument("--formato", choices=["csv", "jsonl"], default=None,
+                        help="por defecto se deduce de la extensión")
+    args = parser.parse_args(argv)
+
+    formato = args.formato or ("jsonl" if args.archivo.endswith(".jsonl") else "csv")
+    with open(args.archivo, encoding="utf-8-sig", newline="") as archivo:
+        resumen = importar_clientes(archivo, formato)
+    print(f"{resumen['clientes']} clientes importados en {resumen['segundos']}s "
+          f"({resumen['filas_por_seg']} filas/s): {resumen['asignadas']} cartas asignadas, "
+          f"{resumen['en_espera']} en espera.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""
+Planificador de asignación de cartas en memoria.
+
+Mantiene una vista de las Dolls activas y su carga, y elige Doll para una
+carta nueva sin ir a la base, según una política intercambiable:
+
+    menos_cargada    heap por (carga, id): la de menos cartas
+    round_robin      recorre las Dolls en orden, saltando las llenas
+    afinidad_ciudad  la menos cargada de la ciudad del cliente; si no hay, cualquiera
+
+La elección es solo una propuesta: guardar_carta_en_doll() la confirma
+contra el contador bloqueado en la base. Si la Doll ya no tiene cupo (otro
+worker la llenó) el planificador se marca para resincronizar y se usa la
+asignación SQL. La vista se recarga cuando pasa el TTL o cuando cambia el
+conjunto de Dolls activas (cache dolls_activas, incluidos otros workers si
+el cache usa el backend 'postgres').
+"""
+import heapq
+import threading
+import time
+
+from config import PLANIFICADOR_CONFIG
+from db import get_db_connection
+from services.dolls_services import cache_dolls_activas
+
+CUPO = 5
+
+
+class DollCarga:
+    __slots__ = ("id", "ciudad", "carga")
+
+    def __init__(self, id, ciudad, carga):
+        self.id = id
+        self.ciudad = (ciudad or "").strip().lower()
+        self.carga = carga
+
+
+# =========================
+#        POLÍTICAS
+# =========================
+
+class MenosCargada:
+    """Heap de (carga, id) con borrado perezoso de entradas viejas."""
+
+    usa_ciudad = False
+
+    def __init__(self):
+        self._heap = []
+
+    def reconstruir(self, dolls):
+        self._heap = [(d.carga, d.id) for d in dolls.values() if d.carga < CUPO]
+        heapq.heapify(self._heap)
+
+    def actualizar(self, doll):
+        if doll.carga < CUPO:
+            heapq.heappush(self._heap, (doll.carga, doll.id))
+
+    def elegir(self, dolls, ciudad=None):
+        while self._heap:
+            carga, doll_id = self._heap[0]
+            doll = dolls.get(doll_id)
+            if doll is not None and doll.carga == carga and carga < CUPO:
+                return doll_id
+            heapq.heappop(self._heap)
+        return None
+
+
+class RoundRobin:
+    """Turnos en orden de id, saltando las Dolls sin cupo."""
+
+    usa_ciudad = False
+
+    def __init__(self):
+        self._orden = []
+        self._pos = 0
+
+    def reconstruir(self, dolls):
+        self._orden = sorted(dolls)
+        self._pos = 0
+
+    def actualizar(self, doll):
+        pass
+
+    def elegir(self, dolls, ciudad=None):
+        n = len(self._orden)
+        for i in range(n):
+            doll_id = self._orden[(self._pos + i) % n]
+            doll = dolls.get(doll_id)
+            if doll is not None and doll.carga < CUPO:
+                self._pos = (self._pos + i + 1) % n
+                return doll_id
+        return None
+
+
+class AfinidadCiudad:
+    """La menos cargada de la misma ciudad que el cliente; si no, la menos cargada de todas."""
+
+    usa_ciudad = True
+
+    def __init__(self):
+        self._por_ciudad = {}
+        self._general = MenosCargada()
+
+    def reconstruir(self, dolls):
+        self._por_ciudad = {}
+        for doll in dolls.values():
+            if doll.ciudad:
+                self._por_ciudad.setdefault(doll.ciudad, MenosCargada()).actualizar(doll)
+        self._general.reconstruir(dolls)
+
+    def actualizar(self, doll):
+        if doll.ciudad:
+            self._por_ciudad.setdefault(doll.ciudad, MenosCargada()).actualizar(doll)
+        self._general.actualizar(doll)
+
+    def elegir(self, dolls, ciudad=None):
+        ciudad = (ciudad or "").strip().lower()
+        if ciudad in self._por_ciudad:
+            doll_id = self._por_ciudad[ciudad].elegir(dolls)
+            if doll_id is not None:
+                return doll_id
+        return self._general.elegir(dolls)
+
+
+POLITICAS = {
+    "menos_cargada": MenosCargada,
+    "round_robin": RoundRobin,
+    "afinidad_ciudad": AfinidadCiudad,
+}
+
+
+# =========================
+#      PLANIFICADOR
+# =========================
+
+class Planificador:
+    """
+    Vista en memoria de las Dolls activas con su carga.
+    Funciona sin base de datos (cargar/registrar/quitar), que es lo que usa el
+    simulador; sincronizar() la llena desde la base.
+    """
+
+    def __init__(self, politica="menos_cargada", dolls=None):
+        self.nombre_politica = politica
+        self.politica = POLITICAS[politica]()
+        self._lock = threading.Lock()
+        self._dolls = {}
+        self._sincronizado_en = None
+        self._generacion_cache = None
+        if dolls is not None:
+            self.cargar(dolls)
+
+    @property
+    def usa_ciudad(self):
+        return self.politica.usa_ciudad
+
+    def cargar(self, dolls):
+        """Reemplaza la vista con [(id, ciudad, carga)]."""
+        with self._lock:
+            self._dolls = {doll_id: DollCarga(doll_id, ciudad, carga) for doll_id, ciudad, carga in dolls}
+            self.politica.reconstruir(self._dolls)
+
+    def elegir(self, ciudad=None):
+        """Retorna el id de la Doll propuesta o None si todas están llenas."""
+        with self._lock:
+            return self.politica.elegir(self._dolls, ciudad)
+
+    def registrar(self, doll_id, delta=1):
+        """Suma (o resta) cartas a la carga de una Doll."""
+        with self._lock:
+            doll = self._dolls.get(doll_id)
+            if doll is None:
+                return
+            doll.carga = max(0, doll.carga + delta)
+            self.politica.actualizar(doll)
+
+    def agregar(self, doll_id, ciudad=None, carga=0):
+        """Agrega una Doll activa a la vista."""
+        with self._lock:
+            doll = self._dolls[doll_id] = DollCarga(doll_id, ciudad, carga)
+            if isinstance(self.politica, RoundRobin):
+                self.politica.reconstruir(self._dolls)
+            self.politica.actualizar(doll)
+
+    def quitar(self, doll_id):
+        """Saca una Doll de la vista (desactivada o eliminada)."""
+        with self._lock:
+            self._dolls.pop(doll_id, None)
+
+    def cargas(self):
+        with self._lock:
+            return {doll_id: doll.carga for doll_id, doll in self._dolls.items()}
+
+    def invalidar(self):
+        """Fuerza una resincronización en el próximo uso."""
+        self._sincronizado_en = None
+
+    def desactualizado(self):
+        if self._sincronizado_en is None:
+            return True
+        if self._generacion_cache != cache_dolls_activas.generacion:
+            return True
+        return time.monotonic() - self._sincronizado_en > PLANIFICADOR_CONFIG["ttl"]
+
+    def sincronizar(self):
+        """Recarga la vista desde dolls + contadores_dolls."""
+        generacion = cache_dolls_activas.generacion
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT d.id, d.ciudad, COALESCE(k.total, 0)
+            FROM dolls d
+            LEFT JOIN contadores_dolls k ON k.doll_id = d.id
+            WHERE d.estado = 'activo'
+        """)
+        rows = cur.fetchall()
+        cur.close()
+        conn.close()
+        self.cargar(rows)
+        self._generacion_cache = generacion
+        self._sincronizado_en = time.monotonic()
+
+
+_planificador = None
+_planificador_lock = threading.Lock()
+
+
+def get_planificador():
+    """
+    Planificador del proceso según PLANIFICADOR_CONFIG, sincronizado si hace
+    falta. Retorna None si la política configurada es None (asignación SQL).
+    """
+    global _planificador
+    politica = PLANIFICADOR_CONFIG["politica"]
+    if politica is None:
+        return None
+    with _planificador_lock:
+        if _planificador is None or _planificador.nombre_politica != politica:
+            _planificador = Planificador(politica)
+        planificador = _planificador
+    if planificador.desactualizado():
+        planificador.sincronizar()
+    return planificador
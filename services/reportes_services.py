@@ -1,60 +1,109 @@
-from database import get_db_connection
+"""
+Reporte por doll.
 
-def generar_reporte_doll(doll_id):
-    conn = get_db_connection()
-    cur = conn.cursor()
+/reporte_dolls lee la vista materializada mv_reporte_dolls (migración
+v0006_reporte_dolls), así que su costo depende de la cantidad de dolls y no de
+la de cartas. Los conteos se ponen al día con refrescar_reporte(): worker.py
+lo llama cada REPORTE_CONFIG['refresco'] segundos, la página tiene un botón y
+también se puede correr a mano:
 
-    # Total de cartas
-    cur.execute("SELECT COUNT(*) FROM cartas WHERE doll_id = %s", (doll_id,))
-    total_cartas = cur.fetchone()[0]
+    python -m services.reportes_services refrescar
+"""
+import sys
+import time
 
-    # Cartas en borrador
-    cur.execute("SELECT COUNT(*) FROM cartas WHERE doll_id = %s AND estado = 'borrador'", (doll_id,))
-    cartas_borrador = cur.fetchone()[0]
+from cache import tocar_tablas
+from db import get_db_connection
+from modelos import DollReporte, cargar
 
-    # Cartas en proceso (estado = 'revisado')
-    cur.execute("SELECT COUNT(*) FROM cartas WHERE doll_id = %s AND estado = 'revisado'", (doll_id,))
-    cartas_proceso = cur.fetchone()[0]
+# Para que dos refrescos simultáneos no hagan el mismo trabajo
+LOCK_REFRESCO = 734002
 
-    # Cartas enviadas
-    cur.execute("SELECT COUNT(*) FROM cartas WHERE doll_id = %s AND estado = 'enviado'", (doll_id,))
-    cartas_enviadas = cur.fetchone()[0]
+# Columnas de modelos.DollReporte; también lo exporta exportacion_services
+SQL_REPORTE_DOLLS = """
+    SELECT d.id, d.nombre, d.edad, d.estado,
+           COALESCE(m.total_cartas, 0)      AS total_cartas,
+           COALESCE(m.cartas_borrador, 0)   AS cartas_borrador,
+           COALESCE(m.cartas_en_proceso, 0) AS cartas_en_proceso,
+           COALESCE(m.enviadas, 0)          AS enviadas,
+           COALESCE(m.clientes_unicos, 0)   AS clientes_unicos
+    FROM dolls d
+    LEFT JOIN mv_reporte_dolls m ON m.doll_id = d.id
+"""
 
-    # Clientes distintos
-    cur.execute("SELECT COUNT(DISTINCT cliente_id) FROM cartas WHERE doll_id = %s", (doll_id,))
-    clientes_distintos = cur.fetchone()[0]
 
+def obtener_reporte_dolls():
+    """
+    Devuelve todas las dolls con sus métricas (modelos.DollReporte), leídas de
+    la vista materializada (conteos al último refresco, ver reporte_actualizado_en).
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(SQL_REPORTE_DOLLS + " ORDER BY d.id ASC")
+    reporte = cargar(cur, DollReporte)
     cur.close()
     conn.close()
+    return reporte
 
-    return {
-        "total_cartas": total_cartas,
-        "cartas_borrador": cartas_borrador,
-        "cartas_en_proceso": cartas_proceso,
-        "enviadas": cartas_enviadas,
-        "clientes_unicos": clientes_distintos
-    }
 
+def reporte_actualizado_en():
+    """Retorna cuándo terminó el último refresco, o None si nunca se refrescó."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT actualizado_en FROM refrescos_reportes WHERE vista = 'mv_reporte_dolls'")
+    row = cur.fetchone()
+    cur.close()
+    conn.close()
+    return row[0] if row else None
 
-def obtener_reporte_dolls():
+
+def refrescar_reporte():
     """
-    Devuelve lista de todas las dolls con sus métricas
+    Recalcula mv_reporte_dolls sin bloquear a quienes la leen (CONCURRENTLY).
+    Si ya hay otro refresco en curso no hace nada y retorna None; si no,
+    retorna cuántos milisegundos tardó.
     """
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute("SELECT id, nombre, estado FROM dolls ORDER BY id ASC")
-    dolls = cur.fetchall()
-    cur.close()
-    conn.close()
+    try:
+        cur.execute("SELECT pg_try_advisory_xact_lock(%s)", (LOCK_REFRESCO,))
+        if not cur.fetchone()[0]:
+            conn.rollback()
+            return None
+        t0 = time.perf_counter()
+        cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_reporte_dolls")
+        duracion = round((time.perf_counter() - t0) * 1000, 1)
+        cur.execute("""
+            INSERT INTO refrescos_reportes (vista, actualizado_en, duracion_ms)
+            VALUES ('mv_reporte_dolls', now(), %s)
+            ON CONFLICT (vista) DO UPDATE
+            SET actualizado_en = EXCLUDED.actualizado_en, duracion_ms = EXCLUDED.duracion_ms
+        """, (duracion,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+    tocar_tablas("reporte")
+    return duracion
 
-    reporte = []
-    for doll in dolls:
-        doll_id, nombre, estado = doll
-        metrics = generar_reporte_doll(doll_id)
-        reporte.append({
-            "id": doll_id,
-            "nombre": nombre,
-            "estado": estado,
-            **metrics
-        })
-    return reporte
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    comando = argv[0] if argv else "refrescar"
+
+    if comando != "refrescar":
+        print(__doc__)
+        return 2
+    duracion = refrescar_reporte()
+    if duracion is None:
+        print("Ya hay un refresco en curso.")
+    else:
+        print(f"mv_reporte_dolls refrescada en {duracion}ms.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""
+Cola de trabajos en segundo plano, guardada en Postgres (tabla trabajos).
+
+Las rutas encolan con encolar() dentro de su propia transacción, así el
+trabajo existe si y solo si el cambio que lo originó se confirmó. Los workers
+(worker.py) toman lotes con FOR UPDATE SKIP LOCKED, de modo que varios
+procesos pueden vaciar la cola sin pisarse. Un trabajo que falla se reintenta
+con espera exponencial hasta max_intentos; después queda 'fallido'.
+"""
+import os
+import socket
+
+from psycopg2.extras import Json
+
+from cache import tocar_tablas
+from config import TRABAJOS_CONFIG
+from db import get_db_connection
+from services.cartas_services import crear_carta_para_cliente
+
+# tipo de trabajo -> función que recibe el payload (dict)
+MANEJADORES = {}
+
+
+def manejador(tipo):
+    """Decorador para registrar la función que procesa un tipo de trabajo."""
+    def registrar(funcion):
+        MANEJADORES[tipo] = funcion
+        return funcion
+    return registrar
+
+
+def nombre_worker():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def encolar(tipo, payload, cur=None):
+    """
+    Agrega un trabajo a la cola y retorna su id.
+    Si se pasa `cur`, se inserta en esa transacción y el commit lo hace quien llama.
+    """
+    sql = "INSERT INTO trabajos (tipo, payload, max_intentos) VALUES (%s, %s, %s) RETURNING id"
+    params = (tipo, Json(payload), TRABAJOS_CONFIG["max_intentos"])
+    if cur is not None:
+        cur.execute(sql, params)
+        return cur.fetchone()[0]
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    trabajo_id = cur.fetchone()[0]
+    conn.commit()
+    cur.close()
+    conn.close()
+    return trabajo_id
+
+
+def tomar_lote(cantidad=None, worker=None):
+    """
+    Marca como 'en_proceso' hasta `cantidad` trabajos disponibles y los retorna
+    como [(id, tipo, payload, intentos, max_intentos)].
+    También retoma los que llevan más de `lease` segundos tomados (worker caído)
+    y les quedan intentos; los que ya no, pasan a 'fallido', así un trabajo que
+    tira abajo al worker no vuelve a tomarse para siempre.
+    """
+    cantidad = cantidad or TRABAJOS_CONFIG["lote"]
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        UPDATE trabajos
+        SET estado = 'fallido', terminado_en = now(),
+            ultimo_error = 'Venció el lease en el último intento (¿se cayó el worker?)'
+        WHERE estado = 'en_proceso' AND intentos >= max_intentos
+          AND tomado_en < now() - %(lease)s * interval '1 second'
+    """, {"lease": TRABAJOS_CONFIG["lease"]})
+    cur.execute("""
+        UPDATE trabajos
+        SET estado = 'en_proceso', tomado_en = now(), tomado_por = %(worker)s,
+            intentos = intentos + 1
+        WHERE id IN (
+            SELECT id FROM trabajos
+            WHERE (estado = 'pendiente' AND disponible_en <= now())
+               OR (estado = 'en_proceso' AND tomado_en < now() - %(lease)s * interval '1 second'
+                   AND intentos < max_intentos)
+            ORDER BY id ASC
+            LIMIT %(cantidad)s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, tipo, payload, intentos, max_intentos
+    """, {"worker": worker or nombre_worker(), "lease": TRABAJOS_CONFIG["lease"], "cantidad": cantidad})
+    trabajos = sorted(cur.fetchall())
+    conn.commit()
+    cur.close()
+    conn.close()
+    return trabajos
+
+
+def completar(trabajo_ids):
+    """Marca como hechos, en una sola sentencia, los trabajos indicados."""
+    if not trabajo_ids:
+        return
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        UPDATE trabajos
+        SET estado = 'hecho', terminado_en = now(), ultimo_error = NULL
+        WHERE id = ANY(%s)
+    """, (list(trabajo_ids),))
+    conn.commit()
+    cur.close()
+    conn.close()
+
+
+def fallar(trabajo_id, intentos, max_intentos, error):
+    """Programa un reintento con espera exponencial o marca el trabajo como 'fallido'."""
+    espera = min(TRABAJOS_CONFIG["backoff_base"] ** intentos, TRABAJOS_CONFIG["backoff_max"])
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        UPDATE trabajos
+        SET estado = CASE WHEN %(intentos)s >= %(max)s THEN 'fallido' ELSE 'pendiente' END,
+            disponible_en = now() + %(espera)s * interval '1 second',
+            terminado_en = CASE WHEN %(intentos)s >= %(max)s THEN now() END,
+            ultimo_error = %(error)s
+        WHERE id = %(id)s
+    """, {"intentos": intentos, "max": max_intentos, "espera": espera, "error": str(error), "id": trabajo_id})
+    conn.commit()
+    cur.close()
+    conn.close()
+
+
+def procesar_lote(cantidad=None, worker=None):
+    """
+    Toma un lote, ejecuta el manejador de cada trabajo y registra el resultado.
+    Retorna (hechos, fallidos); (0, 0) significa que la cola estaba vacía.
+    """
+    hechos, fallidos = [], 0
+    for trabajo_id, tipo, payload, intentos, max_intentos in tomar_lote(cantidad, worker):
+        funcion = MANEJADORES.get(tipo)
+        try:
+            if funcion is None:
+                raise Exception(f"Tipo de trabajo desconocido: {tipo}")
+            funcion(payload)
+            hechos.append(trabajo_id)
+        except Exception as e:
+            fallar(trabajo_id, intentos, max_intentos, e)
+            fallidos += 1
+    completar(hechos)
+    return len(hechos), fallidos
+
+
+def resumen_cola():
+    """Cantidad de trabajos por estado."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT estado, COUNT(*) FROM trabajos GROUP BY estado")
+    resumen = dict(cur.fetchall())
+    cur.close()
+    conn.close()
+    return resumen
+
+
+def purgar_hechos(dias=7):
+    """Borra los trabajos hechos hace más de `dias` días. Retorna cuántos."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(
+        "DELETE FROM trabajos WHERE estado = 'hecho' AND terminado_en < now() - %s * interval '1 day'",
+        (dias,)
+    )
+    borrados = cur.rowcount
+    conn.commit()
+    cur.close()
+    conn.close()
+    return borrados
+
+
+# =========================
+#    MANEJADORES
+# =========================
+
+@manejador("crear_carta_cliente")
+def _crear_carta_cliente(payload):
+    """
+    Genera la carta inicial de un cliente recién creado.
+    Es idempotente: si el cliente ya no existe o ya tiene carta (un reintento
+    después de que la carta se guardó), no hace nada. La fila del cliente
+    queda bloqueada hasta el commit, así que si vence el plazo de un trabajo
+    mientras su primer worker sigue corriendo, el segundo espera y después
+    ve la carta en lugar de crear otra.
+    """
+    cliente_id = payload["cliente_id"]
+    conn = get_db_connection()
+    cur = conn.cursor()
+    creada = False
+    try:
+        cur.execute("SELECT ciudad FROM clientes WHERE id = %s FOR UPDATE", (cliente_id,))
+        fila = cur.fetchone()
+        if fila is not None:
+            # Sentencia aparte: con READ COMMITTED ve lo que confirmó quien tenía el bloqueo
+            cur.execute("SELECT EXISTS (SELECT 1 FROM cartas WHERE cliente_id = %s)", (cliente_id,))
+            if not cur.fetchone()[0]:
+                crear_carta_para_cliente(cliente_id, fila[0], cur)
+                creada = True
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+    if creada:
+        tocar_tablas("cartas")
@@ -0,0 +1,30 @@
+"""
+Las pruebas corren contra la base de config.DB_CONFIG con las migraciones
+aplicadas (python -m migraciones aplicar). Si no hay base, se saltean.
+"""
+import os
+import sys
+
+import psycopg2
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench"))
+
+from config import DB_CONFIG
+
+
+@pytest.fixture(scope="session")
+def base():
+    """Salta la prueba si la base no responde o no tiene las migraciones."""
+    try:
+        conn = psycopg2.connect(**DB_CONFIG, connect_timeout=3)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"sin base de datos: {e}")
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+        if not cur.fetchone()[0]:
+            pytest.skip("base sin migraciones (python -m migraciones aplicar)")
+    finally:
+        conn.close()
@@ -0,0 +1,89 @@
+"""
+Altas concurrentes con guardar_carta_con_doll: ninguna doll pasa de 5 cartas
+y ninguna carta queda en espera mientras haya una doll activa con cupo.
+"""
+import threading
+import time
+
+import psycopg2
+import pytest
+
+from config import DB_CONFIG
+from datos import guardar_carta_con_doll
+from db import get_db_connection
+from generador import DOMINIO_CLIENTE, MARCA_DOLL, limpiar
+
+DOLLS = 6
+HILOS = 8
+CARTAS_POR_HILO = 6
+
+# Cartas reales por doll activa, contadas sobre cartas y no sobre contadores_dolls
+SQL_CARGA_DOLLS = """
+    SELECT d.id, COUNT(c.id)
+    FROM dolls d
+    LEFT JOIN cartas c ON c.doll_id = d.id
+    WHERE d.estado = 'activo'
+    GROUP BY d.id
+"""
+
+
+@pytest.fixture
+def cliente_id(base):
+    limpiar()
+    conn = get_db_connection()
+    cur = conn.cursor()
+    for i in range(DOLLS):
+        cur.execute("INSERT INTO dolls (nombre, edad, estado, descripcion) VALUES (%s, 20, 'activo', %s)",
+                    (f"asignacion_{i}", MARCA_DOLL))
+    cur.execute("INSERT INTO clientes (nombre, ciudad, motivo, contacto) VALUES ('asignacion', 'Leiden', 'prueba', %s) "
+                "RETURNING id", (f"asignacion@{DOMINIO_CLIENTE}",))
+    cliente = cur.fetchone()[0]
+    conn.commit()
+    cur.close()
+    conn.close()
+    yield cliente
+    limpiar()
+
+
+def _altas(cliente, errores):
+    conn = psycopg2.connect(**DB_CONFIG)
+    cur = conn.cursor()
+    try:
+        for _ in range(CARTAS_POR_HILO):
+            guardar_carta_con_doll({"cliente_id": cliente, "contenido": "prueba"}, cur)
+            # Quien llama suele hacer algo más en la transacción antes del commit
+            time.sleep(0.005)
+            conn.commit()
+    except Exception as e:
+        errores.append(e)
+    finally:
+        conn.close()
+
+
+def test_altas_concurrentes_respetan_cupo_y_no_dejan_cartas_sin_asignar(cliente_id):
+    errores = []
+    hilos = [threading.Thread(target=_altas, args=(cliente_id, errores)) for _ in range(HILOS)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert not errores
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(SQL_CARGA_DOLLS)
+    carga = dict(cur.fetchall())
+    cur.execute("SELECT estado, COUNT(*) FROM cartas WHERE cliente_id = %s GROUP BY estado", (cliente_id,))
+    por_estado = dict(cur.fetchall())
+    cur.execute("SELECT doll_id, total FROM contadores_dolls WHERE doll_id = ANY(%s)", (list(carga),))
+    contadores = dict(cur.fetchall())
+    conn.commit()
+    cur.close()
+    conn.close()
+
+    assert sum(por_estado.values()) == HILOS * CARTAS_POR_HILO
+    assert max(carga.values()) <= 5
+    assert contadores == carga
+    if por_estado.get("en espera"):
+        con_cupo = {doll_id: n for doll_id, n in carga.items() if n < 5}
+        assert not con_cupo, f"{por_estado['en espera']} cartas en espera con dolls con cupo: {con_cupo}"
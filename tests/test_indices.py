@@ -0,0 +1,33 @@
+import pytest
+
+from migraciones.verificar import CONSULTAS_CALIENTES, verificar_indices
+
+# Índices que dependen de una extensión que puede no estar instalada
+EXTENSIONES = {"idx_clientes_nombre_trgm": "pg_trgm"}
+
+
+@pytest.fixture(scope="module")
+def resultados(base):
+    return {descripcion: (indice, usados) for descripcion, indice, usados in verificar_indices()}
+
+
+@pytest.fixture(scope="module")
+def extensiones(base):
+    from db import get_db_connection
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT extname FROM pg_extension")
+    nombres = {fila[0] for fila in cur.fetchall()}
+    conn.commit()
+    cur.close()
+    conn.close()
+    return nombres
+
+
+@pytest.mark.parametrize("descripcion", [c[0] for c in CONSULTAS_CALIENTES])
+def test_consulta_usa_su_indice(descripcion, resultados, extensiones):
+    indice, usados = resultados[descripcion]
+    extension = EXTENSIONES.get(indice)
+    if extension and extension not in extensiones:
+        pytest.skip(f"{indice} necesita la extensión {extension}")
+    assert indice in usados, f"{descripcion}: espera {indice}, usa {usados or 'ningún índice'}"
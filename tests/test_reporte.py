@@ -0,0 +1,75 @@
+"""
+Regresión del reporte por doll: obtener_reporte_dolls() (vista materializada,
+recién refrescada) contra las métricas contadas directo sobre cartas.
+"""
+import pytest
+
+from db import get_db_connection
+from generador import limpiar, sembrar
+from services.reportes_services import obtener_reporte_dolls, refrescar_reporte
+
+# Referencia: cada métrica de una doll contada sobre cartas, una consulta por métrica
+SQL_REFERENCIA = {
+    "total_cartas": "SELECT COUNT(*) FROM cartas WHERE doll_id = %s",
+    "cartas_borrador": "SELECT COUNT(*) FROM cartas WHERE doll_id = %s AND estado = 'borrador'",
+    "cartas_en_proceso": "SELECT COUNT(*) FROM cartas WHERE doll_id = %s AND estado = 'revisado'",
+    "enviadas": "SELECT COUNT(*) FROM cartas WHERE doll_id = %s AND estado = 'enviado'",
+    "clientes_unicos": "SELECT COUNT(DISTINCT cliente_id) FROM cartas WHERE doll_id = %s",
+}
+
+
+def reporte_de_referencia(doll_ids):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    reporte = {}
+    for doll_id in doll_ids:
+        fila = {}
+        for metrica, sql in SQL_REFERENCIA.items():
+            cur.execute(sql, (doll_id,))
+            fila[metrica] = cur.fetchone()[0]
+        reporte[doll_id] = fila
+    conn.commit()
+    cur.close()
+    conn.close()
+    return reporte
+
+
+@pytest.fixture
+def sembrado(base):
+    limpiar()
+    sembrar(50, 200, 400, semilla=42)
+    yield
+    limpiar()
+
+
+def test_reporte_coincide_con_la_referencia(sembrado):
+    assert refrescar_reporte() is not None, "había otro refresco en curso"
+    reporte = obtener_reporte_dolls()
+    referencia = reporte_de_referencia([d.id for d in reporte])
+
+    assert sum(d.total_cartas for d in reporte) > 0
+    diferencias = [
+        (d.id, metrica, getattr(d, metrica), esperado)
+        for d in reporte for metrica, esperado in referencia[d.id].items()
+        if getattr(d, metrica) != esperado
+    ]
+    assert not diferencias
+
+
+def test_reporte_no_cambia_hasta_refrescar(sembrado):
+    refrescar_reporte()
+    antes = {d.id: d.total_cartas for d in obtener_reporte_dolls()}
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("UPDATE cartas SET doll_id = NULL, estado = 'en espera' WHERE doll_id = "
+                "(SELECT doll_id FROM cartas WHERE doll_id IS NOT NULL ORDER BY id LIMIT 1) RETURNING doll_id")
+    liberadas = cur.rowcount
+    conn.commit()
+    cur.close()
+    conn.close()
+    assert liberadas > 0
+
+    assert {d.id: d.total_cartas for d in obtener_reporte_dolls()} == antes
+    refrescar_reporte()
+    despues = reporte_de_referencia(antes)
+    assert {d.id: d.total_cartas for d in obtener_reporte_dolls()} == {i: m["total_cartas"] for i, m in despues.items()}
@@ -0,0 +1,51 @@
+"""Retomar trabajos con el lease vencido (worker caído)."""
+import pytest
+
+from config import TRABAJOS_CONFIG
+from db import get_db_connection
+from services.trabajos_services import tomar_lote
+
+TIPO = "prueba_lease"
+
+SQL_DISPONIBLES = """
+    SELECT COUNT(*) FROM trabajos
+    WHERE tipo <> %(tipo)s
+      AND ((estado = 'pendiente' AND disponible_en <= now())
+           OR (estado = 'en_proceso' AND tomado_en < now() - %(lease)s * interval '1 second'))
+"""
+
+
+def _ejecutar(sql, params=None):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    filas = cur.fetchall() if cur.description else None
+    conn.commit()
+    cur.close()
+    conn.close()
+    return filas
+
+
+@pytest.fixture
+def vencidos(base):
+    # tomar_lote toma cualquier trabajo: no robarle a la cola trabajos reales
+    if _ejecutar(SQL_DISPONIBLES, {"tipo": TIPO, "lease": TRABAJOS_CONFIG["lease"]})[0][0]:
+        pytest.skip("hay otros trabajos disponibles en la cola")
+    filas = _ejecutar("""
+        INSERT INTO trabajos (tipo, payload, estado, intentos, max_intentos, tomado_en, tomado_por)
+        VALUES (%(tipo)s, '{}', 'en_proceso', 2, 3, now() - %(vencido)s * interval '1 second', 'caido'),
+               (%(tipo)s, '{}', 'en_proceso', 3, 3, now() - %(vencido)s * interval '1 second', 'caido')
+        RETURNING id, intentos
+    """, {"tipo": TIPO, "vencido": TRABAJOS_CONFIG["lease"] + 60})
+    yield {intentos: trabajo_id for trabajo_id, intentos in filas}
+    _ejecutar("DELETE FROM trabajos WHERE tipo = %s", (TIPO,))
+
+
+def test_lease_vencido_se_retoma_solo_con_intentos(vencidos):
+    tomados = tomar_lote(10, worker="prueba")
+
+    assert [t[0] for t in tomados] == [vencidos[2]]
+    assert tomados[0][3] == 3
+    estados = dict(_ejecutar("SELECT id, estado FROM trabajos WHERE tipo = %s", (TIPO,)))
+    assert estados == {vencidos[2]: "en_proceso", vencidos[3]: "fallido"}
+    assert tomar_lote(10, worker="prueba") == []
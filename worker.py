@@ -0,0 +1,67 @@
+"""
+Worker de la cola de trabajos (ver services/trabajos_services.py).
+
+Toma lotes de trabajos pendientes y los procesa hasta que se lo detiene con
+Ctrl+C / SIGTERM. Se pueden correr varios a la vez. También refresca el
+reporte materializado cada REPORTE_CONFIG['refresco'] segundos y una vez por
+hora borra los trabajos hechos y los eventos más viejos que la retención.
+
+Uso:
+    python worker.py                 # procesa para siempre
+    python worker.py --una-vez       # vacía la cola y termina
+    python worker.py --lote 100
+"""
+import argparse
+import signal
+import time
+
+from config import REPORTE_CONFIG, TRABAJOS_CONFIG
+from services.eventos_services import purgar_eventos
+from services.reportes_services import refrescar_reporte
+from services.trabajos_services import nombre_worker, procesar_lote, purgar_hechos
+
+detener = False
+
+
+def _pedir_parada(signum, frame):
+    global detener
+    detener = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lote", type=int, default=TRABAJOS_CONFIG["lote"])
+    parser.add_argument("--una-vez", action="store_true", help="terminar cuando la cola quede vacía")
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGINT, _pedir_parada)
+    signal.signal(signal.SIGTERM, _pedir_parada)
+
+    worker = nombre_worker()
+    total_hechos = total_fallidos = 0
+    ultima_purga = ultimo_refresco = 0.0
+    print(f"Worker {worker} iniciado (lote={args.lote}).")
+
+    while not detener:
+        if REPORTE_CONFIG["refresco"] and time.monotonic() - ultimo_refresco > REPORTE_CONFIG["refresco"]:
+            refrescar_reporte()
+            ultimo_refresco = time.monotonic()
+        hechos, fallidos = procesar_lote(args.lote, worker)
+        total_hechos += hechos
+        total_fallidos += fallidos
+        if hechos or fallidos:
+            print(f"lote: {hechos} hechos, {fallidos} fallidos (total {total_hechos}/{total_fallidos})")
+            continue
+        if args.una_vez:
+            break
+        if time.monotonic() - ultima_purga > 3600:
+            purgar_hechos()
+            purgar_eventos()
+            ultima_purga = time.monotonic()
+        time.sleep(TRABAJOS_CONFIG["espera_vacia"])
+
+    print(f"Worker {worker} detenido: {total_hechos} hechos, {total_fallidos} fallidos.")
+
+
+if __name__ == "__main__":
+    main()